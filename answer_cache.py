@@ -0,0 +1,89 @@
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", 0.95))
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", 3600))
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", 1000))
+
+
+def context_version(ids):
+    """Version of a retrieved context; chunk ids are content-addressed, so ids alone identify the text."""
+    return hashlib.sha256("\0".join(ids).encode("utf-8")).hexdigest()[:16]
+
+
+def replay_chunks(text):
+    """Splits a cached answer into word-sized pieces (with their whitespace) so it can be streamed like a live response."""
+    return re.findall(r"\S+\s*|\s+", text)
+
+
+class SemanticAnswerCache:
+    """
+    Caches final answers by query embedding. A lookup hits when a stored query in the
+    same (language, context version) scope is at least `threshold` cosine-similar.
+    Entries expire after `ttl` seconds and the least recently used are evicted
+    beyond `max_entries`.
+
+    Nothing needs invalidating when the knowledge base changes, at startup or through a
+    bulk ingest into a loaded tenant: chunk ids are content-addressed, so a changed
+    chunk changes the context version of every question that retrieves it, and answers
+    stored under the old one are never matched again (they age out with the TTL).
+    """
+
+    def __init__(self, threshold=ANSWER_CACHE_THRESHOLD, ttl=ANSWER_CACHE_TTL, max_entries=ANSWER_CACHE_MAX_ENTRIES):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (scope, unit vector, answer, created)
+        self._next_key = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _unit(embedding):
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, embedding, lang, context):
+        query = self._unit(embedding)
+        scope = (lang, context)
+        now = time.time()
+        with self._lock:
+            expired = [key for key, entry in self._entries.items() if now - entry[3] > self.ttl]
+            for key in expired:
+                del self._entries[key]
+
+            candidates = [(key, entry) for key, entry in self._entries.items() if entry[0] == scope]
+            if candidates:
+                scores = np.stack([entry[1] for _, entry in candidates]) @ query
+                best = int(np.argmax(scores))
+                if scores[best] >= self.threshold:
+                    key, entry = candidates[best]
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[2]
+            self.misses += 1
+            return None
+
+    def store(self, embedding, lang, context, answer):
+        with self._lock:
+            self._entries[self._next_key] = ((lang, context), self._unit(embedding), answer, time.time())
+            self._next_key += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+        }
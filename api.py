@@ -0,0 +1,284 @@
+"""
+Headless chat API for the restaurant assistant, so kiosks, phone IVR and the Streamlit
+app can share one service behind a load balancer.
+
+    uvicorn api:app --host 0.0.0.0 --port 8000
+
+POST /chat       {"session_id", "question", "lang", "tenant"} -> server-sent events:
+                 "meta" {"source"}, then "token" {"text"} per chunk, then "done" or "error"
+POST /retrieve   {"question", "lang", "tenant"} -> {"context", "ids", "menu_answer"}
+POST /tts        {"text", "lang", "tenant"} -> audio/mpeg
+DELETE /sessions/{session_id}?tenant=
+GET /sessions/{session_id}/messages?tenant=&limit=&offset=
+                 -> {"messages": [{"role", "text", "lang", "source", "created"}]}, oldest first
+GET /questions/top?tenant=&limit=&days=
+                 -> {"questions": [{"question", "count", "last_asked"}]}
+GET /tenants     -> {"tenants": [{"id", "name"}]}
+GET /stats?tenant=
+
+"tenant" picks the restaurant (tenants.py) and defaults to DEFAULT_TENANT; unknown
+tenants get a 404.
+"""
+import asyncio
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+from dotenv import load_dotenv
+load_dotenv()
+
+import google.generativeai as genai
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
+
+from assistant import Assistant
+from speech_text import normalize_for_speech
+from tenants import DEFAULT_TENANT, UnknownTenant
+from transcripts import TRANSCRIPT_WINDOW
+
+# Answers streaming from Gemini at once; each holds a worker thread for the length of its stream
+API_LLM_CONCURRENCY = int(os.getenv("API_LLM_CONCURRENCY", 64))
+API_TTS_CONCURRENCY = int(os.getenv("API_TTS_CONCURRENCY", 16))
+# Requests allowed to wait for a free LLM or TTS slot before new ones are turned away with 503
+API_QUEUE_LIMIT = int(os.getenv("API_QUEUE_LIMIT", 512))
+API_QUEUE_TIMEOUT = float(os.getenv("API_QUEUE_TIMEOUT", 15))
+# Chunks buffered per stream; when a client reads slower than this, reading from Gemini pauses
+API_STREAM_BUFFER = int(os.getenv("API_STREAM_BUFFER", 64))
+
+genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+
+
+class Overloaded(Exception):
+    pass
+
+
+class ConcurrencyGate:
+    """A semaphore with a bounded wait queue, so overload turns into a fast 503."""
+
+    def __init__(self, limit, queue_limit, timeout):
+        self.limit = limit
+        self.queue_limit = queue_limit
+        self.timeout = timeout
+        self.active = 0
+        self.waiting = 0
+        self.rejected = 0
+        self._semaphore = asyncio.Semaphore(limit)
+
+    def full(self):
+        return self.active >= self.limit and self.waiting >= self.queue_limit
+
+    @asynccontextmanager
+    async def slot(self):
+        if self.full():
+            self.rejected += 1
+            raise Overloaded()
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise Overloaded() from None
+        finally:
+            self.waiting -= 1
+        self.active += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self._semaphore.release()
+
+    def stats(self):
+        return {"active": self.active, "waiting": self.waiting, "rejected": self.rejected, "limit": self.limit}
+
+
+llm_gate = ConcurrencyGate(API_LLM_CONCURRENCY, API_QUEUE_LIMIT, API_QUEUE_TIMEOUT)
+tts_gate = ConcurrencyGate(API_TTS_CONCURRENCY, API_QUEUE_LIMIT, API_QUEUE_TIMEOUT)
+# Gemini's client is blocking, so streams are read in their own pool rather than the shared one
+_stream_executor = ThreadPoolExecutor(max_workers=API_LLM_CONCURRENCY, thread_name_prefix="llm-stream")
+
+
+async def iterate_in_thread(chunks, buffer=API_STREAM_BUFFER):
+    """
+    Async iterator over a blocking iterator that is consumed in a worker thread. The
+    queue between them is bounded, so a slow client pauses the worker instead of
+    letting chunks pile up, and the worker stops when the client goes away.
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue(maxsize=buffer)
+    stopped = threading.Event()
+
+    def put(item):
+        asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+
+    def produce():
+        try:
+            for chunk in chunks:
+                if stopped.is_set():
+                    break
+                put(("chunk", chunk))
+            put(("done", None))
+        except Exception as e:
+            put(("error", e))
+        finally:
+            close = getattr(chunks, "close", None)
+            if close is not None:
+                close()
+
+    loop.run_in_executor(_stream_executor, produce)
+    try:
+        while True:
+            kind, value = await queue.get()
+            if kind == "done":
+                return
+            if kind == "error":
+                raise value
+            yield value
+    finally:
+        stopped.set()
+        # Unblock a worker waiting on a full queue so it can see that we stopped
+        while not queue.empty():
+            queue.get_nowait()
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # Syncing the knowledge base may embed documents, so it runs off the event loop
+    app.state.assistant = await run_in_threadpool(Assistant)
+    yield
+
+
+app = FastAPI(title="The Golden Spoon assistant", lifespan=lifespan)
+
+
+class ChatRequest(BaseModel):
+    session_id: str
+    question: str
+    lang: str = "en"
+    tenant: str = DEFAULT_TENANT
+
+
+class RetrieveRequest(BaseModel):
+    question: str
+    lang: str = "en"
+    tenant: str = DEFAULT_TENANT
+
+
+class TTSRequest(BaseModel):
+    text: str
+    lang: str = "en"
+    tenant: str = DEFAULT_TENANT
+
+
+def sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def load_tenant(tenant_id):
+    """The tenant, loading it off the event loop if it is cold."""
+    try:
+        return await run_in_threadpool(app.state.assistant.tenant, tenant_id)
+    except UnknownTenant:
+        raise HTTPException(status_code=404, detail=f"Unknown tenant {tenant_id!r}.") from None
+
+
+def overloaded():
+    return HTTPException(status_code=503, detail="Too many conversations in progress, try again shortly.",
+                         headers={"Retry-After": "1"})
+
+
+@app.post("/chat")
+async def chat(request: ChatRequest):
+    # Reject before doing any work when the LLM queue is already full
+    if llm_gate.full():
+        llm_gate.rejected += 1
+        raise overloaded()
+    await load_tenant(request.tenant)
+    turn = await run_in_threadpool(
+        app.state.assistant.start_turn, request.session_id, request.question, request.lang, request.tenant
+    )
+
+    async def events():
+        yield sse("meta", {"source": turn.source})
+        parts = []
+        try:
+            if turn.source == "llm":
+                async with llm_gate.slot():
+                    async for chunk in iterate_in_thread(turn.chunks):
+                        parts.append(chunk)
+                        yield sse("token", {"text": chunk})
+            else:
+                # Menu and cached answers are already in memory
+                for chunk in turn.chunks:
+                    parts.append(chunk)
+                    yield sse("token", {"text": chunk})
+            # Recording may summarize older turns with Gemini, so it stays off the event loop
+            await run_in_threadpool(turn.finish, "".join(parts).strip())
+        except Overloaded:
+            yield sse("error", {"detail": "Too many conversations in progress, try again shortly."})
+        except Exception as e:
+            yield sse("error", {"detail": str(e)})
+        else:
+            yield sse("done", {})
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@app.post("/retrieve")
+async def retrieve(request: RetrieveRequest):
+    assistant = app.state.assistant
+    await load_tenant(request.tenant)
+    # Fuzzy dish matching takes tens of milliseconds on long questions; kept off the event loop
+    menu_answer = await run_in_threadpool(assistant.menu_answer, request.question, request.lang, request.tenant)
+    retrieval = await run_in_threadpool(assistant.retrieve, request.question, request.lang, request.tenant)
+    return {"context": retrieval["context"], "ids": retrieval["ids"], "menu_answer": menu_answer}
+
+
+@app.post("/tts")
+async def tts(request: TTSRequest):
+    text = normalize_for_speech(request.text, request.lang).strip()
+    if not text:
+        raise HTTPException(status_code=400, detail="Nothing to speak.")
+    tenant = await load_tenant(request.tenant)
+    try:
+        async with tts_gate.slot():
+            audio = await run_in_threadpool(tenant.synthesize, text, request.lang)
+    except Overloaded:
+        raise overloaded() from None
+    return Response(content=audio, media_type="audio/mpeg")
+
+
+@app.delete("/sessions/{session_id}")
+async def clear_session(session_id: str, tenant: str = DEFAULT_TENANT):
+    app.state.assistant.clear_session(session_id, tenant)
+    return {"cleared": session_id}
+
+
+@app.get("/sessions/{session_id}/messages")
+async def session_messages(session_id: str, tenant: str = DEFAULT_TENANT, limit: int = TRANSCRIPT_WINDOW,
+                           offset: int = 0):
+    messages = await run_in_threadpool(app.state.assistant.history, session_id, tenant, limit, offset)
+    return {"messages": messages}
+
+
+@app.get("/questions/top")
+async def top_questions(tenant: str = DEFAULT_TENANT, limit: int = 20, days: float = None):
+    # The most asked questions, e.g. to pre-warm the answer and speech caches
+    since = time.time() - days * 86400 if days else None
+    return {"questions": await run_in_threadpool(app.state.assistant.top_questions, tenant, limit, since)}
+
+
+@app.get("/tenants")
+async def tenants():
+    return {"tenants": app.state.assistant.list_tenants()}
+
+
+@app.get("/stats")
+async def stats(tenant: str = DEFAULT_TENANT):
+    await load_tenant(tenant)
+    return {**app.state.assistant.stats(tenant), "llm": llm_gate.stats(), "tts": tts_gate.stats()}
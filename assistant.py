@@ -0,0 +1,194 @@
+import os
+import threading
+from collections import OrderedDict
+from functools import partial
+
+from answer_cache import replay_chunks
+from chat_session import ChatSession
+from embeddings import EmbeddingCache
+from menu_index import answer_from_menu
+from providers import load_providers
+from query_embedder import normalize_query
+from telemetry import span
+from tenants import DEFAULT_TENANT, Tenant, TenantRegistry, list_tenants
+from transcripts import TRANSCRIPT_WINDOW, TranscriptStore
+from tts_cache import AudioCache
+from vector_index import open_client
+
+# Conversations kept in memory; the least recently active are dropped first
+CHAT_MAX_SESSIONS = int(os.getenv("CHAT_MAX_SESSIONS", 1000))
+
+LANGUAGE_INSTRUCTIONS = {"hi": "कृपया हिन्दी में उत्तर दें। "}
+
+
+class Turn:
+    """
+    One question being answered. `source` says where the answer comes from ("menu",
+    "cache" or "llm") and `chunks` yields its text; nothing is sent to Gemini until
+    `chunks` is iterated (and an identical question already streaming is joined rather
+    than asked again, see single_flight.py). Call `finish` with the full answer once it
+    has been streamed.
+    """
+
+    def __init__(self, tenant, session, question, lang, source, chunks, retrieval=None, transcript=None,
+                 cacheable=False):
+        self.tenant = tenant
+        self.session = session
+        self.question = question
+        self.lang = lang
+        self.source = source
+        self.chunks = chunks
+        self.retrieval = retrieval
+        self.transcript = transcript  # (text, source) -> None, logs the answer
+        self.cacheable = cacheable
+
+    def finish(self, answer):
+        # Answers retrieved lexically have no query embedding to cache them under, and a turn
+        # that joined another's stream leaves storing the answer to that one
+        if self.source == "llm" and self.cacheable and self.retrieval["embedding"] is not None \
+                and not self.chunks.joined:
+            self.tenant.answer_cache.store(
+                self.retrieval["embedding"], self.lang, self.retrieval["context_key"], answer
+            )
+        self.session.record(self.question, answer)
+        if self.transcript is not None:
+            self.transcript(answer, source=self.source)
+
+
+class Assistant:
+    """
+    The restaurant assistant without any UI: knowledge-base retrieval, answering and
+    speech, plus the per-conversation chat sessions. The Streamlit app and the HTTP API
+    (api.py) both drive one shared instance. The LLM, embedder and TTS come from
+    `providers` (Google services unless PROVIDERS=fake).
+
+    Every call takes a `tenant_id` (tenants.py) selecting the restaurant; conversations
+    are kept per (tenant, session id). Their transcripts are persisted (transcripts.py),
+    so a conversation dropped from memory, or from a restarted process, picks up where
+    it left off.
+    """
+
+    def __init__(self, providers=None, max_sessions=CHAT_MAX_SESSIONS, max_tenants=None, transcripts=None):
+        self.providers = providers or load_providers()
+        self.max_sessions = max_sessions
+        self.transcripts = transcripts or TranscriptStore()
+        self._sessions = OrderedDict()  # (tenant id, session id) -> ChatSession
+        self._lock = threading.Lock()
+
+        # Embeddings are cached on disk, so restarts with an unchanged corpus make no embedding API calls.
+        # Synthesized sentences are cached on disk (and the hottest in memory), so repeated
+        # greetings, hours, addresses and phone numbers are never synthesized twice. Both
+        # stores are shared by all tenants under one size cap, with per-tenant keys
+        self.embedding_cache = EmbeddingCache()
+        self.audio_cache = AudioCache()
+        # Chroma, or the in-memory NumPy index with VECTOR_BACKEND=numpy (vector_index.py)
+        self.vector_client = open_client()
+
+        options = {} if max_tenants is None else {"max_loaded": max_tenants}
+        self.tenants = TenantRegistry(self._build_tenant, **options)
+        # The default restaurant is loaded up front so the first guest doesn't wait for it
+        default = self.tenant()
+        if not (default.sync_summary["added"] or default.sync_summary["updated"] or default.sync_summary["deleted"]):
+            print("ChromaDB already up to date.")
+
+    def _build_tenant(self, tenant_id, source):
+        # Documents are split into section/item chunks, and only chunks whose content changed
+        # since the last load are re-embedded (tracked in a manifest per tenant)
+        return Tenant(tenant_id, source, self.providers, self.vector_client, self.embedding_cache, self.audio_cache)
+
+    def tenant(self, tenant_id=DEFAULT_TENANT):
+        """The loaded tenant; raises tenants.UnknownTenant for ids without a knowledge base."""
+        return self.tenants.get(tenant_id)
+
+    def list_tenants(self):
+        return list_tenants(self.tenants.root)
+
+    def session(self, session_id, tenant_id=DEFAULT_TENANT):
+        key = (tenant_id, session_id)
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None:
+                session = self._sessions[key] = ChatSession(self.providers.llm)
+                session.turns = self.transcripts.turns(tenant_id, session_id, session.max_turns)
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+            else:
+                self._sessions.move_to_end(key)
+            return session
+
+    def clear_session(self, session_id, tenant_id=DEFAULT_TENANT):
+        # Only forgets the conversation; the transcript is kept (clients start a new session id)
+        with self._lock:
+            session = self._sessions.pop((tenant_id, session_id), None)
+        if session is not None:
+            # A turn still streaming may hold it; clearing also discards a summary still
+            # being written, instead of folding the old conversation back in
+            session.clear()
+
+    def history(self, session_id, tenant_id=DEFAULT_TENANT, limit=TRANSCRIPT_WINDOW, offset=0):
+        return self.transcripts.history(tenant_id, session_id, limit=limit, offset=offset)
+
+    def top_questions(self, tenant_id=DEFAULT_TENANT, limit=20, since=None):
+        return self.transcripts.top_questions(tenant_id, limit=limit, since=since)
+
+    def retrieve(self, question, lang="en", tenant_id=DEFAULT_TENANT):
+        return self.tenant(tenant_id).retrieve(question, lang)
+
+    def menu_answer(self, question, lang="en", tenant_id=DEFAULT_TENANT):
+        menu_index = self.tenant(tenant_id).menu_index
+        return answer_from_menu(menu_index, question, lang=lang) if menu_index is not None else None
+
+    def synthesize(self, text, lang="en", tenant_id=DEFAULT_TENANT):
+        return self.tenant(tenant_id).synthesize(text, lang)
+
+    def start_turn(self, session_id, question, lang="en", tenant_id=DEFAULT_TENANT):
+        tenant = self.tenant(tenant_id)
+        session = self.session(session_id, tenant_id)
+        model_question = f"{LANGUAGE_INSTRUCTIONS.get(lang, '')}{question}"
+        # Queued for the background writer, so logging adds nothing to the turn's latency
+        self.transcripts.append(tenant_id, session_id, "user", question, lang=lang)
+        transcript = partial(self.transcripts.append, tenant_id, session_id, "assistant", lang=lang)
+
+        # Price/diet/hours questions are answered straight from the menu index, skipping retrieval and Gemini
+        fast_answer = self.menu_answer(question, lang, tenant_id)
+        if fast_answer is not None:
+            return Turn(tenant, session, model_question, lang, "menu", iter([fast_answer]), transcript=transcript)
+
+        retrieval = tenant.retrieve(question, lang)
+        # A follow-up ("how much is it?") means something else in every conversation, so
+        # only a conversation's first question is answered from, or stored in, the cache
+        cacheable = not session.history_key()
+        cached_answer = None
+        if cacheable and retrieval["embedding"] is not None:
+            with span("answer_cache.lookup") as lookup_span:
+                cached_answer = tenant.answer_cache.lookup(retrieval["embedding"], lang, retrieval["context_key"])
+                lookup_span.set_attribute("hit", cached_answer is not None)
+        if cached_answer is not None:
+            # Replayed through the same streaming path as a live answer
+            return Turn(tenant, session, model_question, lang, "cache", iter(replay_chunks(cached_answer)), retrieval,
+                        transcript=transcript)
+
+        # Tables asking the same thing at the same time share one Gemini stream. The answer
+        # is generated from the first table's history, so only identical conversations (in
+        # practice, first questions) are shared
+        key = (normalize_query(question), lang, retrieval["context_key"], session.history_key())
+        chunks = tenant.llm_streams.stream(key, lambda: self._generate(session, model_question, retrieval["context"]))
+        return Turn(tenant, session, model_question, lang, "llm", chunks, retrieval, transcript=transcript,
+                    cacheable=cacheable)
+
+    @staticmethod
+    def _generate(session, question, context):
+        # A generator, so nothing is sent until the caller starts streaming. The context is
+        # only sent with this turn and is not kept in the history
+        yield from session.send(question, context)
+
+    def stats(self, tenant_id=DEFAULT_TENANT):
+        tenant = self.tenant(tenant_id)
+        return {
+            "sessions": len(self._sessions),
+            "tenant": tenant.id,
+            **tenant.stats(),
+            "speech_cache": self.audio_cache.stats(),
+            "transcripts": self.transcripts.stats(),
+            "tenants": self.tenants.stats(),
+        }
@@ -0,0 +1,110 @@
+"""
+Compares prompt size and Gemini latency for menu questions when the context is the
+whole top-1 document (the old behaviour) versus packed top-k chunks.
+
+    python benchmarks/bench_context.py            # prompt size + LLM latency
+    python benchmarks/bench_context.py --no-llm   # prompt size only
+
+Needs GOOGLE_API_KEY for the embedding calls (and the LLM calls unless --no-llm).
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+import chromadb
+import google.generativeai as genai
+
+from chunking import CONTEXT_TOKEN_BUDGET, CONTEXT_TOP_K, chunk_documents, estimate_tokens, pack_context
+from embeddings import CachedEmbeddingFunction, GeminiEmbeddingFunction
+from knowledge_base import documents
+
+QUESTIONS = [
+    "How much is the Masala Dosa?",
+    "What vegan Chinese dishes do you have?",
+    "Do you serve Korean food?",
+    "What desserts are on the menu?",
+    "When is street food available?",
+    "How much does a pepperoni pizza cost?",
+    "What beverages do you have?",
+    "Is the Dal Makhani vegan?",
+]
+
+
+def build_collections():
+    embed_fn = CachedEmbeddingFunction(GeminiEmbeddingFunction())
+    client = chromadb.Client()
+    whole = client.get_or_create_collection(name="bench-whole", embedding_function=embed_fn)
+    whole.upsert(documents=documents, ids=[f"doc{i}" for i in range(len(documents))])
+    chunks = client.get_or_create_collection(name="bench-chunks", embedding_function=embed_fn)
+    records = chunk_documents(documents)
+    chunks.upsert(
+        ids=[record["id"] for record in records],
+        documents=[record["document"] for record in records],
+        metadatas=[record["metadata"] for record in records],
+    )
+    return embed_fn, whole, chunks
+
+
+def time_llm(model, question, context):
+    prompt = f"Based on the following information: {context}\n\nUser query: {question}"
+    start = time.perf_counter()
+    first = None
+    for chunk in model.generate_content(prompt, stream=True):
+        if first is None and chunk.text:
+            first = time.perf_counter() - start
+    return first or 0.0, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--no-llm", action="store_true", help="only measure prompt size")
+    parser.add_argument("--top-k", type=int, default=CONTEXT_TOP_K)
+    parser.add_argument("--budget", type=int, default=CONTEXT_TOKEN_BUDGET)
+    args = parser.parse_args()
+
+    genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+    model = genai.GenerativeModel("gemini-1.5-flash")
+    embed_fn, whole, chunks = build_collections()
+
+    rows = []
+    for question in QUESTIONS:
+        query_embedding = embed_fn.embed([question], "retrieval_query")[0]
+        whole_context = whole.query(query_embeddings=[query_embedding], n_results=1)["documents"][0][0]
+        packed_context = pack_context(
+            chunks.query(query_embeddings=[query_embedding], n_results=args.top_k, include=["documents", "metadatas"]),
+            token_budget=args.budget,
+        )
+        row = {
+            "question": question,
+            "whole_tokens": estimate_tokens(whole_context),
+            "packed_tokens": estimate_tokens(packed_context),
+        }
+        if not args.no_llm:
+            row["whole_ttft"], row["whole_total"] = time_llm(model, question, whole_context)
+            row["packed_ttft"], row["packed_total"] = time_llm(model, question, packed_context)
+        rows.append(row)
+
+    print(f"{'question':45} {'whole tok':>10} {'packed tok':>10}")
+    for row in rows:
+        print(f"{row['question'][:45]:45} {row['whole_tokens']:>10} {row['packed_tokens']:>10}")
+
+    whole_tokens = statistics.mean(row["whole_tokens"] for row in rows)
+    packed_tokens = statistics.mean(row["packed_tokens"] for row in rows)
+    print(f"\nmean context tokens: whole={whole_tokens:.0f} packed={packed_tokens:.0f} "
+          f"({100 * (1 - packed_tokens / whole_tokens):.0f}% smaller)")
+    if not args.no_llm:
+        for key in ("ttft", "total"):
+            whole_latency = statistics.median(row[f"whole_{key}"] for row in rows)
+            packed_latency = statistics.median(row[f"packed_{key}"] for row in rows)
+            print(f"median LLM {key}: whole={whole_latency * 1000:.0f} ms packed={packed_latency * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
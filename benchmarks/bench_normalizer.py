@@ -0,0 +1,120 @@
+"""
+Compares speech-text cleanup for long menu answers: the old `remove_markdown` (a dozen
+regex passes, run once per sentence as the answer streamed) against the single-pass
+`normalize_for_speech` and the incremental `SpeechNormalizer` fed token-sized chunks.
+
+    python benchmarks/bench_normalizer.py
+    python benchmarks/bench_normalizer.py --repeat 200 --chunk-chars 4
+
+Runs offline; no API key needed.
+"""
+import argparse
+import os
+import re
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from knowledge_base import Document2, Document3
+from speech import SentenceSplitter
+from speech_text import SpeechNormalizer, normalize_for_speech
+
+
+def remove_markdown(text):
+    # Copy of the function reschat.py used before the single-pass normalizer
+    text = re.sub(r'\*\*([^\*]+)\*\*', r'\1', text)
+    text = re.sub(r'\*([^\*]+)\*', r'\1', text)
+    text = re.sub(r'__([^_]+)__', r'\1', text)
+    text = re.sub(r'_([^_]+)_', r'\1', text)
+    text = re.sub(r'^\s*#+\s+', '', text, flags=re.MULTILINE)
+    text = re.sub(r'^\s*[-*+]\s+', '', text, flags=re.MULTILINE)
+    text = re.sub(r'`[^`]*`', '', text)
+    text = re.sub(r'```.*?```', '', text, flags=re.DOTALL)
+    text = re.sub(r'\[(.*?)\]\(.*?\)', r'\1', text)
+    text = re.sub(r'^\s*>\s+', '', text, flags=re.MULTILINE)
+    text = re.sub(r'\n\s*\n', '\n', text).strip()
+    text = re.sub(r'\s\s+', ' ', text)
+    return text
+
+
+def menu_answer():
+    # The kind of answer Gemini gives for "show me the menu": headings, bold names, bullets
+    lines = ["## The Golden Spoon menu", ""]
+    for line in Document2.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if line.endswith(":"):
+            lines.extend(["", f"**{line}**"])
+        else:
+            lines.append(f"* {line.lstrip('* ')}")
+    lines.extend(["", Document3, "", "> Prices include taxes. See [our website](https://www.thegoldenspoon.com)."])
+    return "\n".join(lines)
+
+
+def chunked(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def legacy_streamed(chunks):
+    splitter = SentenceSplitter()
+    spoken = []
+    for chunk in chunks:
+        spoken.extend(remove_markdown(sentence) for sentence in splitter.feed(chunk))
+    spoken.extend(remove_markdown(sentence) for sentence in splitter.flush())
+    return spoken
+
+
+def normalizer_streamed(chunks):
+    splitter = SentenceSplitter()
+    normalizer = SpeechNormalizer()
+    spoken = []
+    for chunk in chunks:
+        text = normalizer.feed(chunk)
+        if text:
+            spoken.extend(splitter.feed(text))
+    spoken.extend(splitter.feed(normalizer.flush()))
+    spoken.extend(splitter.flush())
+    return spoken
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=100)
+    parser.add_argument("--chunk-chars", type=int, default=4, help="size of the simulated stream chunks")
+    args = parser.parse_args()
+
+    answer = menu_answer()
+    chunks = chunked(answer, args.chunk_chars)
+    cases = [
+        ("remove_markdown, whole answer", lambda: remove_markdown(answer)),
+        ("normalize_for_speech, whole answer", lambda: normalize_for_speech(answer)),
+        ("remove_markdown per sentence, streamed", lambda: legacy_streamed(chunks)),
+        ("SpeechNormalizer, streamed", lambda: normalizer_streamed(chunks)),
+    ]
+
+    print(f"answer: {len(answer)} chars, {len(chunks)} chunks of {args.chunk_chars} chars\n")
+    print(f"{'variant':42} {'median ms':>10} {'MB/s':>8}")
+    for name, fn in cases:
+        seconds = timed(fn, args.repeat)
+        print(f"{name:42} {seconds * 1000:>10.2f} {len(answer.encode('utf-8')) / seconds / 1e6:>8.2f}")
+
+    # The streamed output must match what the batch normalizer produces for the whole answer
+    streamed = SpeechNormalizer()
+    text = "".join(streamed.feed(chunk) for chunk in chunks) + streamed.flush()
+    print(f"\nstreamed output identical to batch: {text == normalize_for_speech(answer).strip()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Compares vector-only retrieval with hybrid BM25 + vector retrieval (and its lexical
+fast path) on questions that name a dish outright and on general questions.
+
+    python benchmarks/bench_retrieval.py                       # offline, fake embedder
+    python benchmarks/bench_retrieval.py --providers google    # Gemini embeddings (needs GOOGLE_API_KEY)
+
+For dish questions, "top-1 exact" is the share whose best chunk actually lists the
+dish. "embedded" is the share of questions that needed a query embedding; the fake
+embedder's --embed-latency stands in for the API round trip.
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Keep the benchmark's index and caches away from the app's
+_workdir = tempfile.mkdtemp(prefix="bench-retrieval-")
+os.environ["CHROMA_PATH"] = os.path.join(_workdir, "chroma")
+os.environ["EMBEDDING_CACHE_PATH"] = os.path.join(_workdir, "embeddings.sqlite3")
+os.environ["TTS_CACHE_DIR"] = os.path.join(_workdir, "tts")
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from assistant import Assistant
+from chunking import CONTEXT_TOP_K
+from providers import load_providers
+from query_embedder import QueryEmbedder
+
+GENERAL_QUESTIONS = [
+    "What time do you open on weekends?",
+    "Do you have any vegan Korean dishes?",
+    "Can I book a table for 12 people?",
+    "Tell me about your home delivery.",
+    "Which desserts would you recommend?",
+    "Is there parking near the restaurant?",
+    "What is the minimum order for delivery?",
+    "Do you cater private events?",
+]
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(q / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def vector_only(tenant, question):
+    embedding = tenant.query_embedder.embed(question, "en")
+    result = tenant.db.query(query_embeddings=[embedding], n_results=CONTEXT_TOP_K, include=[])
+    return result["ids"][0]
+
+
+def hybrid(tenant, question):
+    return tenant.retrieve(question, "en")["ids"]
+
+
+def run(tenant, mode, questions, dishes):
+    # Straight to the provider, so neither mode is served from the other's cached embeddings
+    tenant.query_embedder = QueryEmbedder(tenant.embed_fn.inner, batch_window=0)
+    latencies, exact = [], 0
+    for question, dish in zip(questions, dishes):
+        started = time.perf_counter()
+        ids = mode(tenant, question)
+        latencies.append(time.perf_counter() - started)
+        top = tenant.lexical_index.record(ids[0])[0] if ids else ""
+        if dish and dish.lower() in top.lower():
+            exact += 1
+    named = sum(1 for dish in dishes if dish)
+    return {
+        "top1_exact": exact / named if named else 0.0,
+        "embedded": tenant.query_embedder.misses / len(questions),
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--providers", default="fake", choices=["fake", "google"])
+    parser.add_argument("--embed-latency", type=float, default=0.1, help="fake embedder seconds per call")
+    args = parser.parse_args()
+
+    if args.providers == "google":
+        import google.generativeai as genai
+        genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+        providers = load_providers("google")
+    else:
+        providers = load_providers("fake", embedder_latency=args.embed_latency)
+    with contextlib.redirect_stdout(io.StringIO()):
+        assistant = Assistant(providers)
+    tenant = assistant.tenant()
+
+    items = tenant.menu_index.items
+    questions = [f"Tell me about the {item.name}" for item in items] + GENERAL_QUESTIONS
+    dishes = [item.name for item in items] + [""] * len(GENERAL_QUESTIONS)
+
+    print(f"{len(items)} dish questions, {len(GENERAL_QUESTIONS)} general questions\n")
+    print(f"{'mode':12} {'top-1 exact':>12} {'embedded':>9} {'p50 ms':>8} {'p95 ms':>8}")
+    for name, mode in (("vector", vector_only), ("hybrid", hybrid)):
+        row = run(tenant, mode, questions, dishes)
+        print(f"{name:12} {row['top1_exact']:>12.0%} {row['embedded']:>9.0%} "
+              f"{row['p50'] * 1000:>8.1f} {row['p95'] * 1000:>8.1f}")
+    print(f"\nretrieval paths: {tenant.retrieval_stats()}")
+
+
+if __name__ == "__main__":
+    main()
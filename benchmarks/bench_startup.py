@@ -0,0 +1,130 @@
+"""
+Startup benchmark: what the Streamlit app imports before its first render, and how long
+until the page can render and until the assistant is ready, each in a fresh interpreter.
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --repeat 5 --top 15
+    python benchmarks/bench_startup.py --providers google    # real clients (needs GOOGLE_API_KEY)
+
+The import profile runs `python -X importtime` on the modules reschat.py imports up front
+and, for comparison, on the heavy ones it now loads lazily (ChromaDB, Gemini, speech),
+and lists the slowest packages by cumulative import time.
+
+"first render" is the time for `connect()` plus listing the tenants, which is all the page
+needs before it draws; "ready" is the time until the assistant has loaded ChromaDB and
+synced the knowledge base. "cold" starts from empty caches (every chunk is embedded),
+"warm" reuses them as a restart would.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# What reschat.py imports before the first render, and what it no longer does
+APP_IMPORTS = ["streamlit", "dotenv", "chat_client", "telemetry", "streaming", "speech"]
+LAZY_IMPORTS = ["chromadb", "google.generativeai", "speech_recognition", "gtts", "assistant", "speech_input"]
+
+STARTUP = """
+import json, time
+started = time.perf_counter()
+from chat_client import connect
+client = connect(background={background})
+client.tenants()
+rendered = time.perf_counter()
+client.assistant
+print(json.dumps({{"render": rendered - started, "ready": time.perf_counter() - started}}))
+"""
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(q / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def import_profile(modules, env):
+    """({module: (self us, cumulative us)} for importing `modules`, [modules that aren't installed])."""
+    code = "\n".join(f"try:\n    import {module}\nexcept ImportError:\n    print({module!r})" for module in modules)
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT, env=env,
+                            capture_output=True, text=True)
+    profile = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        profile[name.strip()] = (int(own), int(cumulative))
+    return profile, result.stdout.split()
+
+
+def print_profile(label, modules, env, top):
+    profile, missing = import_profile(modules, env)
+    total = sum(own for own, _ in profile.values())
+    print(f"{label}: {total / 1000:.0f} ms, {len(profile)} modules")
+    for module in modules:
+        if module in missing:
+            print(f"  {module:28} not installed")
+        elif module in profile:
+            print(f"  {module:28} {profile[module][1] / 1000:>8.1f} ms cumulative")
+    packages = {}
+    for name, (_, cumulative) in profile.items():
+        # Top-level packages, by their cumulative time
+        if "." not in name:
+            packages[name] = cumulative
+    print("  slowest top-level packages:")
+    for name, cumulative in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]:
+        print(f"    {name:26} {cumulative / 1000:>8.1f} ms")
+    print()
+
+
+def startup(background, env):
+    result = subprocess.run([sys.executable, "-c", STARTUP.format(background=background)], cwd=ROOT, env=env,
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "startup failed")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10, help="slowest packages to list")
+    parser.add_argument("--providers", default="fake", choices=["fake", "google"])
+    args = parser.parse_args()
+
+    env = {**os.environ, "PROVIDERS": args.providers, "PYTHONPATH": os.pathsep.join(
+        [ROOT] + ([os.environ["PYTHONPATH"]] if os.environ.get("PYTHONPATH") else []))}
+    print_profile("Imported before the first render", APP_IMPORTS, env, args.top)
+    print_profile("Loaded lazily (background or first voice use)", LAZY_IMPORTS, env, args.top)
+
+    results = {}
+    for run in range(args.repeat):
+        for background in (False, True):
+            # Empty caches and indexes of its own, warmed by the first start
+            workdir = tempfile.mkdtemp(prefix="bench-startup-")
+            run_env = {
+                **env,
+                "CHROMA_PATH": os.path.join(workdir, "chroma"),
+                "EMBEDDING_CACHE_PATH": os.path.join(workdir, "embeddings.sqlite3"),
+                "TTS_CACHE_DIR": os.path.join(workdir, "tts"),
+                "TENANTS_DIR": os.path.join(workdir, "tenants"),
+            }
+            for cache in ("cold", "warm"):
+                for stage, seconds in startup(background, run_env).items():
+                    results.setdefault((cache, background, stage), []).append(seconds)
+
+    print(f"Startup, {args.repeat} runs ({args.providers} providers)")
+    print(f"{'':28} {'first render p50':>17} {'ready p50':>10}")
+    for cache in ("cold", "warm"):
+        for background in (False, True):
+            label = f"{cache}, {'background load' if background else 'blocking load'}"
+            render = percentile(results[(cache, background, "render")], 50)
+            ready = percentile(results[(cache, background, "ready")], 50)
+            print(f"  {label:26} {render * 1000:>14.0f} ms {ready * 1000:>7.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
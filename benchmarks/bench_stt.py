@@ -0,0 +1,157 @@
+"""
+Speech capture benchmark on synthetic WAV fixtures, offline with FakeSTT.
+
+    python benchmarks/bench_stt.py
+    python benchmarks/bench_stt.py --clips 200 --concurrency 8 --stt-latency 0.3
+
+Each fixture is background noise, a burst of "speech" (modulated tones with short
+pauses between words) and trailing silence, written as a WAV file. The fixtures are
+streamed through the endpointer the way the microphone is, which gives the delay from
+the real end of speech to the end of the recording, for STT_ENDPOINT_SILENCE and for
+SpeechRecognition's 0.8 s. The same files then go through the Transcriber pool as
+uploads, trimmed and untrimmed, and the report gives end-of-speech-to-text latency:
+endpointing delay plus queueing and recognition time.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from providers import FakeSTT
+from speech_input import (
+    STT_CALIBRATION_SECONDS, STT_ENDPOINT_SILENCE, AudioClip, Endpointer, Transcriber, threshold_from_noise,
+    trim_silence,
+)
+
+SAMPLE_RATE = 16000
+# What `sr.Microphone` reads per call
+CHUNK = 1024
+# SpeechRecognition's pause_threshold and adjust_for_ambient_noise() duration
+SR_PAUSE_THRESHOLD = 0.8
+SR_CALIBRATION_SECONDS = 1.0
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(q / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def make_fixture(rng):
+    """Returns (wav bytes, lead-in seconds, speech end seconds)."""
+    lead_in, speech, tail = rng.uniform(0.5, 1.5), rng.uniform(1.0, 3.0), 1.5
+    noise_level = rng.uniform(50, 300)
+    total = int((lead_in + speech + tail) * SAMPLE_RATE)
+    samples = rng.normal(0, noise_level, total)
+
+    # Words of 0.2-0.5 s with pauses shorter than the endpointing silence between them
+    start, end = int(lead_in * SAMPLE_RATE), int((lead_in + speech) * SAMPLE_RATE)
+    position = start
+    while position < end:
+        length = min(int(rng.uniform(0.2, 0.5) * SAMPLE_RATE), end - position)
+        t = np.arange(length) / SAMPLE_RATE
+        pitch = rng.uniform(120, 250)
+        envelope = np.sin(np.pi * np.arange(length) / length) ** 0.5
+        samples[position:position + length] += (
+            rng.uniform(2000, 6000) * envelope * (np.sin(2 * np.pi * pitch * t) + 0.5 * np.sin(4 * np.pi * pitch * t))
+        )
+        last_voiced = position + length
+        position += length + int(rng.uniform(0.05, 0.25) * SAMPLE_RATE)
+
+    pcm = np.clip(samples, -32768, 32767).astype("<i2").tobytes()
+    return AudioClip(pcm, SAMPLE_RATE).to_wav(), lead_in, last_voiced / SAMPLE_RATE
+
+
+def endpoint(clip, threshold, silence):
+    """Streams `clip` in microphone-sized chunks; returns (seconds recorded, detected speech end)."""
+    endpointer = Endpointer(clip.sample_rate, threshold, silence=silence)
+    pcm = clip.get_raw_data()
+    for offset in range(0, len(pcm), CHUNK * 2):
+        if endpointer.feed(pcm[offset:offset + CHUNK * 2]):
+            break
+    return endpointer.position, endpointer.speech_end
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clips", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=4, help="uploads transcribed at once")
+    parser.add_argument("--workers", type=int, default=4, help="Transcriber pool size")
+    parser.add_argument("--stt-latency", type=float, default=0.3, help="FakeSTT round trip")
+    parser.add_argument("--stt-per-second", type=float, default=0.05, help="FakeSTT time per second of audio")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    fixtures = []
+    with tempfile.TemporaryDirectory(prefix="bench-stt-") as directory:
+        for i in range(args.clips):
+            data, lead_in, speech_end = make_fixture(rng)
+            path = os.path.join(directory, f"clip{i:03d}.wav")
+            with open(path, "wb") as fp:
+                fp.write(data)
+            with open(path, "rb") as fp:
+                fixtures.append((fp.read(), lead_in, speech_end))
+
+    # Endpointing, with the threshold calibrated on the lead-in like a fresh microphone
+    delays = {STT_ENDPOINT_SILENCE: [], SR_PAUSE_THRESHOLD: []}
+    detection_errors = []
+    for data, lead_in, speech_end in fixtures:
+        clip = AudioClip.from_wav(data)
+        calibration = AudioClip(clip.get_raw_data()[:int(min(lead_in, STT_CALIBRATION_SECONDS) * SAMPLE_RATE) * 2],
+                                SAMPLE_RATE)
+        threshold = threshold_from_noise(calibration.frames())
+        for silence in delays:
+            recorded, detected_end = endpoint(clip, threshold, silence)
+            delays[silence].append(recorded - speech_end)
+            if silence == STT_ENDPOINT_SILENCE:
+                detection_errors.append(abs(detected_end - speech_end))
+
+    print(f"{args.clips} clips, {SAMPLE_RATE} Hz")
+    print(f"{'end of speech -> end of recording':36} {'p50 ms':>9} {'p95 ms':>9}")
+    for silence, values in delays.items():
+        label = f"silence {silence:.1f}s" + (" (SpeechRecognition)" if silence == SR_PAUSE_THRESHOLD else "")
+        print(f"  {label:34} {percentile(values, 50) * 1000:>9.0f} {percentile(values, 95) * 1000:>9.0f}")
+    print(f"  speech end detection error p95: {percentile(detection_errors, 95) * 1000:.0f} ms")
+    print(f"Calibration before listening: {SR_CALIBRATION_SECONDS * 1000:.0f} ms on every click with "
+          f"adjust_for_ambient_noise(), {STT_CALIBRATION_SECONDS * 1000:.0f} ms once per session and "
+          "microphone when cached\n")
+
+    # Uploads through the worker pool
+    recognizer = FakeSTT(latency=args.stt_latency, seconds_per_audio_second=args.stt_per_second)
+    transcriber = Transcriber(recognizer, workers=args.workers)
+
+    def transcribe(fixture, trim):
+        data = fixture[0]
+        started = time.perf_counter()
+        future = transcriber.submit_wav(data) if trim else transcriber.submit(AudioClip.from_wav(data))
+        future.result()
+        return time.perf_counter() - started
+
+    original = [AudioClip.from_wav(data).duration for data, _, _ in fixtures]
+    trimmed = [trim_silence(AudioClip.from_wav(data)).duration for data, _, _ in fixtures]
+    print(f"Transcriber, {args.workers} workers, {args.concurrency} concurrent uploads, "
+          f"FakeSTT {args.stt_latency * 1000:.0f} ms + {args.stt_per_second * 1000:.0f} ms per audio second")
+    print(f"{'':24} {'audio s':>9} {'p50 ms':>9} {'p95 ms':>9}")
+    latencies = {}
+    for label, trim, durations in (("untrimmed", False, original), ("trimmed", True, trimmed)):
+        with ThreadPoolExecutor(max_workers=args.concurrency) as clients:
+            latencies[label] = list(clients.map(lambda fixture: transcribe(fixture, trim), fixtures))
+        print(f"  {label:22} {sum(durations) / len(durations):>9.2f} {percentile(latencies[label], 50) * 1000:>9.0f} "
+              f"{percentile(latencies[label], 95) * 1000:>9.0f}")
+
+    # A microphone clip is already cut at the endpoint, so it is recognized like a trimmed upload
+    print("\nEnd of speech -> text (endpointing + recognition):")
+    for silence, values in delays.items():
+        total = [delay + latency for delay, latency in zip(values, latencies["trimmed"])]
+        print(f"  silence {silence:.1f}s  p50 {percentile(total, 50) * 1000:.0f} ms, "
+              f"p95 {percentile(total, 95) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
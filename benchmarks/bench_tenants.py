@@ -0,0 +1,146 @@
+"""
+Tenant switching benchmark: cold loads, warm switches, reloads after eviction and
+memory per loaded tenant, against the offline fake providers.
+
+    python benchmarks/bench_tenants.py
+    python benchmarks/bench_tenants.py --tenants 40 --max-loaded 8 --requests 2000
+
+Synthetic restaurants are generated from the built-in knowledge base (renamed, with
+their own prices). The mixed workload picks tenants with a Zipf-like skew, as a few
+busy outlets and a long tail of quiet ones would, and reports retrieval latency for
+requests that hit a loaded tenant versus those that had to load one.
+"""
+import argparse
+import contextlib
+import gc
+import io
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Keep the benchmark's indexes and caches away from the app's
+_workdir = tempfile.mkdtemp(prefix="bench-tenants-")
+os.environ["CHROMA_PATH"] = os.path.join(_workdir, "chroma")
+os.environ["EMBEDDING_CACHE_PATH"] = os.path.join(_workdir, "embeddings.sqlite3")
+os.environ["TTS_CACHE_DIR"] = os.path.join(_workdir, "tts")
+os.environ["TENANTS_DIR"] = os.path.join(_workdir, "tenants")
+
+from assistant import Assistant
+from knowledge_base import Document2, documents
+from providers import load_providers
+
+QUESTIONS = [
+    "What time do you open on weekends?",
+    "Do you have any vegan Korean dishes?",
+    "Can I book a table for 12 people?",
+    "Tell me about your home delivery.",
+    "Which desserts would you recommend?",
+]
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(q / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def write_tenants(count, seed=0):
+    rng = random.Random(seed)
+    tenant_ids = []
+    for i in range(count):
+        tenant_id = f"outlet-{i:03d}"
+        directory = os.path.join(os.environ["TENANTS_DIR"], tenant_id)
+        os.makedirs(directory)
+        name = f"The Golden Spoon {i}"
+
+        def localize(text):
+            # Own name and prices, so every tenant embeds different text
+            text = text.replace("The Golden Spoon", name)
+            return re.sub(r"₹\s?(\d+)", lambda m: f"₹{int(m.group(1)) + rng.randint(0, 40)}", text)
+
+        with open(os.path.join(directory, "tenant.json"), "w", encoding="utf-8") as fp:
+            fp.write(f'{{"name": "{name}"}}')
+        with open(os.path.join(directory, "menu.md"), "w", encoding="utf-8") as fp:
+            fp.write(localize(Document2))
+        for n, text in enumerate(documents):
+            if text is not Document2:
+                with open(os.path.join(directory, f"doc{n}.md"), "w", encoding="utf-8") as fp:
+                    fp.write(localize(text))
+        tenant_ids.append(tenant_id)
+    return tenant_ids
+
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tenants", type=int, default=24)
+    parser.add_argument("--max-loaded", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--skew", type=float, default=1.1, help="Zipf exponent of the tenant mix")
+    parser.add_argument("--embed-latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    tenant_ids = write_tenants(args.tenants)
+    providers = load_providers("fake", embedder_latency=args.embed_latency)
+    # Loads print a re-index summary per tenant
+    with contextlib.redirect_stdout(io.StringIO()):
+        assistant = Assistant(providers, max_tenants=args.tenants + 1)
+
+        # Memory is measured with every tenant loaded, as the Python heap grows per tenant
+        gc.collect()
+        tracemalloc.start()
+        baseline = tracemalloc.get_traced_memory()[0]
+        cold = [timed(assistant.tenant, tenant_id) for tenant_id in tenant_ids]
+        gc.collect()
+        per_tenant = (tracemalloc.get_traced_memory()[0] - baseline) / args.tenants
+        tracemalloc.stop()
+
+        warm = [timed(assistant.tenant, tenant_id) for tenant_id in tenant_ids for _ in range(10)]
+
+        # Same tenants again after dropping them: the collections and embeddings are on disk
+        reloading = Assistant(providers, max_tenants=1)
+        reload = [timed(reloading.tenant, tenant_id) for tenant_id in tenant_ids]
+
+    print(f"{args.tenants} tenants, {len(documents)} documents each")
+    print(f"{'':24} {'p50 ms':>9} {'p95 ms':>9}")
+    for label, values in (("cold load (embeds)", cold), ("reload after eviction", reload), ("warm switch", warm)):
+        print(f"{label:24} {percentile(values, 50) * 1000:>9.2f} {percentile(values, 95) * 1000:>9.2f}")
+    print(f"Python heap per loaded tenant: {per_tenant / 1024:.0f} KB "
+          "(excludes Chroma's native memory)\n")
+
+    # Mixed workload through an LRU smaller than the number of tenants
+    weights = [1 / (rank + 1) ** args.skew for rank in range(args.tenants)]
+    rng = random.Random(1)
+    latencies = defaultdict(list)
+    with contextlib.redirect_stdout(io.StringIO()):
+        mixed = Assistant(providers, max_tenants=args.max_loaded)
+        for i in range(args.requests):
+            tenant_id = rng.choices(tenant_ids, weights)[0]
+            loads = mixed.tenants.loads
+            elapsed = timed(mixed.retrieve, QUESTIONS[i % len(QUESTIONS)], "en", tenant_id)
+            latencies["loaded" if mixed.tenants.loads > loads else "warm"].append(elapsed)
+
+    stats = mixed.tenants.stats()
+    print(f"{args.requests} requests over {args.tenants} tenants with {args.max_loaded} kept loaded: "
+          f"{stats['hit_ratio']:.0%} hit a loaded tenant, {stats['evictions']} evictions")
+    for label in ("warm", "loaded"):
+        values = latencies[label]
+        if values:
+            print(f"  retrieve ({label:6}) n={len(values):<5} p50 {percentile(values, 50) * 1000:.1f} ms, "
+                  f"p95 {percentile(values, 95) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
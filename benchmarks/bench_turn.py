@@ -0,0 +1,203 @@
+"""
+End-to-end latency benchmark for a full voice turn (speech recognition, retrieval,
+prompt, streamed answer, speech normalization and synthesis) against the offline fake
+providers, so it runs in CI without network access.
+
+    python benchmarks/bench_turn.py
+    python benchmarks/bench_turn.py --turns 500 --concurrency 64 --llm-ttft 0.5
+    python benchmarks/bench_turn.py --json results.json --fail-over ttfa=1.5 --fail-over ttft=1.0
+
+Reports p50/p95/p99 per stage, time to first token and to first audio (both measured
+from the start of the turn), and throughput. --fail-over STAGE=SECONDS exits non-zero
+when that stage's p95 is slower, for use as a regression gate.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Keep the benchmark's index and caches away from the app's
+_workdir = tempfile.mkdtemp(prefix="bench-turn-")
+os.environ["CHROMA_PATH"] = os.path.join(_workdir, "chroma")
+os.environ["EMBEDDING_CACHE_PATH"] = os.path.join(_workdir, "embeddings.sqlite3")
+os.environ["TTS_CACHE_DIR"] = os.path.join(_workdir, "tts")
+
+from assistant import Assistant
+from chunking import estimate_tokens
+from providers import load_providers
+from speech import StreamingSpeaker
+
+QUESTIONS = [
+    ("What time do you open on weekends?", "en"),
+    ("Do you have any vegan Korean dishes?", "en"),
+    ("Can I book a table for 12 people?", "en"),
+    ("Tell me about your home delivery.", "en"),
+    ("Which desserts would you recommend?", "en"),
+    ("Is there parking near the restaurant?", "en"),
+    ("How much is the Masala Dosa?", "en"),
+    ("क्या आप होम डिलीवरी करते हैं?", "hi"),
+]
+STAGES = ["stt", "retrieve", "llm_first_token", "stream", "normalize", "tts", "ttft", "ttfa", "turn"]
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(q / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+class TimedSynthesizer:
+    """Records how long each clip takes to synthesize."""
+
+    def __init__(self, synthesize_fn, samples):
+        self.synthesize_fn = synthesize_fn
+        self.samples = samples
+        self._lock = threading.Lock()
+
+    def __call__(self, text, lang="en"):
+        started = time.perf_counter()
+        audio = self.synthesize_fn(text, lang)
+        with self._lock:
+            self.samples["tts"].append(time.perf_counter() - started)
+        return audio
+
+
+def run_turn(assistant, synthesize_fn, session_id, question, lang, samples, lock):
+    stage = {}
+    started = time.perf_counter()
+    text = assistant.providers.stt.recognize(question.encode("utf-8"), language="hi-IN" if lang == "hi" else "en-US")
+    stage["stt"] = time.perf_counter() - started
+
+    mark = time.perf_counter()
+    turn = assistant.start_turn(session_id, text, lang)
+    stage["retrieve"] = time.perf_counter() - mark
+
+    speaker = StreamingSpeaker(lang=lang, synthesize_fn=synthesize_fn)
+    parts, normalize, first_token = [], 0.0, None
+    mark = time.perf_counter()
+    for chunk in turn.chunks:
+        if first_token is None:
+            first_token = time.perf_counter()
+        parts.append(chunk)
+        fed = time.perf_counter()
+        speaker.feed(chunk)
+        normalize += time.perf_counter() - fed
+        # Like the UI, pick up finished clips between chunks
+        speaker.next_ready()
+    finished = time.perf_counter()
+    answer = "".join(parts).strip()
+    turn.finish(answer)
+    speaker.close()
+    for _ in speaker.remaining():
+        pass
+
+    if first_token is not None:
+        stage["llm_first_token"] = first_token - mark
+        stage["stream"] = finished - first_token
+        stage["ttft"] = first_token - started
+    stage["normalize"] = normalize
+    if speaker.first_audio_at is not None:
+        stage["ttfa"] = speaker.started_at + speaker.first_audio_at - started
+    stage["turn"] = time.perf_counter() - started
+    with lock:
+        for name, value in stage.items():
+            samples[name].append(value)
+        samples["_tokens"].append(estimate_tokens(answer))
+        samples["_sources"].append(turn.source)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--llm-ttft", type=float, default=0.3, help="fake LLM seconds to first chunk")
+    parser.add_argument("--llm-words-per-sec", type=float, default=60.0)
+    parser.add_argument("--llm-chunk-words", type=int, default=4)
+    parser.add_argument("--llm-answer-words", type=int, default=80)
+    parser.add_argument("--embed-latency", type=float, default=0.05)
+    parser.add_argument("--stt-latency", type=float, default=0.4)
+    parser.add_argument("--tts-latency", type=float, default=0.2)
+    parser.add_argument("--answer-cache", action="store_true", help="let repeated questions hit the answer cache")
+    parser.add_argument("--tts-cache", action="store_true", help="synthesize through the speech cache")
+    parser.add_argument("--coalesce", action="store_true", help="let concurrent identical questions share an LLM stream")
+    parser.add_argument("--json", help="also write the results to this file")
+    parser.add_argument("--fail-over", action="append", default=[], metavar="STAGE=SECONDS",
+                        help="exit with status 1 if the stage's p95 is slower than SECONDS")
+    args = parser.parse_args()
+
+    providers = load_providers(
+        "fake",
+        llm_first_token_latency=args.llm_ttft,
+        llm_words_per_sec=args.llm_words_per_sec,
+        llm_chunk_words=args.llm_chunk_words,
+        llm_answer_words=args.llm_answer_words,
+        embedder_latency=args.embed_latency,
+        stt_latency=args.stt_latency,
+        tts_latency=args.tts_latency,
+    )
+    assistant = Assistant(providers)
+    if not args.answer_cache:
+        # A threshold above 1 never matches, so every retrieved question reaches the LLM
+        assistant.tenant().answer_cache.threshold = 2.0
+    assistant.tenant().llm_streams.enabled = args.coalesce
+
+    samples = defaultdict(list)
+    lock = threading.Lock()
+    synthesize_fn = TimedSynthesizer(assistant.synthesize if args.tts_cache else providers.tts.synthesize, samples)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        futures = []
+        for i in range(args.turns):
+            question, lang = QUESTIONS[i % len(QUESTIONS)]
+            session_id = f"bench-{i % args.concurrency}"
+            futures.append(pool.submit(run_turn, assistant, synthesize_fn, session_id, question, lang, samples, lock))
+        for future in futures:
+            future.result()
+    wall = time.perf_counter() - started
+
+    results = {"turns": args.turns, "concurrency": args.concurrency, "wall_seconds": wall,
+               "turns_per_sec": args.turns / wall, "tokens_per_sec": sum(samples["_tokens"]) / wall,
+               "sources": dict(Counter(samples["_sources"])), "stages": {}}
+    print(f"{args.turns} turns at concurrency {args.concurrency} in {wall:.2f}s "
+          f"({results['turns_per_sec']:.1f} turns/s, {results['tokens_per_sec']:.0f} tokens/s)")
+    print(f"answer sources: {results['sources']}")
+    if args.coalesce:
+        coalescing = assistant.tenant().llm_streams.stats()
+        results["llm_coalescing"] = coalescing
+        print(f"LLM streams: {coalescing['upstream_calls']} upstream calls, {coalescing['coalesced']} requests "
+              f"joined one in flight ({coalescing['saved_ratio']:.0%} saved)")
+    print()
+    print(f"{'stage':16} {'n':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name in STAGES:
+        values = samples[name]
+        if not values:
+            continue
+        row = {"n": len(values), **{f"p{q}": percentile(values, q) for q in (50, 95, 99)}}
+        results["stages"][name] = row
+        print(f"{name:16} {row['n']:>6} {row['p50'] * 1000:>9.1f} {row['p95'] * 1000:>9.1f} {row['p99'] * 1000:>9.1f}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fp:
+            json.dump(results, fp, indent=2)
+
+    failures = []
+    for rule in args.fail_over:
+        name, limit = rule.split("=", 1)
+        p95 = results["stages"].get(name, {}).get("p95")
+        if p95 is not None and p95 > float(limit):
+            failures.append(f"{name} p95 {p95:.3f}s > {float(limit):.3f}s")
+    if failures:
+        print("\nFAILED: " + "; ".join(failures))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+Vector index benchmark: Chroma against the NumPy index (vector_index.py) as float32,
+float16 and int8, at several corpus sizes, each in a fresh interpreter.
+
+    python benchmarks/bench_vector_index.py
+    python benchmarks/bench_vector_index.py --sizes 100,1000,5000,20000 --dim 768 --queries 500
+    python benchmarks/bench_vector_index.py --backends numpy-int8,numpy-float16
+
+The corpus is synthetic: clustered random embeddings, like chunks of a few documents,
+and queries are noisy copies of stored chunks. Every backend gets the same vectors, so
+no embedding API is called. For each one the report gives the time to build the index
+and to open it again from disk (the NumPy index memory-maps its snapshot), db.query
+latency as Tenant.retrieve calls it, recall@k against exact float32 search, the size of
+the embedding matrix, and how much the process's resident memory grew.
+"""
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from chunking import CONTEXT_TOP_K
+
+BACKENDS = ["chroma", "numpy-float32", "numpy-float16", "numpy-int8"]
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(q / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def rss_bytes():
+    """Current resident set size, or None where /proc isn't available."""
+    try:
+        with open("/proc/self/statm") as fp:
+            return int(fp.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def make_corpus(size, dim, queries, seed=0):
+    """(corpus vectors, query vectors), both float32."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(max(1, size // 50), dim))
+    corpus = centers[rng.integers(len(centers), size=size)] + 0.6 * rng.normal(size=(size, dim))
+    picked = corpus[rng.integers(size, size=queries)]
+    return corpus.astype(np.float32), (picked + 0.4 * rng.normal(size=picked.shape)).astype(np.float32)
+
+
+def exact_top_k(corpus, queries, k):
+    unit = corpus / np.linalg.norm(corpus, axis=1, keepdims=True)
+    scores = unit @ (queries / np.linalg.norm(queries, axis=1, keepdims=True)).T
+    return [set(np.argsort(-scores[:, column])[:k]) for column in range(len(queries))]
+
+
+def open_collection(backend, path):
+    if backend == "chroma":
+        import chromadb
+        return chromadb.PersistentClient(path=path).get_or_create_collection(name="bench", embedding_function=None)
+    from vector_index import NumpyCollection
+    return NumpyCollection("bench", path, dtype=backend.split("-", 1)[1])
+
+
+def worker(backend, size, args):
+    corpus, queries = make_corpus(size, args.dim, args.queries)
+    expected = exact_top_k(corpus, queries, args.top_k)
+    ids = [f"chunk{i}" for i in range(size)]
+    documents = [f"Synthetic chunk {i} about dish {i % 97}." for i in range(size)]
+    metadatas = [{"parent_id": f"doc{i // 20}", "chunk": i % 20} for i in range(size)]
+
+    with tempfile.TemporaryDirectory(prefix="bench-vector-") as path:
+        # Import the backend before measuring, so its modules don't count as index memory
+        open_collection(backend, os.path.join(path, "warmup"))
+        gc.collect()
+        before = rss_bytes()
+
+        started = time.perf_counter()
+        db = open_collection(backend, path)
+        for start in range(0, size, args.batch_size):
+            end = start + args.batch_size
+            db.upsert(ids=ids[start:end], documents=documents[start:end], metadatas=metadatas[start:end],
+                      embeddings=corpus[start:end].tolist())
+        build = time.perf_counter() - started
+        del db
+        gc.collect()
+
+        # Reopen from disk, as a restarted app would
+        started = time.perf_counter()
+        db = open_collection(backend, path)
+        db.count()
+        load = time.perf_counter() - started
+
+        latencies, found = [], 0
+        for query, wanted in zip(queries, expected):
+            started = time.perf_counter()
+            result = db.query(query_embeddings=[query.tolist()], n_results=args.top_k,
+                              include=["documents", "metadatas"])
+            latencies.append(time.perf_counter() - started)
+            found += len(wanted & {int(record_id[len("chunk"):]) for record_id in result["ids"][0]})
+        gc.collect()
+        after = rss_bytes()
+        index_bytes = db.stats()["index_bytes"] if hasattr(db, "stats") else None
+
+    return {
+        "build": build,
+        "load": load,
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "recall": found / (len(queries) * args.top_k),
+        "index_bytes": index_bytes,
+        "rss_bytes": after - before if before is not None and after is not None else None,
+    }
+
+
+def run(backend, size, args):
+    command = [sys.executable, os.path.abspath(__file__), "--worker", backend, "--sizes", str(size),
+               "--dim", str(args.dim), "--queries", str(args.queries), "--top-k", str(args.top_k),
+               "--batch-size", str(args.batch_size)]
+    result = subprocess.run(command, cwd=ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        lines = result.stderr.strip().splitlines()
+        return {"error": lines[-1] if lines else "failed"}
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def megabytes(value):
+    return f"{value / 2 ** 20:.1f}" if value is not None else "n/a"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="100,1000,5000", help="comma-separated corpus sizes")
+    parser.add_argument("--dim", type=int, default=768, help="embedding dimensions (text-embedding-004: 768)")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=CONTEXT_TOP_K)
+    parser.add_argument("--batch-size", type=int, default=500, help="records per upsert while building")
+    parser.add_argument("--backends", default=",".join(BACKENDS))
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(",")]
+
+    if args.worker:
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = worker(args.worker, sizes[0], args)
+        print(json.dumps(result))
+        return
+
+    print(f"{args.dim} dimensions, {args.queries} queries, top {args.top_k}")
+    print(f"{'':16} {'chunks':>7} {'build s':>8} {'load ms':>8} {'p50 ms':>7} {'p95 ms':>7} "
+          f"{'recall':>7} {'index MB':>9} {'RSS MB':>7}")
+    for size in sizes:
+        for backend in args.backends.split(","):
+            result = run(backend, size, args)
+            if "error" in result:
+                print(f"  {backend:14} {size:>7}  {result['error']}")
+                continue
+            print(f"  {backend:14} {size:>7} {result['build']:>8.2f} {result['load'] * 1000:>8.1f} "
+                  f"{result['p50'] * 1000:>7.2f} {result['p95'] * 1000:>7.2f} {result['recall']:>7.3f} "
+                  f"{megabytes(result['index_bytes']):>9} {megabytes(result['rss_bytes']):>7}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
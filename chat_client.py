@@ -0,0 +1,185 @@
+import json
+import os
+
+from tenants import DEFAULT_TENANT, list_tenants
+from transcripts import TRANSCRIPT_WINDOW, TranscriptStore
+from warmup import READY, Warmup
+
+# Base URL of a running api.py service (e.g. http://localhost:8000); empty runs the assistant in-process
+CHAT_API_URL = os.getenv("CHAT_API_URL", "")
+CHAT_API_TIMEOUT = float(os.getenv("CHAT_API_TIMEOUT", 60))
+
+
+class ChatAPIError(Exception):
+    pass
+
+
+class LocalChatClient:
+    """
+    Drives an `Assistant` in this process, for running the Streamlit app on its own.
+    `tenant` picks the restaurant on every call; None means the default one.
+
+    `assistant` may be a warmup.Warmup still building it; calls that need the assistant
+    wait for it, while `tenants()`, `history()` and `readiness()` answer right away.
+    """
+
+    def __init__(self, assistant, default_tenant, transcripts=None):
+        self._assistant = assistant
+        self.default_tenant = default_tenant
+        # The assistant's own store, shared so transcripts can be read while it loads
+        self.transcripts = transcripts or TranscriptStore()
+
+    @property
+    def assistant(self):
+        return self._assistant.get() if isinstance(self._assistant, Warmup) else self._assistant
+
+    def readiness(self):
+        """{"state": "loading" | "ready" | "failed", "seconds", "error"} of the assistant."""
+        if isinstance(self._assistant, Warmup):
+            return self._assistant.status()
+        return {"state": READY, "seconds": 0.0, "error": None}
+
+    def chat(self, session_id, question, lang="en", tenant=None):
+        """Returns (source, chunks); the turn is recorded once `chunks` is exhausted."""
+        turn = self.assistant.start_turn(session_id, question, lang, tenant or self.default_tenant)
+        return turn.source, self._recorded(turn)
+
+    @staticmethod
+    def _recorded(turn):
+        parts = []
+        for chunk in turn.chunks:
+            parts.append(chunk)
+            yield chunk
+        turn.finish("".join(parts).strip())
+
+    def tts(self, text, lang="en", tenant=None):
+        return self.assistant.synthesize(text, lang, tenant or self.default_tenant)
+
+    def clear(self, session_id, tenant=None):
+        self.assistant.clear_session(session_id, tenant or self.default_tenant)
+
+    def history(self, session_id, tenant=None, limit=TRANSCRIPT_WINDOW, offset=0):
+        """Up to `limit` messages ({"role", "text", ...}, oldest first) before the newest `offset`."""
+        return self.transcripts.history(tenant or self.default_tenant, session_id, limit=limit, offset=offset)
+
+    def tenants(self):
+        # Read from the tenants directory, so it doesn't wait for the assistant to load
+        return list_tenants()
+
+    def stats(self, tenant=None):
+        return self.assistant.stats(tenant or self.default_tenant)
+
+
+def _sse_events(lines):
+    event, data = "message", []
+    for line in lines:
+        if not line:
+            if data:
+                yield event, json.loads("\n".join(data))
+            event, data = "message", []
+        elif line.startswith("event:"):
+            event = line[len("event:"):].strip()
+        elif line.startswith("data:"):
+            data.append(line[len("data:"):].lstrip())
+
+
+class HttpChatClient:
+    """Same interface as `LocalChatClient`, talking to the chat API (api.py) over HTTP."""
+
+    def __init__(self, base_url, timeout=CHAT_API_TIMEOUT):
+        import httpx
+
+        self._http = httpx.Client(base_url=base_url.rstrip("/"), timeout=timeout)
+
+    def _check(self, response):
+        if response.status_code >= 400:
+            response.read()
+            response.close()
+            try:
+                detail = response.json().get("detail")
+            except ValueError:
+                detail = response.text
+            raise ChatAPIError(f"{response.status_code}: {detail}")
+
+    @staticmethod
+    def _tenant(tenant):
+        # Left out when None, so the service's default tenant applies
+        return {"tenant": tenant} if tenant else {}
+
+    def chat(self, session_id, question, lang="en", tenant=None):
+        request = self._http.build_request(
+            "POST", "/chat",
+            json={"session_id": session_id, "question": question, "lang": lang, **self._tenant(tenant)},
+        )
+        response = self._http.send(request, stream=True)
+        self._check(response)
+        events = _sse_events(response.iter_lines())
+        event, data = next(events, (None, None))
+        if event != "meta":
+            response.close()
+            raise ChatAPIError(f"unexpected event {event!r} at the start of the stream")
+        return data["source"], self._chunks(response, events)
+
+    @staticmethod
+    def _chunks(response, events):
+        try:
+            for event, data in events:
+                if event == "token":
+                    yield data["text"]
+                elif event == "error":
+                    raise ChatAPIError(data["detail"])
+                elif event == "done":
+                    return
+        finally:
+            response.close()
+
+    def tts(self, text, lang="en", tenant=None):
+        response = self._http.post("/tts", json={"text": text, "lang": lang, **self._tenant(tenant)})
+        self._check(response)
+        return response.content
+
+    def clear(self, session_id, tenant=None):
+        self._check(self._http.delete(f"/sessions/{session_id}", params=self._tenant(tenant)))
+
+    def history(self, session_id, tenant=None, limit=TRANSCRIPT_WINDOW, offset=0):
+        response = self._http.get(f"/sessions/{session_id}/messages",
+                                  params={**self._tenant(tenant), "limit": limit, "offset": offset})
+        self._check(response)
+        return response.json()["messages"]
+
+    def tenants(self):
+        response = self._http.get("/tenants")
+        self._check(response)
+        return response.json()["tenants"]
+
+    def stats(self, tenant=None):
+        response = self._http.get("/stats", params=self._tenant(tenant))
+        self._check(response)
+        return response.json()
+
+    def readiness(self):
+        # The API only starts accepting requests once its assistant is loaded
+        return {"state": READY, "seconds": 0.0, "error": None}
+
+
+def connect(url=CHAT_API_URL, api_key=None, background=False):
+    """
+    The HTTP client when `url` is set, otherwise an in-process assistant. With
+    `background`, the assistant is built in a background thread and the client is
+    returned right away (see `LocalChatClient.readiness`).
+    """
+    if url:
+        return HttpChatClient(url)
+
+    transcripts = TranscriptStore()
+
+    def build():
+        # Imported here so a thin client (and the first page render) doesn't load ChromaDB and the models
+        if api_key:
+            import google.generativeai as genai
+            genai.configure(api_key=api_key)
+        from assistant import Assistant
+
+        return Assistant(transcripts=transcripts)
+
+    return LocalChatClient(Warmup(build, name="assistant") if background else build(), DEFAULT_TENANT, transcripts)
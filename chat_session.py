@@ -0,0 +1,136 @@
+import hashlib
+import os
+import threading
+
+from chunking import estimate_tokens
+from telemetry import record
+
+CHAT_HISTORY_TURNS = int(os.getenv("CHAT_HISTORY_TURNS", 6))
+CHAT_HISTORY_TOKEN_CAP = int(os.getenv("CHAT_HISTORY_TOKEN_CAP", 1500))
+
+SUMMARY_PROMPT = (
+    "Summarize this conversation between a restaurant guest and the restaurant's assistant "
+    "in at most five short sentences. Keep names, dishes, prices, dates and any open requests.\n\n"
+    "{conversation}"
+)
+
+
+def build_prompt(question, context=""):
+    # If context is provided, prepend it to the question
+    if context:
+        return f"Based on the following information: {context}\n\nUser query: {question}"
+    return question
+
+
+class ChatSession:
+    """
+    Conversation state for one chat session, answered by an LLM provider (providers.py).
+
+    Only the guest's questions and the assistant's answers are stored, never the
+    retrieved context that was sent with them. The last `max_turns` turns are replayed
+    verbatim; older turns are folded into a rolling summary, and the replayed history
+    is kept under `token_cap` tokens, so every turn costs about the same.
+
+    The summary is written by the LLM in a background thread; until it is ready the
+    turns being folded are still replayed verbatim, so no turn waits for it.
+    """
+
+    def __init__(self, llm, max_turns=CHAT_HISTORY_TURNS, token_cap=CHAT_HISTORY_TOKEN_CAP):
+        self.llm = llm
+        self.max_turns = max_turns
+        self.token_cap = token_cap
+        self.turns = []  # [(question, answer)]
+        self.summary = ""
+        self.summarizing = False
+        self._generation = 0  # bumped by clear(), so a summary of cleared turns is dropped
+        self._lock = threading.Lock()
+
+    def history(self):
+        """History as a list of {"role", "parts"} turns, the format Gemini's `start_chat` expects."""
+        with self._lock:
+            summary, turns = self.summary, list(self.turns)
+        history = []
+        if summary:
+            history.append({"role": "user", "parts": [f"Summary of our conversation so far: {summary}"]})
+            history.append({"role": "model", "parts": ["Thanks, I'll keep that in mind."]})
+        for question, answer in turns:
+            history.append({"role": "user", "parts": [question]})
+            history.append({"role": "model", "parts": [answer]})
+        return history
+
+    def history_key(self):
+        """
+        Identifies what the LLM sees besides the question: "" for a fresh conversation,
+        otherwise a hash of the summary and turns.
+        """
+        with self._lock:
+            summary, turns = self.summary, list(self.turns)
+        if not turns and not summary:
+            return ""
+        digest = hashlib.sha256(summary.encode("utf-8"))
+        for question, answer in turns:
+            digest.update(f"\0{question}\0{answer}".encode("utf-8"))
+        return digest.hexdigest()[:16]
+
+    def send(self, question, context=""):
+        """Streams the answer as text chunks."""
+        prompt = build_prompt(question, context)
+        record("llm.prompt_tokens", self._history_tokens() + estimate_tokens(prompt))
+        return self.llm.stream(self.history(), prompt)
+
+    def record(self, question, answer):
+        with self._lock:
+            self.turns.append((question, answer))
+        self._compact()
+
+    def clear(self):
+        with self._lock:
+            self.turns = []
+            self.summary = ""
+            self.summarizing = False
+            self._generation += 1
+
+    def _history_tokens(self):
+        return estimate_tokens(self.summary) + sum(
+            estimate_tokens(question) + estimate_tokens(answer) for question, answer in self.turns
+        )
+
+    def _compact(self):
+        with self._lock:
+            if self.summarizing:
+                return
+            if len(self.turns) <= self.max_turns and self._history_tokens() <= self.token_cap:
+                return
+            # Fold the older half of the window into the summary at once, so summarization
+            # runs every few turns rather than on every turn
+            keep = min(max(1, self.max_turns // 2), len(self.turns) - 1)
+            if keep < 1:
+                return
+            count = len(self.turns) - keep
+            self.summarizing = True
+            job = (self._generation, count, self.turns[:count], self.summary)
+        threading.Thread(target=self._fold, args=job, name="chat-summary", daemon=True).start()
+
+    def _fold(self, generation, count, turns, summary):
+        summary = self._summarize(summary, turns)
+        with self._lock:
+            if generation != self._generation:
+                return
+            self.summarizing = False
+            # Turns recorded meanwhile stay after the folded ones
+            self.summary = summary
+            del self.turns[:count]
+        # A few very long answers can still exceed the cap
+        self._compact()
+
+    def _summarize(self, summary, turns):
+        lines = [f"Earlier summary: {summary}"] if summary else []
+        for question, answer in turns:
+            lines.append(f"Guest: {question}")
+            lines.append(f"Assistant: {answer}")
+        conversation = "\n".join(lines)
+        try:
+            return self.llm.generate(SUMMARY_PROMPT.format(conversation=conversation)).strip()
+        except Exception:
+            # Without a summary, keep the gist by truncating the oldest text to the cap
+            return conversation[-self.token_cap * 2:]
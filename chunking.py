@@ -0,0 +1,162 @@
+import hashlib
+import os
+import re
+
+CHUNK_MAX_CHARS = int(os.getenv("CHUNK_MAX_CHARS", 500))
+CONTEXT_TOP_K = int(os.getenv("CONTEXT_TOP_K", 6))
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", 600))
+
+SECTION_RE = re.compile(r"^\*\*(?P<title>[^*]+?):?\*\*:?\s*(?P<rest>.*)$")
+TOP_ITEM_RE = re.compile(r"^\*\s+")
+NESTED_ITEM_RE = re.compile(r"^\s+\*\s+")
+SENTENCE_END_RE = re.compile(r"(?<=[.!?।])\s+")
+
+
+def estimate_tokens(text):
+    # Gemini averages roughly four characters per token for English text
+    return max(1, len(text) // 4)
+
+
+def _blocks(text):
+    """
+    Splits a document into (section, block) pairs. A block is a paragraph, or a
+    top-level `*` list item together with any nested items under it.
+    """
+    section = ""
+    blocks = []
+    current = []
+
+    def flush():
+        if current:
+            blocks.append((section, "\n".join(current).strip()))
+            current.clear()
+
+    for line in text.splitlines():
+        stripped = line.strip()
+        if not stripped:
+            flush()
+            continue
+        header = SECTION_RE.match(stripped)
+        if header and not line.startswith((" ", "*  ", "* ")):
+            flush()
+            section = header.group("title").strip()
+            if header.group("rest"):
+                current.append(header.group("rest"))
+            continue
+        if TOP_ITEM_RE.match(line):
+            flush()
+            current.append(stripped)
+        elif NESTED_ITEM_RE.match(line):
+            current.append("    " + stripped)
+        else:
+            if current and TOP_ITEM_RE.match(current[0]):
+                flush()
+            current.append(stripped)
+    flush()
+    return blocks
+
+
+def _split_long(block, max_chars):
+    """Splits an oversized paragraph on sentence boundaries."""
+    if len(block) <= max_chars:
+        return [block]
+    pieces, current = [], ""
+    for sentence in SENTENCE_END_RE.split(block):
+        if current and len(current) + len(sentence) + 1 > max_chars:
+            pieces.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}".strip()
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def chunk_document(doc_id, text, max_chars=CHUNK_MAX_CHARS):
+    """
+    Splits a document along its structure (`**Section:**` headers and `*` items)
+    into chunk records for `sync_collection`. Consecutive blocks of the same section
+    are packed together up to max_chars, and each chunk starts with its section
+    title so it still makes sense on its own.
+    """
+    grouped = []
+    for section, block in _blocks(text):
+        for piece in _split_long(block, max_chars):
+            if grouped and grouped[-1][0] == section and len(grouped[-1][1]) + len(piece) + 1 <= max_chars:
+                grouped[-1] = (section, f"{grouped[-1][1]}\n{piece}")
+            else:
+                grouped.append((section, piece))
+
+    records = []
+    seen = {}
+    for position, (section, body) in enumerate(grouped):
+        document = f"{section}:\n{body}" if section else body
+        digest = hashlib.sha256(document.encode("utf-8")).hexdigest()[:16]
+        # Ids are content-addressed so an edit only re-embeds the chunks it touches
+        seen[digest] = seen.get(digest, 0) + 1
+        chunk_id = f"{doc_id}:{digest}" if seen[digest] == 1 else f"{doc_id}:{digest}-{seen[digest]}"
+        records.append({
+            "id": chunk_id,
+            "document": document,
+            "metadata": {"parent_id": doc_id, "position": position, "section": section},
+        })
+    return records
+
+
+def chunk_documents(documents, max_chars=CHUNK_MAX_CHARS):
+    records = []
+    for i, document in enumerate(documents):
+        records.extend(chunk_document(f"doc{i}", document, max_chars=max_chars))
+    return records
+
+
+def pack_context(result, token_budget=CONTEXT_TOKEN_BUDGET):
+    """
+    Builds the prompt context from a single-query `db.query` result. Chunks are taken
+    in rank order until the token budget is spent, duplicates are dropped, and chunks
+    that sit next to each other in the same parent document are merged back together.
+    """
+    if not result.get("documents") or not result["documents"][0]:
+        return ""
+    documents = result["documents"][0]
+    metadatas = (result.get("metadatas") or [[{}] * len(documents)])[0]
+
+    selected = []
+    seen_text = set()
+    used = 0
+    for rank, (text, metadata) in enumerate(zip(documents, metadatas)):
+        metadata = metadata or {}
+        if text in seen_text:
+            continue
+        cost = estimate_tokens(text)
+        if used + cost > token_budget:
+            # Always include the best match, even if it alone is over budget
+            if selected:
+                continue
+        seen_text.add(text)
+        used += cost
+        selected.append({
+            "rank": rank,
+            "text": text,
+            "parent_id": metadata.get("parent_id", f"chunk{rank}"),
+            "position": metadata.get("position", 0),
+            "section": metadata.get("section", ""),
+        })
+
+    merged = []
+    for chunk in sorted(selected, key=lambda c: (c["parent_id"], c["position"])):
+        previous = merged[-1] if merged else None
+        if previous and previous["parent_id"] == chunk["parent_id"] and previous["position"] + 1 == chunk["position"]:
+            text = chunk["text"]
+            prefix = f"{chunk['section']}:\n"
+            if chunk["section"] and chunk["section"] == previous["section"] and text.startswith(prefix):
+                text = text[len(prefix):]
+            previous["text"] = f"{previous['text']}\n{text}"
+            previous["position"] = chunk["position"]
+            previous["section"] = chunk["section"]
+            previous["rank"] = min(previous["rank"], chunk["rank"])
+        else:
+            merged.append(dict(chunk))
+
+    merged.sort(key=lambda c: c["rank"])
+    return "\n\n".join(chunk["text"] for chunk in merged)
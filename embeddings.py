@@ -0,0 +1,168 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from array import array
+
+from chromadb import Documents, EmbeddingFunction, Embeddings
+
+from providers import EmbeddingProvider
+
+EMBEDDING_MODEL = "models/text-embedding-004"
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", os.path.join(".cache", "embeddings.sqlite3"))
+EMBEDDING_CACHE_MAX_BYTES = int(os.getenv("EMBEDDING_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+
+
+class GeminiEmbeddingFunction(EmbeddingProvider, EmbeddingFunction):
+    # The task type is fixed per instance rather than toggled on a shared flag, so one
+    # instance can serve the collection while queries are embedded concurrently elsewhere
+    def __init__(self, model=EMBEDDING_MODEL, task_type="retrieval_document"):
+        self.model = model
+        self.task_type = task_type
+
+    def embed(self, texts, task_type):
+        import google.generativeai as genai
+
+        response = genai.embed_content(
+            model=self.model,
+            content=list(texts),
+            task_type=task_type,
+        )
+        return response["embedding"]
+
+    def __call__(self, input: Documents) -> Embeddings:
+        return self.embed(input, self.task_type)
+
+
+class EmbeddingCache:
+    """
+    Disk-backed embedding store keyed by a hash of (model, task type, text).
+    Least recently used rows are evicted once the stored vectors exceed max_bytes.
+    """
+
+    def __init__(self, path=EMBEDDING_CACHE_PATH, max_bytes=EMBEDDING_CACHE_MAX_BYTES):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " key TEXT PRIMARY KEY, model TEXT, task_type TEXT,"
+            " vector BLOB, nbytes INTEGER, last_used REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings(last_used)")
+        self._conn.commit()
+
+    @staticmethod
+    def key(text, model, task_type, namespace=""):
+        payload = f"{model}\0{task_type}\0{text}"
+        if namespace:
+            payload = f"{namespace}\0{payload}"
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get_many(self, keys):
+        """Returns {key: vector} for the keys that are cached and marks them as recently used."""
+        if not keys:
+            return {}
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(batch))})",
+                    batch,
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = array("f", blob).tolist()
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                    [(now, key) for key in found],
+                )
+                self._conn.commit()
+            self.hits += len(found)
+            self.misses += len(set(keys)) - len(found)
+        return found
+
+    def put_many(self, items, model, task_type):
+        """Stores (key, vector) pairs and evicts old rows if the cache is over budget."""
+        now = time.time()
+        rows = []
+        for key, vector in items:
+            blob = array("f", vector).tobytes()
+            rows.append((key, model, task_type, blob, len(blob), now))
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?, ?, ?)", rows)
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        total = self._conn.execute("SELECT COALESCE(SUM(nbytes), 0) FROM embeddings").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, nbytes in self._conn.execute(
+            "SELECT key, nbytes FROM embeddings ORDER BY last_used ASC"
+        ).fetchall():
+            self._conn.execute("DELETE FROM embeddings WHERE key = ?", (key,))
+            total -= nbytes
+            if total <= self.max_bytes:
+                break
+
+    def stats(self):
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(nbytes), 0) FROM embeddings"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "bytes": size,
+        }
+
+
+class CachedEmbeddingFunction(EmbeddingProvider, EmbeddingFunction):
+    """
+    Wraps an EmbeddingProvider so only texts missing from the cache are sent to the API.
+    Entries are keyed by `namespace` too, so tenants sharing one cache never see each other's.
+    """
+
+    def __init__(self, inner, cache=None, namespace=""):
+        self.inner = inner
+        self.cache = cache if cache is not None else EmbeddingCache()
+        self.namespace = namespace
+
+    @property
+    def model(self):
+        return self.inner.model
+
+    @property
+    def task_type(self):
+        return self.inner.task_type
+
+    def embed(self, texts, task_type):
+        texts = list(texts)
+        keys = [EmbeddingCache.key(text, self.inner.model, task_type, self.namespace) for text in texts]
+        cached = self.cache.get_many(keys)
+
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in cached:
+                missing.setdefault(key, text)
+        if missing:
+            vectors = self.inner.embed(list(missing.values()), task_type)
+            fresh = list(zip(missing.keys(), vectors))
+            self.cache.put_many(fresh, self.inner.model, task_type)
+            cached.update(fresh)
+
+        return [cached[key] for key in keys]
+
+    def __call__(self, input: Documents) -> Embeddings:
+        return self.embed(input, self.task_type)
@@ -0,0 +1,283 @@
+"""
+Bulk-loads documents into the knowledge base next to the built-in ones.
+
+    python ingest.py menus/                     # every .txt/.md file under the directory
+    python ingest.py faqs.jsonl                 # {"id", "text", "metadata"} per line
+    python ingest.py faqs.jsonl --workers 8 --batch-size 100
+    python ingest.py faqs.jsonl --restart       # ignore the checkpoint
+    python ingest.py faqs.jsonl --tenant riverside-cafe
+
+Documents are streamed, chunked like the built-in ones, embedded in size-limited
+batches by a bounded thread pool (retrying with exponential backoff, and pausing every
+worker when the API reports a rate limit), and upserted to Chroma in bulk. Each fully
+written document is appended to a checkpoint, so an interrupted run resumes where it
+stopped and unchanged documents are skipped on the next run.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import backoff
+
+from chunking import CHUNK_MAX_CHARS, chunk_document
+from embeddings import CachedEmbeddingFunction
+from kb_index import CHROMA_PATH, INGESTED_SOURCE, content_hash
+from providers import load_providers
+from tenants import DEFAULT_TENANT, cache_namespace, collection_name, list_tenants
+from vector_index import open_client
+
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", 4))
+# Gemini accepts at most 100 texts per embedding request
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", 100))
+INGEST_BATCH_MAX_CHARS = int(os.getenv("INGEST_BATCH_MAX_CHARS", 40000))
+INGEST_MAX_TRIES = int(os.getenv("INGEST_MAX_TRIES", 8))
+TEXT_EXTENSIONS = (".txt", ".md")
+
+try:
+    from google.api_core import exceptions as google_exceptions
+
+    RATE_LIMITED = (google_exceptions.ResourceExhausted, google_exceptions.TooManyRequests)
+    RETRYABLE = RATE_LIMITED + (
+        google_exceptions.ServiceUnavailable,
+        google_exceptions.DeadlineExceeded,
+        google_exceptions.InternalServerError,
+        ConnectionError,
+        TimeoutError,
+    )
+except ImportError:
+    RATE_LIMITED = ()
+    RETRYABLE = (ConnectionError, TimeoutError)
+
+
+def checkpoint_path_for(collection_name, root=CHROMA_PATH):
+    return os.path.join(root, f"{collection_name}.ingest-checkpoint.jsonl")
+
+
+def iter_documents(source):
+    """Yields {"id", "text", "metadata"} from a directory of text files or a JSONL file."""
+    if os.path.isdir(source):
+        for root, dirs, files in os.walk(source):
+            dirs.sort()
+            for name in sorted(files):
+                if name.endswith(TEXT_EXTENSIONS):
+                    path = os.path.join(root, name)
+                    with open(path, encoding="utf-8") as fp:
+                        text = fp.read()
+                    doc_id = os.path.relpath(path, source).replace(os.sep, "/")
+                    yield {"id": doc_id, "text": text, "metadata": {"path": doc_id}}
+        return
+    with open(source, encoding="utf-8") as fp:
+        for line_number, line in enumerate(fp, 1):
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            text = row.get("text", row.get("document"))
+            if text is None:
+                raise ValueError(f"{source}:{line_number}: expected a 'text' field")
+            yield {"id": str(row.get("id", f"line{line_number}")), "text": text, "metadata": row.get("metadata") or {}}
+
+
+class Checkpoint:
+    """Append-only record of documents that are fully in the collection, keyed by content hash."""
+
+    def __init__(self, path):
+        self.path = path
+        self.done = {}
+        try:
+            with open(path, encoding="utf-8") as fp:
+                for line in fp:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A run killed mid-write leaves a partial last line
+                        continue
+                    self.done[entry["id"]] = entry["hash"]
+        except FileNotFoundError:
+            pass
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._fp = open(path, "a", encoding="utf-8")
+
+    def mark(self, doc_id, digest):
+        self.done[doc_id] = digest
+        self._fp.write(json.dumps({"id": doc_id, "hash": digest}) + "\n")
+        self._fp.flush()
+
+    def close(self):
+        self._fp.close()
+
+
+class Cooldown:
+    """Shared pause: once one worker is rate limited, every worker waits it out."""
+
+    def __init__(self):
+        self._until = 0.0
+        self._lock = threading.Lock()
+
+    def extend(self, seconds):
+        with self._lock:
+            self._until = max(self._until, time.monotonic() + seconds)
+
+    def wait(self):
+        delay = self._until - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+
+class Ingester:
+    def __init__(self, db, embed_fn, checkpoint, workers=INGEST_WORKERS, batch_size=INGEST_BATCH_SIZE,
+                 batch_max_chars=INGEST_BATCH_MAX_CHARS, max_tries=INGEST_MAX_TRIES, chunk_chars=CHUNK_MAX_CHARS,
+                 restart=False):
+        self.db = db
+        self.embed_fn = embed_fn
+        self.checkpoint = checkpoint
+        self.workers = workers
+        self.batch_size = batch_size
+        self.batch_max_chars = batch_max_chars
+        self.chunk_chars = chunk_chars
+        # Without a checkpoint there's no telling which documents were ingested before
+        self.restart = restart
+        self.cooldown = Cooldown()
+        self._stats_lock = threading.Lock()
+        self.stats = {"documents": 0, "skipped": 0, "chunks": 0, "batches": 0, "retries": 0, "rate_limited": 0}
+        self._embed = backoff.on_exception(
+            backoff.expo, RETRYABLE, max_tries=max_tries, jitter=backoff.full_jitter, on_backoff=self._on_backoff
+        )(self._embed_once)
+
+    def _on_backoff(self, details):
+        # Runs on the worker threads
+        with self._stats_lock:
+            self.stats["retries"] += 1
+            if isinstance(details["exception"], RATE_LIMITED):
+                self.stats["rate_limited"] += 1
+        if isinstance(details["exception"], RATE_LIMITED):
+            self.cooldown.extend(details["wait"])
+
+    def _embed_once(self, texts):
+        self.cooldown.wait()
+        return self.embed_fn.embed(texts, "retrieval_document")
+
+    def _embed_batch(self, batch):
+        return batch, self._embed([record["document"] for record in batch])
+
+    def _records(self, documents, pending):
+        """Chunks the documents that aren't checkpointed yet; `pending` counts unwritten chunks per document."""
+        for document in documents:
+            digest = content_hash(document["text"])
+            if self.checkpoint.done.get(document["id"]) == digest:
+                self.stats["skipped"] += 1
+                continue
+            if self.restart or document["id"] in self.checkpoint.done:
+                # The document changed since it was ingested; its old chunks have other ids.
+                # Only ingested chunks: a built-in document may share the id
+                self.db.delete(where={"$and": [{"parent_id": document["id"]}, {"source": INGESTED_SOURCE}]})
+            extra = {
+                key: value for key, value in document["metadata"].items()
+                if isinstance(value, (str, int, float, bool))
+            }
+            records = chunk_document(document["id"], document["text"], max_chars=self.chunk_chars)
+            if not records:
+                self.checkpoint.mark(document["id"], digest)
+                continue
+            pending[document["id"]] = [len(records), digest]
+            for record in records:
+                record["metadata"] = {**extra, **record["metadata"], "source": INGESTED_SOURCE}
+                yield record
+
+    def _batches(self, records):
+        batch, chars = [], 0
+        for record in records:
+            size = len(record["document"])
+            if batch and (len(batch) >= self.batch_size or chars + size > self.batch_max_chars):
+                yield batch
+                batch, chars = [], 0
+            batch.append(record)
+            chars += size
+        if batch:
+            yield batch
+
+    def _write(self, batch, vectors, pending):
+        self.db.upsert(
+            ids=[record["id"] for record in batch],
+            documents=[record["document"] for record in batch],
+            metadatas=[record["metadata"] for record in batch],
+            embeddings=vectors,
+        )
+        self.stats["batches"] += 1
+        self.stats["chunks"] += len(batch)
+        for record in batch:
+            doc_id = record["metadata"]["parent_id"]
+            pending[doc_id][0] -= 1
+            if pending[doc_id][0] == 0:
+                self.checkpoint.mark(doc_id, pending.pop(doc_id)[1])
+                self.stats["documents"] += 1
+
+    def run(self, documents, progress_every=5.0):
+        pending = {}
+        started = last_report = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ingest") as pool:
+            in_flight = set()
+            for batch in self._batches(self._records(documents, pending)):
+                # Bounded read-ahead: stop chunking until a worker frees up
+                while len(in_flight) >= self.workers * 2:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        self._write(*future.result(), pending)
+                in_flight.add(pool.submit(self._embed_batch, batch))
+                if time.perf_counter() - last_report >= progress_every:
+                    last_report = time.perf_counter()
+                    self._report(last_report - started, file=sys.stderr)
+            for future in wait(in_flight).done:
+                self._write(*future.result(), pending)
+        self.stats["seconds"] = time.perf_counter() - started
+        return self.stats
+
+    def _report(self, elapsed, file=sys.stdout):
+        rate = self.stats["documents"] / elapsed if elapsed > 0 else 0.0
+        print(f"{self.stats['documents']} documents ({self.stats['skipped']} unchanged), "
+              f"{self.stats['chunks']} chunks in {elapsed:.1f}s: {rate:.1f} docs/s, "
+              f"{self.stats['retries']} retries ({self.stats['rate_limited']} rate limited)", file=file)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", help="directory of .txt/.md files, or a .jsonl file")
+    parser.add_argument("--tenant", default=DEFAULT_TENANT, help="restaurant to load the documents for (see tenants.py)")
+    parser.add_argument("--workers", type=int, default=INGEST_WORKERS)
+    parser.add_argument("--batch-size", type=int, default=INGEST_BATCH_SIZE)
+    parser.add_argument("--batch-max-chars", type=int, default=INGEST_BATCH_MAX_CHARS)
+    parser.add_argument("--checkpoint", help="defaults to a file next to the Chroma collection")
+    parser.add_argument("--restart", action="store_true", help="re-ingest everything, ignoring the checkpoint")
+    args = parser.parse_args()
+    if args.tenant not in [tenant["id"] for tenant in list_tenants()]:
+        parser.error(f"unknown tenant {args.tenant!r}; create its directory under TENANTS_DIR first")
+
+    from dotenv import load_dotenv
+    load_dotenv()
+    if os.getenv("GOOGLE_API_KEY"):
+        import google.generativeai as genai
+        genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+
+    # The embedding cache is shared with the app, so re-ingesting unchanged text is free
+    embed_fn = CachedEmbeddingFunction(load_providers().embedder, namespace=cache_namespace(args.tenant))
+    client = open_client()
+    db = client.get_or_create_collection(name=collection_name(args.tenant), embedding_function=embed_fn)
+
+    checkpoint_path = args.checkpoint or checkpoint_path_for(collection_name(args.tenant))
+    if args.restart and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    checkpoint = Checkpoint(checkpoint_path)
+    ingester = Ingester(db, embed_fn, checkpoint, workers=args.workers, batch_size=args.batch_size,
+                        batch_max_chars=args.batch_max_chars, restart=args.restart)
+    try:
+        stats = ingester.run(iter_documents(args.source))
+    finally:
+        checkpoint.close()
+    ingester._report(stats["seconds"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+import hashlib
+import json
+import os
+
+CHROMA_PATH = os.getenv("CHROMA_PATH", os.path.join(".cache", "chroma"))
+# Metadata "source" of records written by ingest.py; sync_collection leaves them alone
+INGESTED_SOURCE = "ingest"
+
+
+def content_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def manifest_path_for(collection_name, root=CHROMA_PATH):
+    return os.path.join(root, f"{collection_name}.manifest.json")
+
+
+def load_manifest(path):
+    try:
+        with open(path, encoding="utf-8") as fp:
+            return json.load(fp)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def save_manifest(path, manifest):
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as fp:
+        json.dump(manifest, fp, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def corpus_version(hashes):
+    """A single hash that changes whenever any indexed record is added, edited or removed."""
+    digest = hashlib.sha256()
+    for record_id in sorted(hashes):
+        digest.update(f"{record_id}\0{hashes[record_id]}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _indexed_metadata(db):
+    """
+    Reads the metadata (including content hashes) stored alongside each record in the
+    collection, skipping records that were bulk-ingested rather than synced.
+    """
+    stored = db.get(include=["metadatas"])
+    return {
+        record_id: metadata or {}
+        for record_id, metadata in zip(stored["ids"], stored["metadatas"])
+        if (metadata or {}).get("source") != INGESTED_SOURCE
+    }
+
+
+def sync_collection(db, records, manifest_path, embedding_model=""):
+    """
+    Brings the collection in line with `records` (dicts with "id", "document" and
+    optional "metadata"), embedding and upserting only new or changed records and
+    deleting ids that are no longer present. Records whose text is unchanged but whose
+    metadata moved are updated in place without re-embedding. Returns a summary of
+    what changed.
+    """
+    wanted = {record["id"]: content_hash(record["document"]) for record in records}
+    wanted_metadata = {
+        record["id"]: {**record.get("metadata", {}), "content_hash": wanted[record["id"]]}
+        for record in records
+    }
+    manifest = load_manifest(manifest_path)
+
+    # Fast path: manifest matches the corpus and the collection still holds all of it
+    if (
+        manifest.get("embedding_model") == embedding_model
+        and manifest.get("hashes") == wanted
+        and manifest.get("metadata") == wanted_metadata
+        and len(db.get(ids=list(wanted), include=[])["ids"]) == len(wanted)
+    ):
+        return {"added": [], "updated": [], "deleted": [], "unchanged": len(wanted), "version": manifest["version"]}
+
+    stored = _indexed_metadata(db)
+    # A different embedding model invalidates every stored vector
+    indexed = stored if manifest.get("embedding_model", embedding_model) == embedding_model else {}
+    added = [record_id for record_id in wanted if record_id not in indexed]
+    updated = [
+        record_id for record_id in wanted
+        if record_id in indexed and indexed[record_id].get("content_hash") != wanted[record_id]
+    ]
+    deleted = [record_id for record_id in stored if record_id not in wanted]
+    moved = [
+        record_id for record_id in wanted
+        if record_id in indexed
+        and indexed[record_id].get("content_hash") == wanted[record_id]
+        and indexed[record_id] != wanted_metadata[record_id]
+    ]
+
+    changed = set(added) | set(updated)
+    if changed:
+        batch = [record for record in records if record["id"] in changed]
+        db.upsert(
+            ids=[record["id"] for record in batch],
+            documents=[record["document"] for record in batch],
+            metadatas=[wanted_metadata[record["id"]] for record in batch],
+        )
+    if moved:
+        db.update(ids=moved, metadatas=[wanted_metadata[record_id] for record_id in moved])
+    if deleted:
+        db.delete(ids=deleted)
+
+    version = corpus_version(wanted)
+    save_manifest(manifest_path, {
+        "embedding_model": embedding_model,
+        "hashes": wanted,
+        "metadata": wanted_metadata,
+        "version": version,
+    })
+    return {
+        "added": added,
+        "updated": updated,
+        "deleted": deleted,
+        "unchanged": len(wanted) - len(changed),
+        "version": version,
+    }
@@ -0,0 +1,134 @@
+import math
+import os
+import re
+from collections import Counter, defaultdict
+
+# A lexical match is decisive when the best chunk contains every query term and outscores
+# the runner-up by this factor; retrieval then skips the embedding call
+LEXICAL_FAST_PATH_MARGIN = float(os.getenv("LEXICAL_FAST_PATH_MARGIN", 2.0))
+# Reciprocal rank fusion constant; larger values flatten the difference between ranks
+HYBRID_RRF_K = int(os.getenv("HYBRID_RRF_K", 60))
+
+# Devanagari vowel signs aren't \w, so the block is listed explicitly
+TOKEN_RE = re.compile(r"[\w\u0900-\u097f]+")
+STOPWORDS = frozenset("""
+a about an and any are as at be by can could do does for from get have how i in is it know like me much
+my need of offer on or our please price prices serve tell the there this to us want what when where which
+with would you your
+""".split())
+
+
+def tokenize(text):
+    return [token for token in TOKEN_RE.findall(text.lower()) if token not in STOPWORDS]
+
+
+class LexicalIndex:
+    """
+    In-memory BM25 inverted index over a collection's chunks, so queries that name a dish
+    or a place can be matched exactly and without an embedding call.
+    """
+
+    def __init__(self, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings = defaultdict(dict)  # term -> {chunk id: term frequency}
+        self._lengths = {}  # chunk id -> number of terms
+        self._records = {}  # chunk id -> (document, metadata)
+        self._total_length = 0
+
+    @classmethod
+    def from_collection(cls, db):
+        """Indexes everything in the Chroma collection, bulk-ingested chunks included."""
+        index = cls()
+        stored = db.get(include=["documents", "metadatas"])
+        for record_id, document, metadata in zip(stored["ids"], stored["documents"], stored["metadatas"]):
+            index.add(record_id, document or "", metadata or {})
+        return index
+
+    def __len__(self):
+        return len(self._records)
+
+    def add(self, record_id, document, metadata=None):
+        terms = Counter(tokenize(document))
+        for term, count in terms.items():
+            self._postings[term][record_id] = count
+        length = sum(terms.values())
+        self._lengths[record_id] = length
+        self._records[record_id] = (document, metadata or {})
+        self._total_length += length
+
+    def _idf(self, term):
+        matches = len(self._postings.get(term, ()))
+        return math.log(1 + (len(self._records) - matches + 0.5) / (matches + 0.5))
+
+    def search(self, query, top_k=10):
+        """
+        Returns up to top_k (chunk id, score, coverage) by BM25 score. Coverage is the
+        share of the query's terms (weighted by IDF) that the chunk contains; a term
+        found nowhere in the corpus weighs the most, so such queries are never fully covered.
+        """
+        query_terms = set(tokenize(query))
+        terms = [term for term in query_terms if term in self._postings]
+        if not terms:
+            return []
+        average_length = self._total_length / len(self._records)
+        scores = defaultdict(float)
+        matched = defaultdict(float)
+        weights = {term: self._idf(term) for term in query_terms}
+        for term in terms:
+            for record_id, frequency in self._postings[term].items():
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[record_id] / average_length)
+                scores[record_id] += weights[term] * frequency * (self.k1 + 1) / (frequency + norm)
+                matched[record_id] += weights[term]
+        total_weight = sum(weights.values())
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:top_k]
+        return [(record_id, score, matched[record_id] / total_weight) for record_id, score in ranked]
+
+    def record(self, record_id):
+        """(document, metadata) of an indexed chunk."""
+        return self._records[record_id]
+
+    def result(self, ids):
+        """A single-query `db.query`-shaped result for `ids`, for `pack_context`."""
+        records = [self._records[record_id] for record_id in ids if record_id in self._records]
+        return {
+            "ids": [[record_id for record_id in ids if record_id in self._records]],
+            "documents": [[document for document, _ in records]],
+            "metadatas": [[metadata for _, metadata in records]],
+        }
+
+
+def is_decisive(hits, margin=LEXICAL_FAST_PATH_MARGIN):
+    """Whether the best lexical hit contains every query term and clearly beats the next one."""
+    if not hits or hits[0][2] < 1.0:
+        return False
+    return len(hits) == 1 or hits[0][1] >= margin * hits[1][1]
+
+
+def fuse(rankings, k=HYBRID_RRF_K):
+    """Reciprocal rank fusion of several ranked id lists, best first."""
+    scores = defaultdict(float)
+    for ranking in rankings:
+        for rank, record_id in enumerate(ranking):
+            scores[record_id] += 1 / (k + rank + 1)
+    return sorted(scores, key=scores.get, reverse=True)
+
+
+def fuse_results(vector_result, hits, index, top_k):
+    """Merges a single-query `db.query` result with lexical `hits` into one result of top_k chunks."""
+    records = {
+        record_id: (document, metadata)
+        for record_id, document, metadata in zip(
+            vector_result["ids"][0], vector_result["documents"][0], vector_result["metadatas"][0]
+        )
+    }
+    ids = fuse([vector_result["ids"][0], [record_id for record_id, _, _ in hits]])[:top_k]
+    for record_id in ids:
+        # Chunks only the lexical side found come from the index
+        if record_id not in records:
+            records[record_id] = index.record(record_id)
+    return {
+        "ids": [ids],
+        "documents": [[records[record_id][0] for record_id in ids]],
+        "metadatas": [[records[record_id][1] for record_id in ids]],
+    }
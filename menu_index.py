@@ -0,0 +1,440 @@
+import difflib
+import re
+from dataclasses import dataclass, field
+
+SECTION_RE = re.compile(r"^\*\*(?P<title>[^*]+?):\*\*\s*$")
+GROUP_RE = re.compile(r"^\*\s+\*\*(?P<title>[^*]+?):\*\*\s*$")
+ITEM_RE = re.compile(r"^(?P<indent>\s*)\*\s+(?P<body>.+)$")
+PRICE_RE = re.compile(r"₹\s?(\d+)")
+VARIANT_RE = re.compile(r"(?P<label>[^,()]+?)\s*-\s*₹\s?(?P<price>\d+)(?P<unit>[^,()]*)")
+AVAILABLE_RE = re.compile(r"\(Available from (?P<time>[^)]+?)(?: onwards)?\)", re.IGNORECASE)
+HOURS_RE = re.compile(r"opening hours are from (?P<open>[\d:]+ ?[AP]M) to (?P<close>[\d:]+ ?[AP]M)", re.IGNORECASE)
+AMOUNT_RE = re.compile(r"(?:₹|rs\.?|inr|rupees?)?\s*(\d{2,5})\s*(?:₹|rs\.?|rupees?|रुपये|रुपए)?", re.IGNORECASE)
+# Keeps Devanagari vowel signs, which aren't \w: dropping them splits Hindi words apart
+WORD_RE = re.compile(r"[^\w\s₹\u0900-\u097f]")
+AMOUNT_WORD_RE = re.compile(r"^(?:₹?\d+|rs|inr|rupees?|रुपये|रुपए)$")
+
+MATCH_CUTOFF = 0.88
+MAX_LISTED_ITEMS = 15
+
+
+@dataclass
+class MenuItem:
+    name: str
+    section: str
+    prices: list  # [(variant label or "", price, unit)]
+    tags: set = field(default_factory=set)  # "vegan", "vegetarian", "vegan option", "vegetarian option", "non-vegetarian"
+    group: str = ""
+    description: str = ""
+    available_from: str = ""
+
+    @property
+    def min_price(self):
+        return min(price for _, price, _ in self.prices)
+
+    def is_vegan(self):
+        return "vegan" in self.tags
+
+    def is_vegetarian(self):
+        return "vegetarian" in self.tags or "vegan" in self.tags
+
+
+def _normalize(text):
+    return " ".join(WORD_RE.sub(" ", text.lower()).split())
+
+
+def _split_top_level(text, separator=","):
+    """Splits on separators that are not inside parentheses."""
+    parts, depth, current = [], 0, ""
+    for char in text:
+        depth += char == "("
+        depth -= char == ")"
+        if char == separator and depth == 0:
+            parts.append(current.strip())
+            current = ""
+        else:
+            current += char
+    parts.append(current.strip())
+    return parts
+
+
+def _diet_tags(text):
+    lowered = text.lower()
+    tags = set()
+    if "non-vegetarian" in lowered:
+        return {"non-vegetarian"}
+    # "Vegetarian/Vegan option with Tofu" is a variant on request, not a vegetarian dish
+    for match in re.finditer(r"\bvegetarian\b(?P<after>[^,)]*)", lowered):
+        tags.add("vegetarian option" if "option" in match.group("after") else "vegetarian")
+    for match in re.finditer(r"\bvegan\b(?P<after>[^,)/]*)", lowered):
+        tags.add("vegan option" if "option" in match.group("after") else "vegan")
+    if "vegan" in tags:
+        tags.discard("vegan option")
+    if "vegetarian" in tags:
+        tags.discard("vegetarian option")
+    return tags
+
+
+def _parse_segment(segment):
+    """Parses one dish like `Samosa (2 Pcs - ₹80) - Vegetarian` into (name, prices, description, trailing)."""
+    name = re.split(r"\s*\(|\s+-\s+₹", segment, maxsplit=1)[0].strip()
+    rest = segment[len(name):]
+    prices, descriptions = [], []
+
+    for paren in re.findall(r"\(([^()]*(?:\([^()]*\)[^()]*)*)\)", rest):
+        variants = list(VARIANT_RE.finditer(paren))
+        bare = PRICE_RE.findall(paren)
+        if len(variants) > 1:
+            prices.extend((v.group("label").strip(), int(v.group("price")), v.group("unit").strip()) for v in variants)
+        elif bare:
+            label = re.split(r"\s*-?\s*₹", paren, maxsplit=1)[0].strip(" -")
+            if label:
+                descriptions.append(label)
+            unit = paren.split(f"₹{bare[0]}", 1)[-1].strip(" ,")
+            prices.append(("", int(bare[0]), unit))
+        elif not _diet_tags(paren):
+            descriptions.append(paren.strip())
+
+    # `Plain Idli (2 Pcs) - ₹100 (Vegan)` keeps its price outside the parentheses
+    if not prices:
+        outside = re.search(r"-\s*₹\s?(\d+)", rest)
+        if outside:
+            prices.append(("", int(outside.group(1)), ""))
+
+    trailing = re.sub(r"\([^()]*₹[^()]*\)", "", rest)
+    return name, prices, "; ".join(descriptions), trailing
+
+
+class MenuIndex:
+    """
+    In-memory index of the menu in Document2: dish name -> prices, cuisine section,
+    dietary tags and availability, with fuzzy name lookup.
+    """
+
+    def __init__(self, items, opening_hours=None):
+        self.items = items
+        self.opening_hours = opening_hours
+        self.sections = sorted({item.section for item in items})
+        self._aliases = {}
+        for item in items:
+            self._aliases.setdefault(_normalize(item.name), []).append(item)
+            for label, _, _ in item.prices:
+                if label and len(item.prices) > 1:
+                    self._aliases.setdefault(_normalize(f"{label} {item.name}"), []).append(item)
+            if item.group:
+                for alias in {_normalize(item.group), *(_normalize(part) for part in item.group.split("/"))}:
+                    self._aliases.setdefault(alias, []).append(item)
+        # Guests drop adjectives ("dal makhani" for "Flavorful Dal Makhani"), so trailing
+        # word runs of two or more words are aliases too, unless they name a dish already
+        self._suffixes = {}
+        for item in items:
+            words = _normalize(item.name).split()
+            for start in range(1, len(words) - 1):
+                suffix = " ".join(words[start:])
+                if suffix not in self._aliases:
+                    self._suffixes.setdefault(suffix, []).append(item)
+
+    def _mentions(self, words):
+        """[(word positions, items)] for each dish named in `words`, best match first."""
+        names = list(self._aliases) + list(self._suffixes)
+        candidates = []
+        for size in range(1, 5):
+            for start in range(len(words) - size + 1):
+                ngram = " ".join(words[start:start + size])
+                if ngram in self._aliases or ngram in self._suffixes:
+                    matches = [ngram]
+                else:
+                    matches = difflib.get_close_matches(ngram, names, n=1, cutoff=MATCH_CUTOFF)
+                for match in matches:
+                    ratio = difflib.SequenceMatcher(None, ngram, match).ratio()
+                    # Prefer more words, then closer spelling, then full names over suffixes
+                    candidates.append(((size, ratio, match in self._aliases), start, match))
+
+        taken, found = set(), {}
+        for (size, _, _), start, match in sorted(candidates, key=lambda candidate: candidate[0], reverse=True):
+            span = set(range(start, start + size))
+            if span & taken:
+                continue
+            taken |= span
+            found.setdefault(match, (set(), self._aliases.get(match) or self._suffixes[match]))[0].update(span)
+        return list(found.values())
+
+    def mentions(self, query):
+        """
+        Returns the dishes named in the query, one list of items per name, best match
+        first. Word n-grams of the query are matched exactly or fuzzily against dish
+        names; longer matches win, and a shorter one inside them doesn't count again.
+        """
+        return [items for _, items in self._mentions(_normalize(query).split())]
+
+    def lookup(self, query):
+        """Returns the dishes of the best match named in the query, or [] if nothing matches confidently."""
+        mentions = self.mentions(query)
+        return mentions[0] if mentions else []
+
+    def section_for(self, query):
+        """The section whose first word the query names; "south indian" picks South Indian over Indian."""
+        words = set(_normalize(query).split())
+        named = [section for section in self.sections if _normalize(section).split()[0] in words]
+        return max(named, key=lambda section: len(words & set(_normalize(section).split())), default=None)
+
+    def filter(self, vegan=False, vegetarian=False, max_price=None, section=None):
+        results = []
+        for item in self.items:
+            if vegan and not item.is_vegan():
+                continue
+            if vegetarian and not item.is_vegetarian():
+                continue
+            if max_price is not None and item.min_price > max_price:
+                continue
+            if section and item.section != section:
+                continue
+            results.append(item)
+        return results
+
+
+def parse_menu(text):
+    """Compiles the menu document into a MenuIndex."""
+    items = []
+    section, available_from, group = "", "", ""
+
+    hours = HOURS_RE.search(text)
+    opening_hours = (hours.group("open"), hours.group("close")) if hours else None
+
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        header = SECTION_RE.match(line.strip())
+        if header:
+            title = header.group("title")
+            availability = AVAILABLE_RE.search(title)
+            available_from = availability.group("time") if availability else ""
+            section = AVAILABLE_RE.sub("", title).strip()
+            group = ""
+            continue
+        group_header = GROUP_RE.match(line)
+        if group_header:
+            group = group_header.group("title").strip()
+            continue
+        item = ITEM_RE.match(line)
+        if not item or not section:
+            continue
+        if not item.group("indent"):
+            group = ""
+
+        body = item.group("body").strip()
+        segments = _split_top_level(body)
+        if len(segments) > 1 and not all(PRICE_RE.search(segment) for segment in segments):
+            segments = [body]
+        # A diet note after the last dish applies to every dish on the line
+        shared_tags = _diet_tags(_parse_segment(segments[-1])[3]) if len(segments) > 1 else set()
+
+        for segment in segments:
+            name, prices, description, trailing = _parse_segment(segment)
+            if not prices:
+                continue
+            tags = _diet_tags(trailing) or set(shared_tags)
+            if not tags and name.lower().startswith("vegan "):
+                tags = {"vegan"}
+            items.append(MenuItem(
+                name=name,
+                section=section,
+                prices=prices,
+                tags=tags,
+                group=re.sub(r"\s*\(.*\)", "", group),
+                description=description,
+                available_from=available_from,
+            ))
+    return MenuIndex(items, opening_hours=opening_hours)
+
+
+# --- Intent router ---
+
+TEMPLATES = {
+    "en": {
+        "hours": "We're open from {open} to {close} every day.",
+        "available": "{name} is available from {time} onwards.",
+        "price": "{name} costs {prices}.",
+        "price_variants": "{name}: {prices}.",
+        "diet_yes": "Yes, {name} is {diet}.",
+        "diet_option": "{name} has a {diet} option available on request.",
+        "diet_no": "No, {name} is not {diet}.",
+        "list": "Here are our {filters} dishes{under}:",
+        "more": "...and {count} more. Ask me about a specific cuisine to narrow it down.",
+        "none": "Sorry, we don't have any {filters} dishes{under}.",
+        "under": " under ₹{amount}",
+    },
+    "hi": {
+        "hours": "हम रोज़ {open} से {close} तक खुले रहते हैं।",
+        "available": "{name} {time} के बाद से उपलब्ध है।",
+        "price": "{name} की कीमत {prices} है।",
+        "price_variants": "{name}: {prices}।",
+        "diet_yes": "हाँ, {name} {diet} है।",
+        "diet_option": "{name} का {diet} विकल्प अनुरोध पर उपलब्ध है।",
+        "diet_no": "नहीं, {name} {diet} नहीं है।",
+        "list": "ये हमारे {under}{filters} व्यंजन हैं:",
+        "more": "...और {count} अन्य। किसी खास व्यंजन-शैली के बारे में पूछें।",
+        "none": "माफ़ कीजिए, हमारे पास कोई {under}{filters} व्यंजन नहीं है।",
+        "under": "₹{amount} से कम के ",
+    },
+}
+DIET_WORDS = {
+    "en": {"vegan": "vegan", "vegetarian": "vegetarian"},
+    "hi": {"vegan": "वीगन", "vegetarian": "शाकाहारी"},
+}
+
+def _phrases(*phrases):
+    return tuple(tuple(_normalize(phrase).split()) for phrase in phrases)
+
+
+# Matched as whole words of the normalized question, so "rate" doesn't match "separate"
+PRICE_WORDS = _phrases(
+    "how much", "price", "prices", "priced", "cost", "costs", "rate", "rates",
+    "kitne", "kitna", "kimat", "keemat", "daam",
+    "कितने", "कितना", "कीमत", "दाम",
+)
+HOURS_WORDS = _phrases(
+    "what time", "open", "opens", "opening", "close", "closes", "closing", "timing", "timings", "hours",
+    "खुलता", "खुलते", "खुलेगा", "बंद", "समय",
+)
+AVAILABLE_WORDS = _phrases("when", "available", "कब", "उपलब्ध")
+FILTER_WORDS = _phrases("dishes", "options", "items", "what", "which", "list", "show", "under", "below", "less than", "व्यंजन", "क्या")
+UNDER_WORDS = _phrases("under", "below", "less than", "cheaper than", "within", "से कम")
+VEGAN_WORDS = _phrases("vegan", "वीगन")
+VEGETARIAN_WORDS = _phrases("vegetarian", "veg", "veggie", "शाकाहारी")
+DIET_QUESTION_WORDS = _phrases("is", "are", "does", "क्या")
+# Words that don't change what's being asked. Anything else the router doesn't know
+# ("delivery", "parking", "gluten", "sunday", and negations like "not" or "non-veg")
+# sends the question to the LLM instead of getting a confident answer to a different one.
+FILLER_WORDS = {
+    "a", "an", "the", "is", "are", "was", "be", "do", "does", "you", "your", "we", "our", "us", "i", "me", "my",
+    "it", "its", "this", "that", "these", "those", "there", "here", "of", "for", "in", "on", "at", "to", "from",
+    "and", "or", "please", "tell", "can", "could", "would", "will", "what", "whats", "s", "which", "how", "any",
+    "some", "about", "much", "have", "has", "get", "serve", "menu", "restaurant", "dish", "dishes", "item",
+    "items", "option", "options", "food", "cuisine", "section", "hi", "hello", "thanks",
+    "kya", "hai", "hain", "ka", "ki", "ke", "ko", "mein", "aap", "aapka", "aapke",
+    "है", "हैं", "का", "की", "के", "को", "में", "से", "क्या", "आप", "आपका", "आपके", "मुझे", "बताइए", "बताओ", "कृपया",
+}
+
+
+class _Question:
+    """The question's words, and which of them the router has accounted for."""
+
+    def __init__(self, question):
+        self.words = _normalize(question).split()
+        self.used = set()
+
+    def has(self, phrases):
+        found = False
+        for phrase in phrases:
+            for start in range(len(self.words) - len(phrase) + 1):
+                if tuple(self.words[start:start + len(phrase)]) == phrase:
+                    self.used.update(range(start, start + len(phrase)))
+                    found = True
+        return found
+
+    def understood(self):
+        return all(
+            position in self.used or word in FILLER_WORDS or AMOUNT_WORD_RE.match(word)
+            for position, word in enumerate(self.words)
+        )
+
+
+def _format_prices(item):
+    if len(item.prices) == 1:
+        _, price, unit = item.prices[0]
+        return f"₹{price}" + (f" {unit}" if unit else "")
+    return ", ".join(f"₹{price} ({label})" if label else f"₹{price}" for label, price, _ in item.prices)
+
+
+def _format_item(item):
+    tags = ", ".join(sorted(tag.title() for tag in item.tags))
+    return f"* {item.name} - {_format_prices(item)}" + (f" ({tags})" if tags else "")
+
+
+def answer_from_menu(index, question, lang="en"):
+    """
+    Answers price, diet, filter and opening-hours questions straight from the menu
+    index. Returns None when the question isn't clearly one of those, or says anything
+    else the router doesn't understand, so the caller can fall back to the LLM.
+    """
+    templates = TEMPLATES.get(lang, TEMPLATES["en"])
+    diet_words = DIET_WORDS.get(lang, DIET_WORDS["en"])
+    asked = _Question(question)
+    wants_price = asked.has(PRICE_WORDS)
+    wants_vegan = asked.has(VEGAN_WORDS)
+    wants_vegetarian = asked.has(VEGETARIAN_WORDS) and not wants_vegan
+    wants_hours = asked.has(HOURS_WORDS)
+    wants_time = asked.has(AVAILABLE_WORDS) or wants_hours
+    wants_under = asked.has(UNDER_WORDS)
+    wants_list = asked.has(FILTER_WORDS)
+    is_question = asked.has(DIET_QUESTION_WORDS)
+
+    mentions = index._mentions(asked.words)
+    for span, _ in mentions:
+        asked.used.update(span)
+    section = index.section_for(question)
+    if section:
+        asked.has(_phrases(*_normalize(section).split()))
+    if not asked.understood():
+        return None
+    if len(mentions) > 1:
+        # "2 samosas and a lassi": one templated answer would leave dishes out
+        return None
+    items = mentions[0][1] if mentions else []
+
+    if items:
+        # Exactly one thing asked about the dish: its price, its diet, or when it's served
+        if wants_price + bool(wants_vegan or wants_vegetarian) + wants_time != 1:
+            return None
+        if wants_price:
+            return "\n".join(
+                templates["price" if len(item.prices) == 1 else "price_variants"].format(
+                    name=item.name, prices=_format_prices(item)
+                )
+                for item in items
+            )
+        if (wants_vegan or wants_vegetarian) and is_question and len(items) == 1:
+            item = items[0]
+            diet = diet_words["vegan" if wants_vegan else "vegetarian"]
+            if (wants_vegan and item.is_vegan()) or (wants_vegetarian and item.is_vegetarian()):
+                return templates["diet_yes"].format(name=item.name, diet=diet)
+            if f"{'vegan' if wants_vegan else 'vegetarian'} option" in item.tags:
+                return templates["diet_option"].format(name=item.name, diet=diet)
+            if item.tags:
+                return templates["diet_no"].format(name=item.name, diet=diet)
+            return None
+        if wants_time and all(item.available_from for item in items):
+            return templates["available"].format(name=items[0].group or items[0].name, time=items[0].available_from)
+        return None
+
+    if section and wants_time and not (wants_price or wants_vegan or wants_vegetarian):
+        # "timings for the street food" means that section's hours, not the restaurant's
+        available = next((item.available_from for item in index.items if item.section == section), "")
+        return templates["available"].format(name=section, time=available) if available else None
+
+    if (wants_vegan or wants_vegetarian) and wants_list and not (wants_price or wants_time):
+        max_price = None
+        if wants_under:
+            amount = AMOUNT_RE.search(question)
+            if not amount:
+                return None
+            max_price = int(amount.group(1))
+        matches = index.filter(vegan=wants_vegan, vegetarian=wants_vegetarian, max_price=max_price, section=section)
+        filters = diet_words["vegan" if wants_vegan else "vegetarian"]
+        if section:
+            filters = f"{filters} {section}"
+        under = templates["under"].format(amount=max_price) if max_price is not None else ""
+        if not matches:
+            return templates["none"].format(filters=filters, under=under)
+        lines = [templates["list"].format(filters=filters, under=under)]
+        lines.extend(_format_item(item) for item in matches[:MAX_LISTED_ITEMS])
+        if len(matches) > MAX_LISTED_ITEMS:
+            lines.append(templates["more"].format(count=len(matches) - MAX_LISTED_ITEMS))
+        return "\n".join(lines)
+
+    if index.opening_hours and wants_hours and not section and not (wants_price or wants_vegan or wants_vegetarian):
+        opening, closing = index.opening_hours
+        return templates["hours"].format(open=opening, close=closing)
+
+    return None
@@ -0,0 +1,242 @@
+"""
+The external services the assistant depends on, behind small interfaces:
+
+    llm.stream(history, prompt) -> text chunks     llm.generate(prompt) -> text
+    embedder.embed(texts, task_type) -> vectors    (plus .model and .task_type)
+    stt.recognize(audio, language) -> text
+    tts.synthesize(text, lang) -> MP3 bytes        (plus .voice, part of the cache key)
+
+PROVIDERS=google uses Gemini, Google speech recognition and gTTS. PROVIDERS=fake swaps
+in deterministic local fakes with configurable latency, for benchmarks and load tests
+without network access.
+"""
+import hashlib
+import os
+import time
+import zlib
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+
+from speech import GTTS_BITRATE, TTS_VOICE, synthesize
+
+PROVIDERS = os.getenv("PROVIDERS", "google")
+GEMINI_MODEL = "gemini-1.5-flash"
+
+
+# Abstract, so a provider missing a method fails when it is constructed rather than mid-turn
+class LLMProvider(ABC):
+    model = ""
+
+    @abstractmethod
+    def stream(self, history, prompt):
+        """Yields the answer to `prompt` in chunks, after the `history` turns ({"role", "parts"})."""
+
+    @abstractmethod
+    def generate(self, prompt):
+        """The whole answer to `prompt` at once."""
+
+
+class EmbeddingProvider(ABC):
+    model = ""
+    task_type = "retrieval_document"  # used when called as a Chroma embedding function
+
+    @abstractmethod
+    def embed(self, texts, task_type):
+        """One vector per text, embedded for `task_type` ("retrieval_document", "retrieval_query", ...)."""
+
+    def __call__(self, input):
+        return self.embed(input, self.task_type)
+
+
+class STTProvider(ABC):
+    @abstractmethod
+    def recognize(self, audio, language="en-US"):
+        """The text spoken in `audio`."""
+
+
+class TTSProvider(ABC):
+    voice = ""
+
+    @abstractmethod
+    def synthesize(self, text, lang="en"):
+        """MP3 bytes of `text` spoken in `lang`."""
+
+
+class GeminiLLM(LLMProvider):
+    def __init__(self, model=GEMINI_MODEL):
+        import google.generativeai as genai
+
+        self.model = model
+        self._model = genai.GenerativeModel(model)
+
+    def stream(self, history, prompt):
+        chat = self._model.start_chat(history=history)
+        for chunk in chat.send_message(prompt, stream=True):
+            yield chunk.text
+
+    def generate(self, prompt):
+        return self._model.generate_content(prompt).text
+
+
+class GoogleSTT(STTProvider):
+    """Google Web Speech through SpeechRecognition; `audio` is an `sr.AudioData` or a speech_input.AudioClip."""
+
+    def __init__(self):
+        import speech_recognition as sr
+
+        self._sr = sr
+        self._recognizer = sr.Recognizer()
+
+    def recognize(self, audio, language="en-US"):
+        if not isinstance(audio, self._sr.AudioData):
+            audio = self._sr.AudioData(audio.get_raw_data(), audio.sample_rate, audio.sample_width)
+        return self._recognizer.recognize_google(audio, language=language)
+
+
+class GTTS(TTSProvider):
+    voice = TTS_VOICE
+
+    def synthesize(self, text, lang="en"):
+        return synthesize(text, lang)
+
+
+class FakeLLM(LLMProvider):
+    """
+    Streams a deterministic answer built from the words of the prompt: waits
+    `first_token_latency` seconds, then emits `chunk_words` words per chunk at
+    `words_per_sec`, with a sentence break every `sentence_words` words.
+    """
+
+    model = "fake-llm"
+
+    def __init__(self, first_token_latency=0.3, words_per_sec=60.0, chunk_words=4, answer_words=80, sentence_words=12):
+        self.first_token_latency = first_token_latency
+        self.words_per_sec = words_per_sec
+        self.chunk_words = chunk_words
+        self.answer_words = answer_words
+        self.sentence_words = sentence_words
+
+    def _answer_words(self, prompt):
+        source = prompt.split() or ["Hello"]
+        start = zlib.crc32(prompt.encode("utf-8")) % len(source)
+        words = []
+        for i in range(self.answer_words):
+            word = source[(start + i) % len(source)]
+            if (i + 1) % self.sentence_words == 0 or i + 1 == self.answer_words:
+                word = f"{word.rstrip('.?!')}."
+            words.append(word)
+        return words
+
+    def stream(self, history, prompt):
+        words = self._answer_words(prompt)
+        time.sleep(self.first_token_latency)
+        for i in range(0, len(words), self.chunk_words):
+            if i:
+                time.sleep(self.chunk_words / self.words_per_sec)
+            yield " ".join(words[i:i + self.chunk_words]) + " "
+
+    def generate(self, prompt):
+        time.sleep(self.first_token_latency + len(self._answer_words(prompt)) / self.words_per_sec)
+        return " ".join(self._answer_words(prompt))
+
+
+class FakeEmbedder(EmbeddingProvider):
+    """Hashed bag-of-words vectors, so similar texts still land near each other."""
+
+    def __init__(self, dim=256, latency=0.05, task_type="retrieval_document"):
+        self.dim = dim
+        self.latency = latency
+        self.task_type = task_type
+        self.model = f"fake-hash-{dim}"
+
+    def _vector(self, text):
+        vector = [0.0] * self.dim
+        for word in text.lower().split():
+            vector[zlib.crc32(word.strip(".,:;!?()*").encode("utf-8")) % self.dim] += 1.0
+        norm = sum(value * value for value in vector) ** 0.5 or 1.0
+        return [value / norm for value in vector]
+
+    def embed(self, texts, task_type):
+        time.sleep(self.latency)
+        return [self._vector(text) for text in texts]
+
+
+class FakeSTT(STTProvider):
+    """
+    Treats `audio` as UTF-8 text and returns it after `latency`. Real audio (an object
+    with `get_raw_data` and a sample rate) takes `seconds_per_audio_second` longer per
+    second of audio, like an upload to a recognizer would, and comes back as a
+    placeholder naming its length.
+    """
+
+    def __init__(self, latency=0.4, seconds_per_audio_second=0.0):
+        self.latency = latency
+        self.seconds_per_audio_second = seconds_per_audio_second
+
+    def recognize(self, audio, language="en-US"):
+        if hasattr(audio, "get_raw_data") and hasattr(audio, "sample_rate"):
+            seconds = len(audio.get_raw_data()) / (audio.sample_rate * audio.sample_width)
+            time.sleep(self.latency + seconds * self.seconds_per_audio_second)
+            return f"[{seconds:.1f} seconds of speech]"
+        time.sleep(self.latency)
+        return audio.decode("utf-8", errors="ignore") if isinstance(audio, bytes) else str(audio)
+
+
+class FakeTTS(TTSProvider):
+    """
+    Returns deterministic bytes sized like a gTTS clip of `text` (about 15 characters a
+    second of speech), after `latency` plus `seconds_per_char` for each character.
+    """
+
+    voice = "fake"
+
+    def __init__(self, latency=0.2, seconds_per_char=0.001):
+        self.latency = latency
+        self.seconds_per_char = seconds_per_char
+
+    def synthesize(self, text, lang="en"):
+        time.sleep(self.latency + len(text) * self.seconds_per_char)
+        digest = hashlib.sha256(f"{lang}\0{text}".encode("utf-8")).digest()
+        size = int(len(text) / 15 * GTTS_BITRATE / 8)
+        return (digest * (size // len(digest) + 1))[:max(size, len(digest))]
+
+
+@dataclass
+class Providers:
+    llm: LLMProvider
+    embedder: EmbeddingProvider
+    stt: STTProvider
+    tts: TTSProvider
+
+
+def _check_kind(kind):
+    if kind not in ("google", "fake"):
+        raise ValueError(f"Unknown PROVIDERS={kind!r}; expected 'google' or 'fake'")
+
+
+def load_stt(kind=PROVIDERS, **fake_options):
+    """Just the speech recognizer, for clients that only capture audio."""
+    _check_kind(kind)
+    return GoogleSTT() if kind == "google" else FakeSTT(**fake_options)
+
+
+def load_providers(kind=PROVIDERS, **fake_options):
+    """
+    Builds the providers for `kind` ("google" or "fake"). `fake_options` are passed to
+    the fakes by prefix, e.g. llm_first_token_latency=0.5 or tts_latency=0.1.
+    """
+    _check_kind(kind)
+    if kind == "google":
+        from embeddings import GeminiEmbeddingFunction
+
+        return Providers(llm=GeminiLLM(), embedder=GeminiEmbeddingFunction(), stt=GoogleSTT(), tts=GTTS())
+
+    def options(prefix):
+        return {key[len(prefix):]: value for key, value in fake_options.items() if key.startswith(prefix)}
+
+    return Providers(
+        llm=FakeLLM(**options("llm_")),
+        embedder=FakeEmbedder(**options("embedder_")),
+        stt=FakeSTT(**options("stt_")),
+        tts=FakeTTS(**options("tts_")),
+    )
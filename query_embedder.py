@@ -0,0 +1,98 @@
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+QUERY_CACHE_MAX_ENTRIES = int(os.getenv("QUERY_CACHE_MAX_ENTRIES", 2048))
+QUERY_BATCH_WINDOW = float(os.getenv("QUERY_BATCH_WINDOW", 0.01))
+QUERY_BATCH_MAX_SIZE = int(os.getenv("QUERY_BATCH_MAX_SIZE", 100))
+
+TRAILING_PUNCTUATION_RE = re.compile(r"[\s?!.।,]+$")
+
+
+def normalize_query(text):
+    """Lower-cases, collapses whitespace and drops trailing punctuation so trivial variants share a key."""
+    return TRAILING_PUNCTUATION_RE.sub("", " ".join(text.lower().split()))
+
+
+class QueryEmbedder:
+    """
+    Embeds user queries with the "retrieval_query" task type.
+
+    Results are kept in an in-process LRU keyed by (normalized text, language). Misses
+    from concurrent sessions that arrive within `batch_window` seconds of each other
+    are grouped into a single `embed` call: the first caller waits out the window and
+    embeds everything queued in the meantime on behalf of the others.
+    """
+
+    def __init__(self, embed_fn, max_entries=QUERY_CACHE_MAX_ENTRIES, batch_window=QUERY_BATCH_WINDOW,
+                 max_batch=QUERY_BATCH_MAX_SIZE, task_type="retrieval_query"):
+        self.embed_fn = embed_fn
+        self.max_entries = max_entries
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.task_type = task_type
+        self.hits = 0
+        self.misses = 0
+        self.batches = 0
+        self._cache = OrderedDict()
+        self._pending = OrderedDict()  # key -> (normalized text, Future)
+        self._flush_scheduled = False
+        self._lock = threading.Lock()
+
+    def embed(self, text, lang="en"):
+        normalized = normalize_query(text)
+        key = (normalized, lang)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return self._cache[key]
+            self.misses += 1
+            pending = self._pending.get(key)
+            if pending is None:
+                pending = (normalized, Future())
+                self._pending[key] = pending
+            leader = not self._flush_scheduled
+            self._flush_scheduled = True
+
+        if leader:
+            time.sleep(self.batch_window)
+            self._flush()
+        return pending[1].result()
+
+    def _flush(self):
+        with self._lock:
+            batch = list(self._pending.items())
+            self._pending.clear()
+            self._flush_scheduled = False
+
+        for start in range(0, len(batch), self.max_batch):
+            group = batch[start:start + self.max_batch]
+            try:
+                vectors = self.embed_fn.embed([normalized for _, (normalized, _) in group], self.task_type)
+            except Exception as e:
+                for _, (_, future) in group:
+                    future.set_exception(e)
+                continue
+            self.batches += 1
+            with self._lock:
+                for (key, _), vector in zip(group, vectors):
+                    self._cache[key] = vector
+                    self._cache.move_to_end(key)
+                while len(self._cache) > self.max_entries:
+                    self._cache.popitem(last=False)
+            for (_, (_, future)), vector in zip(group, vectors):
+                future.set_result(vector)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "batches": self.batches,
+            "entries": len(self._cache),
+        }
@@ -4,333 +4,64 @@ load_dotenv() ## loading all the environment variables
 
 import streamlit as st
 import os
-import google.generativeai as genai
-import chromadb
-from chromadb import Documents, EmbeddingFunction, Embeddings
-import time
-import tempfile
-import speech_recognition as sr
-from gtts import gTTS
-import re # NEW: Import the regular expression module
-
-# Configure Google Generative AI
+import re
+import uuid
+from functools import partial
+from chat_client import ChatAPIError, connect
+from telemetry import record, span
+from transcripts import TRANSCRIPT_WINDOW
+from streaming import StreamRenderer
+from speech import AudioPlayer, StreamingSpeaker
+
+# Google Generative AI is configured by the in-process assistant as it loads
 try:
-    genai.configure(api_key=st.secrets["GOOGLE_API_KEY"])
+    google_api_key = st.secrets["GOOGLE_API_KEY"]
 except AttributeError:
-    genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+    google_api_key = os.getenv("GOOGLE_API_KEY")
 except KeyError:
     st.error("API key not found. Please set GOOGLE_API_KEY in your .env file or Streamlit secrets.")
     st.stop()
 
 
-## Function to load Gemini Pro model and get responses
-model = genai.GenerativeModel("gemini-1.5-flash")
-chat = model.start_chat(history=[])
-
-def get_gemini_response(question, context=""):
-    # If context is provided, prepend it to the question
-    if context:
-        full_question = f"Based on the following information: {context}\n\nUser query: {question}"
-    else:
-        full_question = question
-    
-    response = chat.send_message(full_question, stream=True)
-    return response
-
-# Function to convert text to speech and play
-def text_to_speech(text, lang='en'):
-    if text:
-        try:
-            tts = gTTS(text=text, lang=lang)
-
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as fp:
-                temp_audio_path = fp.name
-                tts.save(temp_audio_path)
-            
-            st.audio(temp_audio_path, format="audio/mp3", start_time=0, autoplay=True)
-
-            time.sleep(0.5)
-            os.remove(temp_audio_path)
-
-        except Exception as e:
-            st.error(f"Error converting text to speech in '{lang}': {e}")
-            st.warning("Speech output might not auto-play or work if there's an internet issue or browser policy.")
-
-# NEW FUNCTION: To remove Markdown formatting from text
-def remove_markdown(text):
-    """
-    Removes common Markdown formatting symbols from a string.
-    """
-    # Remove bold and italics markers
-    text = re.sub(r'\*\*([^\*]+)\*\*', r'\1', text)  # **bold** -> bold
-    text = re.sub(r'\*([^\*]+)\*', r'\1', text)    # *italic* -> italic
-    text = re.sub(r'__([^_]+)__', r'\1', text)  # __bold__ -> bold
-    text = re.sub(r'_([^_]+)_', r'\1', text)    # _italic_ -> italic
-
-    # Remove headings (e.g., # Heading, ## Subheading)
-    text = re.sub(r'^\s*#+\s+', '', text, flags=re.MULTILINE)
-
-    # Remove list markers (e.g., - item, * item, + item)
-    text = re.sub(r'^\s*[-*+]\s+', '', text, flags=re.MULTILINE)
-
-    # Remove inline code blocks (e.g., `code`)
-    text = re.sub(r'`[^`]*`', '', text) 
-    
-    # Remove fenced code blocks (e.g., ```code```)
-    text = re.sub(r'```.*?```', '', text, flags=re.DOTALL)
-
-    # Remove links (keep the link text, remove the URL)
-    text = re.sub(r'\[(.*?)\]\(.*?\)', r'\1', text)
-
-    # Remove blockquotes (e.g., > Quote)
-    text = re.sub(r'^\s*>\s+', '', text, flags=re.MULTILINE)
-
-    # Replace multiple newlines with a single one, and trim leading/trailing whitespace
-    text = re.sub(r'\n\s*\n', '\n', text).strip()
-    
-    # Replace multiple spaces with a single space
-    text = re.sub(r'\s\s+', ' ', text)
-
-    return text
-
-
-# --- Restaurant Documents (KEEP THESE AS IS) ---
-# ... (your Document1 to Document11 content)
-Document1 = """Our restaurant is called "The Golden Spoon." We are located at 123 Main Street in Varanasi, Uttar Pradesh. You can reach us by phone at our landline 0542-6543210 or mobile at +91-9876543210. Our website is www.thegoldenspoon.com. We offer limited street parking. The main entrance and dining area are wheelchair accessible. We have a charming outdoor seating area during pleasant weather. We specialize in authentic North Indian cuisine with a modern twist, but also offer a wide range of international dishes. Ask us about our daily specials!"""
-
-Document2 = """Welcome to The Golden Spoon in Varanasi! We offer a diverse menu featuring the best of Indian, Chinese, Continental, South Indian, Italian, Mexican, American, Australian, and Korean cuisines, alongside a selection of popular Indian Street Food & Chaat. Our opening hours are from 11:00 AM to 11:00 PM daily. For reservations or inquiries, please call us at 0542-6543210 or +91-9876543210, or visit our website at www.thegoldenspoon.com.
-
-**Our Menu:**
-
-**Indian Delights:**
-* Srishti dum biyani(₹360) - Vegetarian 
-* Srishti do pyaza(₹360), Srishti handi chicken with laccha paratha(₹400) - Non-Vegetarian
-* Srishti paneer tikka masala(₹360) - Vegetarian
-* Samosa (2 Pcs - ₹80) - Vegetarian
-* Chole Bhature (₹180) - Vegetarian
-* Creamy Butter Chicken (₹380)
-* Rich Paneer Tikka Masala (₹350) - Vegetarian
-* Fragrant Chicken Biryani (₹420)
-* Aromatic Mutton Biryani (₹480)
-* Flavorful Vegetable Biryani (₹320) - Vegetarian, Vegan option available
-* Flavorful Dal Makhani (₹300) - Vegan option available upon request
-* Spicy Chana Masala (₹280) - Vegan
-* Goan Fish Curry (₹450)
-* Mutton Rogan Josh (₹480)
-* Prawn Malai Curry (₹520)
-* Mushroom Do Pyaza (₹320) - Vegetarian
-* Palak Paneer (Spinach with Cottage Cheese - ₹340) - Vegetarian
-* Aloo Gobi (Potato and Cauliflower Curry - ₹290) - Vegan
-* Baingan Bharta (Roasted Eggplant Mash - ₹300) - Vegan
-* Mix Vegetable Korma (₹310) - Vegetarian
-* Shahi Paneer (₹360) - Vegetarian
-* Naan (₹50), Garlic Naan (₹60), Butter Roti (₹35), Laccha Paratha (₹70)
-
-**Chinese Favorites:**
-* Chicken Manchurian (dry/gravy - ₹320)
-* Vegetable Fried Rice (₹250) - Vegan option available
-* Hakka Noodles (₹280) - Vegan option available
-* Schezwan Chicken (₹350)
-* Spring Rolls (Vegetable - ₹180 for 2, Chicken - ₹220 for 2) - Vegan option available for veg
-* Kung Pao Chicken (₹360)
-* Sweet and Sour Vegetables (₹290) - Vegan
-* Chilli Paneer Dry (₹300) - Vegetarian
-* Prawns in Hot Garlic Sauce (₹450)
-* Mushroom in Black Bean Sauce (₹330) - Vegan
-* Vegetable Manchurian Dry (₹280) - Vegan
-* **Chowmein Varieties:**
-    * Vegetable Chowmein (₹280) - Vegan option available
-    * Chicken Chowmein (₹300)
-    * Egg Chowmein (₹290)
-    * Mixed Chowmein (Chicken & Egg) (₹320)
-    * Paneer Chowmein (₹300) - Vegetarian
-
-**Continental Selection:**
-* Grilled Chicken with Mushroom Sauce (₹400)
-* Fish and Chips (₹380)
-* Shepherd's Pie (₹360)
-* Vegetable Au Gratin (₹320) - Vegetarian
-* Chicken Stroganoff (₹420)
-* Creamy Chicken Alfredo (₹400)
-* Pan-Seared Salmon with Lemon-Dill Sauce (₹550)
-* Roasted Vegetable Lasagna (₹390) - Vegetarian
-* Mushroom Risotto (₹380) - Vegetarian
-* Vegan Shepherd's Pie (Lentil and Vegetable - ₹360) - Vegan
-* Potato Wedges with Dip (₹180) - Vegetarian, Vegan
-
-**South Indian Specialties:**
-* **Idli with Sambar & Chutneys:**
-    * Plain Idli (2 Pcs) - ₹100 (Vegan)
-    * Fried Idli (2 Pcs) - ₹120 (Vegan)
-    * Podi Idli (2 Pcs) - ₹130 (Vegan)
-    * Rava Idli (2 Pcs) - ₹110 (Vegetarian)
-* **Dosa (served with Sambar & Chutneys):**
-    * Plain Dosa - ₹120 (Vegan)
-    * Masala Dosa (Potato filling) - ₹180 (Vegan)
-    * Paneer Dosa - ₹220 (Vegetarian)
-    * Rava Dosa (Crispy Semolina Dosa) - ₹160 (Vegan)
-    * Onion Rava Dosa - ₹180 (Vegan)
-    * Mysore Masala Dosa (Spicy Red Chutney, Potato filling) - ₹200 (Vegan)
-    * Cheese Dosa - ₹250 (Vegetarian)
-    * Ghee Roast Dosa - ₹150 (Vegetarian)
-    * Mushroom Dosa - ₹200 (Vegetarian)
-    * Paper Roast Dosa - ₹130 (Vegan)
-    * Set Dosa (Soft, spongy dosas, 2 pcs) - ₹150 (Vegan)
-* **Uttapam (Thick Savory Pancakes):**
-    * Plain Uttapam - ₹140 (Vegan)
-    * Onion Uttapam - ₹160 (Vegan)
-    * Tomato Uttapam - ₹160 (Vegan)
-    * Mixed Vegetable Uttapam - ₹180 (Vegan)
-    * Paneer Uttapam - ₹220 (Vegetarian)
-    * Corn Uttapam - ₹190 (Vegetarian)
-* Savory Vada (2 Pcs) - ₹100 (Vegan)
-* Tangy Pongal - ₹160 (Vegan)
-* South Indian Thali (Assortment of regional specialties) - ₹300 (Vegan option available)
-* Curd Rice - ₹150 (Vegetarian)
-* Lemon Rice - ₹160 (Vegan)
-* Vegetable Upma - ₹140 (Vegan)
-
-**Street Food & Chaat (Available from 4:00 PM onwards):**
-* **Golgappe / Pani Puri (6 Pcs):**
-    * Classic Golgappe - ₹80 (Vegan)
-    * Dahi Golgappe (with yogurt) - ₹100 (Vegetarian)
-* **Chaat Varieties:**
-    * Aloo Tikki Chaat (Potato patties with chutneys & yogurt) - ₹150 (Vegetarian)
-    * Papdi Chaat (Crispy fried dough with chutneys & yogurt) - ₹140 (Vegetarian)
-    * Dahi Bhalla (Lentil fritters in yogurt) - ₹160 (Vegetarian)
-    * Samosa Chaat - ₹130 (Vegetarian)
-    * Pav Bhaji (Mixed vegetable mash with buttered bun) - ₹200 (Vegetarian, Vegan option available)
-    * Vada Pav (Spiced potato fritter in a bun) - ₹100 (Vegetarian, Vegan option available)
-* Bhel Puri (Puffed rice salad) - ₹120 (Vegan)
-* Sev Puri (Crispy flatbread with toppings) - ₹130 (Vegetarian)
-
-**Italian Indulgence:**
-* Margherita Pizza (₹350 for 10 inch) - Vegan cheese option available
-* Creamy Alfredo Pasta (with chicken - ₹400, with vegetables - ₹350) - Vegan Alfredo option available
-* Spicy Arrabbiata Pasta (₹320) - Vegan
-* Cheesy Lasagna (₹450) - Vegetarian option available
-* Flavorful Mushroom Risotto (₹380) - Vegetarian
-* Garlic Bread (₹120 for 4 slices) - Vegan option available
-* Pepperoni Pizza (₹450 for 10 inch)
-* Spaghetti Carbonara (₹420)
-* Vegan Pizza with Roasted Vegetables (₹380 for 10 inch) - Vegan
-* Focaccia Bread with Herbs (₹150) - Vegan
-
-**Mexican Fiesta:**
-* Chicken Quesadilla (₹380)
-* Vegetable Burrito Bowl (₹320) - Vegan option available
-* Nachos with Salsa and Guacamole (₹280) - Vegan option available
-* Tacos (Chicken - ₹150, Paneer - ₹150, Mushroom & Bean - ₹140 per piece) - Vegan option for Mushroom & Bean
-* Enchiladas (Veg - ₹380, Chicken - ₹420) - Vegan option for veg
-* Fajita Platter (Sizzling Vegetables - ₹400, Chicken - ₹450) - Vegan option for veg
-
-**American Classics:**
-* Classic Beef Burger with Fries (₹450)
-* Crispy Chicken Burger (₹400)
-* BBQ Ribs (₹600)
-* Mac and Cheese (₹300) - Vegetarian
-* Caesar Salad with Grilled Chicken (₹350) - Vegan Caesar dressing option available
-* Pulled Pork Sandwich (₹480)
-* Vegan Black Bean Burger (₹380) - Vegan
-* Onion Rings (₹190) - Vegetarian, Vegan
-
-**Australian Outback:**
-* Australian Lamb Chops (₹700)
-* Barramundi Fillet with Roasted Vegetables (₹600)
-* Chicken Parma (₹480)
-* Pavlova (Dessert - ₹250) - Vegetarian
-* Vegan Lamingtons (₹180 for 2) - Vegan
-
-**Korean Delights:**
-* Kimchi Jjigae (Spicy Kimchi Stew with Tofu/Pork) - ₹400 (Vegetarian/Vegan option with Tofu)
-* Bibimbap (Mixed Rice with Vegetables & Egg/Meat) - ₹450 (Vegetarian/Vegan option available)
-* Korean Fried Chicken (Crispy Fried Chicken with Gochujang Sauce) - ₹480
-* Tteokbokki (Spicy Rice Cakes) - ₹350 (Vegetarian, Vegan option available)
-* Japchae (Stir-fried Glass Noodles with Vegetables) - ₹320 (Vegetarian, Vegan)
-* Bulgogi (Marinated Grilled Beef) - ₹550
-* Kimchi Pancake (Kimchi Jeon) - ₹280 (Vegetarian, Vegan)
-* Gyeran-jjim (Steamed Egg Custard) - ₹200 (Vegetarian)
-
-**Beverages:**
-* Soft Drinks (₹60), Fresh Juices (Orange, Watermelon, Pineapple - ₹80)
-* Lassi (Sweet/Salted - ₹90, Mango - ₹120, Rose - ₹100)
-* Masala Chai (₹50), Hot Coffee (₹70), Cold Coffee (₹90)
-* Fresh Lime Soda (₹80)
-* Vegan Milkshakes (Almond Milk Chocolate/Vanilla - ₹150)
-* Korean Barley Tea (Iced/Hot) - ₹90
-
-**Desserts:**
-* Gulab Jamun (₹80 for 2), Rasgulla (₹70 for 2)
-* Chocolate Lava Cake (₹200)
-* Ice Cream (Vanilla, Chocolate, Strawberry, Pista - ₹100 per scoop) - Vegan sorbet option available
-* Tiramisu (₹220) - Vegetarian
-* Fresh Fruit Platter (₹180) - Vegan
-* Kulfi (Mango, Pista - ₹120) - Vegetarian
-* Bingsu (Korean Shaved Ice Dessert - seasonal) - ₹300
-
-**Vegetarian & Vegan Options:** We have a wide array of delicious vegetarian and vegan options across all cuisines, clearly marked on our in-house and online menus. Look for the (V) for Vegetarian and (VG) for Vegan symbols on our menu, or ask your server for assistance.
-
-**Allergies:** Please inform your server of any dietary restrictions or allergies, and our staff will be happy to assist you. Enjoy your dining experience at The Golden Spoon! We appreciate your patronage."""
-
-Document3 = """Yes, we do offer home delivery within a 5-kilometer radius of our restaurant. You can place your order by calling us directly at +91-9876543210 (mobile) or our landline 0542-6543210. The minimum order for delivery is ₹300. Our delivery charges are ₹50 for orders below ₹500 and free for orders above ₹500. The estimated delivery time is typically 30-45 minutes, depending on the distance and order volume. You can customize most dishes; please specify your requests when placing your order (e.g., "no onions," "extra spicy," "vegan cheese"). We accept online payments (UPI, Net Banking, major credit/debit cards), credit/debit cards upon delivery, and cash on delivery. Gift cards can be redeemed for both dine-in and delivery orders. To inquire about the status of your delivery or to request a cancellation (within a reasonable timeframe before dispatch), please call us immediately at +91-9876543210."""
-
-Document4 = """Yes, we highly recommend making a reservation, especially during peak hours and weekends. You can make a reservation through our website at www.thegoldenspoon.com/reservations or by calling us at 0542-6543210 or +91-9876543210. The earliest reservation we typically take is for our opening time, and the latest is one hour before closing. You can reserve a table for up to 10 people online. For larger parties or special events, please call us directly. While we try our best to accommodate requests for specific tables, it cannot be guaranteed. The standard table reservation time is 1.5 to 2 hours, depending on the party size. To modify or cancel your reservation, please do so at least 2 hours in advance via our website or by phone."""
-
-Document5 = """Our goal is to provide a delicious and satisfying dining experience. We use fresh, flavorful, and quality ingredients in all our dishes. Our chefs ensure that each meal is well-cooked and presented beautifully. If, for any reason, you find your food to be undercooked, overcooked, bland, or not to your satisfaction, please inform your server immediately, and we will do our best to rectify the situation. We may offer a replacement dish, a discount on your current meal, or a complimentary item as compensation, depending on the issue. We strive for friendly, attentive, and efficient service. If you experience slow or rude service, please speak to your manager immediately so we can address it. We aim to create a cozy and comfortable ambiance with tasteful decor and background music. We believe our prices offer reasonable value for the quality of food and service provided. If you have any complaints or feedback regarding your overall experience, please don't hesitate to share it with our staff or leave a review on our website or other platforms."""
-
-Document6 = """We take dietary needs and allergies seriously. Please inform your server about any vegetarian, vegan, or gluten-free requirements or any specific allergies, such as nut, dairy, soy, or shellfish allergies. Our staff is trained to handle special requests and can guide you through the menu options that are suitable for you. We also have a separate allergen menu available upon request. While we take utmost precautions to avoid cross-contamination, please be aware that our kitchen handles various allergens. We aim for order accuracy and sincerely apologize if you receive a wrong order or a missing item. Please notify us immediately, and we will promptly correct your order. For delivery experiences, we strive for on-time delivery and ensure that food is properly packaged to maintain temperature and quality. If your delivery is late, or if you receive cold food or damaged packaging, please contact us at +91-9876543210, and we will address your concerns and may offer a partial refund or a complimentary item on your next order as a gesture of goodwill."""
-
-Document7 = """Our kitchen maintains a diverse stock of fresh produce, various meats (chicken, lamb, fish, prawns, beef), dairy products, plant-based alternatives (tofu, tempeh, vegan cheeses, almond milk), grains (rice, pasta), and a wide array of spices and beverages to ensure we can prepare all our menu items. We regularly monitor our stock levels to avoid running out of ingredients. We work with trusted local farmers and reputable suppliers to order and purchase high-quality ingredients, and we maintain detailed invoices for all purchases to ensure traceability. Our storage facilities include state-of-the-art refrigeration, freezers, and dry storage areas to maintain the freshness and quality of all our ingredients. We adhere to strict shelf life guidelines and manage our inventory through a 'first-in, first-out' system to minimize spoilage and waste through careful portion control and demand forecasting. We have a robust system in place for tracking our inventory, including regular counts and audits to ensure efficiency and freshness."""
-
-Document8 = """We continuously strive to streamline our processes for efficiency and enhance the customer experience. Our advanced order management system ensures quick processing and accurate fulfillment of both dine-in and delivery orders. Our kitchen utilizes a sophisticated kitchen display system (KDS) to optimize workflow, synchronize meal preparation, and ensure timely delivery of hot food. For table management, our seating arrangements are designed for optimal flow and comfort, and we use a modern reservation system to efficiently manage bookings and waitlists, reducing customer waiting times. We offer various convenient payment processing options, including secure online payments, contactless card payments through our point of sale (POS) system, and cash payments. Efficient internal and staff communication is crucial for smooth operations, facilitated by internal messaging systems and daily briefings. We are actively exploring opportunities for automation, such as automated online ordering, digital menus accessible via QR codes, and AI-powered customer service tools. Our overall workflow is designed with clear steps and seamless coordination among all team members, from kitchen staff to servers and management, ensuring a cohesive and efficient dining experience. We leverage technology and integrate various software platforms to enhance our operational efficiency and customer satisfaction."""
-
-Document9 = """We often have special offers and exciting promotions for our valued customers. Please check our website (www.thegoldenspoon.com/offers) or ask your server about our current deals and discounts, which might include seasonal specials or combo offers. We also have a popular happy hour from 5 PM to 7 PM daily, featuring discounted beverages and appetizers. Yes, we proudly host private events and offer extensive catering services for all occasions, from intimate gatherings to large corporate events. Our catering options are highly flexible and can be fully customized to suit your specific dietary needs, preferences, and budget. Please contact our dedicated events coordinator at +91-9876543210 or email events@thegoldenspoon.com for more details and a personalized quote. We actively encourage our customers to leave feedback and reviews on our website and popular platforms like Google Reviews, Zomato, and TripAdvisor. Your ratings and comments are incredibly important to us, and we continuously strive to improve our services and offerings based on customer feedback. We are currently developing an exclusive loyalty program to reward our regular customers with points for every visit, which can be redeemed for discounts, free meals, and special access to events. Stay tuned for more information on how to earn points and redeem your golden rewards!"""
-
-Document10 = """For specific allergen information about any dish, please ask your server, and they can provide you with detailed information from our comprehensive allergen menu. We are actively working on providing nutritional values for our menu items on our website soon, aiming for complete transparency. We are committed to sustainability and strive to minimize our environmental footprint by using eco-friendly packaging for our takeout and delivery orders whenever possible. We prioritize sourcing our ingredients locally whenever feasible to support local farmers, reduce our carbon footprint, and ensure the freshest produce for your meals. Our kitchen staff includes a team of highly experienced and passionate chefs who meticulously oversee the preparation of all dishes, ensuring quality and authenticity. Our friendly and attentive servers and waiters are here to provide excellent service at your table, ensuring a comfortable and enjoyable dining experience. Our welcoming hostess will greet you upon arrival and assist you with seating arrangements and any initial inquiries. The restaurant is managed by a dedicated team focused on ensuring a positive dining experience for every guest, from the moment you step in until you leave. Our skilled bartenders prepare a variety of refreshing beverages, from classic cocktails to freshly squeezed juices, at our well-stocked bar. Our kitchen is equipped with modern, high-efficiency equipment, including advanced ovens, precise stoves, efficient fryers, and a commercial dishwasher, all maintaining the highest standards of hygiene. We utilize a robust POS system for streamlined order taking and efficient payment processing, enhancing speed and accuracy."""
-
-Document11 = """We value your feedback immensely and are always looking to improve! If you had a great experience, we'd love for you to share your positive comments and leave a review on our website (www.thegoldenspoon.com/reviews) or on Google Reviews, Zomato, or TripAdvisor. Your positive comments help us grow, motivate our dedicated team, and spread the word about The Golden Spoon. If, for any reason, you are not satisfied with your food or service, please let us know immediately while you are at the restaurant, so we can rectify the situation on the spot. If you've already left, please call us at +91-9876543210 (mobile) or 0542-6543210 (landline) within 24 hours of your visit or delivery. We sincerely apologize if our food or service did not meet your expectations. Could you please tell us more about what specifically was not to your liking (e.g., taste, temperature, cooking level, specific service issue)? We take all feedback seriously and use it to enhance our offerings. As a token of our apology and commitment to your satisfaction, we would like to offer you a complimentary dessert on your next visit, a discount on your next home delivery order, or a gift voucher for a future meal, depending on the nature of the issue. Our aim is to ensure every customer has a truly golden and delightful dining experience with us."""
-
-
-documents = [Document1, Document2, Document3, Document4, Document5, Document6, Document7, Document8, Document9, Document10, Document11]
-
-
-# --- ChromaDB Setup ---
-class GeminiEmbeddingFunction(EmbeddingFunction):
-    document_mode = True
-
-    def __call__(self, input: Documents) -> Embeddings:
-        if self.document_mode:
-            embedding_task = "retrieval_document"
-        else:
-            embedding_task = "retrieval_query"
-
-        response = genai.embed_content(
-            model="models/text-embedding-004",
-            content=input,
-            task_type=embedding_task,
-        )
-        return response["embedding"]
-
-DB_NAME = "googlerestaurentdb"
-embed_fn = GeminiEmbeddingFunction()
-
-# Initialize ChromaDB client and get or create collection
-chroma_client = chromadb.Client()
-db = chroma_client.get_or_create_collection(name=DB_NAME, embedding_function=embed_fn)
-
-# Add documents to ChromaDB if not already present
-if db.count() == 0:
-    print("Adding documents to ChromaDB...")
-    db.add(documents=documents, ids=[f"doc{i}" for i in range(len(documents))])
-    print("Documents added.")
-else:
-    print("ChromaDB already populated.")
+# --- Chat Backend ---
+# Retrieval, answering and speech live in assistant.py. With CHAT_API_URL set this app is a
+# thin client of the chat API (api.py); otherwise the assistant runs in this process, and is
+# loaded (ChromaDB, the models, the knowledge base sync) in the background once per process
+# so the first page renders right away.
+@st.cache_resource
+def get_chat_client():
+    return connect(api_key=google_api_key, background=True)
+
+chat_client = get_chat_client()
+
+# Speech recognition runs where the microphone is, so it is not part of the chat client.
+# Recognition runs in a worker pool shared by all sessions, created the first time voice is used
+@st.cache_resource
+def get_transcriber():
+    from providers import load_stt
+    from speech_input import Transcriber
+
+    return Transcriber(load_stt())
+
+# --- Restaurant Selection ---
+# One backend serves every outlet. Kiosks link straight to theirs with ?tenant=<id>;
+# otherwise the guest can pick it in the sidebar
+@st.cache_data(ttl=60)
+def get_tenants():
+    return {tenant["id"]: tenant["name"] for tenant in chat_client.tenants()}
+
+tenant_names = get_tenants()
+if 'tenant' not in st.session_state:
+    requested_tenant = st.query_params.get("tenant")
+    st.session_state['tenant'] = requested_tenant if requested_tenant in tenant_names else next(iter(tenant_names))
+tenant = st.session_state['tenant']
+tenant_name = tenant_names.get(tenant, tenant)
 
 # --- Streamlit UI ---
-st.set_page_config(page_title="The Golden Spoon Chatbot", layout="centered", initial_sidebar_state="auto")
+st.set_page_config(page_title=f"{tenant_name} Chatbot", layout="centered", initial_sidebar_state="auto")
 
 # --- Title and Header ---
-st.title("✨ The Golden Spoon Chatbot")
+st.title(f"✨ {tenant_name} Chatbot")
 st.markdown("---") # A horizontal line for visual separation
 
 # --- Language Selection (NEW) ---
@@ -351,12 +82,92 @@ if language_options[selected_lang_name] != st.session_state['selected_language']
     st.session_state['selected_language'] = language_options[selected_lang_name]
     st.rerun()
 
+if len(tenant_names) > 1:
+    st.sidebar.subheader("Restaurant")
+    selected_tenant = st.sidebar.selectbox(
+        "Choose the restaurant:",
+        options=list(tenant_names),
+        index=list(tenant_names).index(tenant) if tenant in tenant_names else 0,
+        format_func=tenant_names.get,
+    )
+    if selected_tenant != tenant:
+        # Conversations are kept per restaurant, so the new one shows its own
+        st.session_state['tenant'] = selected_tenant
+        st.rerun()
+
+# --- Knowledge Base Readiness ---
+# Polls while the assistant loads, then reruns the page so the parts that need it appear
+@st.fragment(run_every=1.0)
+def show_loading():
+    readiness = chat_client.readiness()
+    if readiness["state"] != "loading":
+        st.rerun(scope="app")
+    st.info(f"Loading the knowledge base ({readiness['seconds']:.0f}s)... "
+            "You can already ask; the answer starts as soon as it's ready.")
+
+readiness = chat_client.readiness()
+if readiness["state"] == "failed":
+    st.error(f"The knowledge base failed to load: {readiness['error']}")
+    st.stop()
+if readiness["state"] == "loading":
+    show_loading()
+
+# --- Speech Cache and Retrieval Metrics ---
+# Shown once the assistant has loaded
+def show_backend_stats(backend_stats):
+    with st.sidebar.expander("Speech cache"):
+        speech_stats = backend_stats["speech_cache"]
+        st.metric("Hit ratio", f"{speech_stats['hit_ratio']:.0%}")
+        st.metric("Audio served from cache", f"{speech_stats['bytes_served'] / 1024:.0f} KB")
+        st.caption(f"{speech_stats['entries']} clips, {speech_stats['disk_bytes'] / 1024 / 1024:.1f} MB on disk")
+    with st.sidebar.expander("Retrieval"):
+        retrieval_stats = backend_stats["retrieval"]
+        st.metric("Answered without embedding the question", f"{retrieval_stats['embedding_skipped_ratio']:.0%}")
+        st.metric("Keyword index hit ratio", f"{retrieval_stats['lexical_hit_ratio']:.0%}")
+        st.caption(f"{retrieval_stats['queries']} questions: {retrieval_stats['lexical_fast_path']} by keyword only, "
+                   f"{retrieval_stats['hybrid']} keyword + vector, {retrieval_stats['vector_only']} vector only")
+    with st.sidebar.expander("Shared answers"):
+        coalescing_stats = backend_stats["llm_coalescing"]
+        st.metric("Gemini calls saved", coalescing_stats['coalesced'], help="Identical questions that joined an answer already streaming")
+        st.caption(f"{coalescing_stats['upstream_calls']} Gemini calls, {coalescing_stats['late_joins']} joined mid-answer, "
+                   f"{coalescing_stats['cancelled']} stopped early")
+
+if readiness["state"] == "ready":
+    show_backend_stats(chat_client.stats(tenant))
+
 # --- Chat History Initialization ---
-if 'chat_history' not in st.session_state:
-    st.session_state['chat_history'] = []
+if 'session_id' not in st.session_state:
+    # The conversation itself (bounded, summarized history) is kept by the assistant under this id.
+    # It is also in the URL, so reloading the page or reconnecting brings the conversation back
+    requested_session = st.query_params.get("session", "")
+    valid_session = re.fullmatch(r"[0-9a-f]{32}", requested_session)
+    st.session_state['session_id'] = requested_session if valid_session else uuid.uuid4().hex
+    st.query_params["session"] = st.session_state['session_id']
+
+def trim_chat_history():
+    # Only the newest `history_window` messages are kept and drawn; older ones stay in the transcript store
+    history = st.session_state['chat_history']
+    if len(history) > st.session_state['history_window']:
+        del history[:len(history) - st.session_state['history_window']]
+        st.session_state['history_complete'] = False
+
+if st.session_state.get('history_for') != (tenant, st.session_state['session_id']):
+    # Opening a conversation draws only its last TRANSCRIPT_WINDOW messages
+    messages = chat_client.history(st.session_state['session_id'], tenant, limit=TRANSCRIPT_WINDOW)
+    st.session_state['chat_history'] = [(message["role"].capitalize(), message["text"]) for message in messages]
+    st.session_state['history_window'] = TRANSCRIPT_WINDOW
+    st.session_state['history_complete'] = len(messages) < TRANSCRIPT_WINDOW
+    st.session_state['history_for'] = (tenant, st.session_state['session_id'])
 
 # --- Display Chat Messages ---
 st.subheader("Conversation")
+if not st.session_state['history_complete'] and st.button("Load older messages"):
+    older = chat_client.history(st.session_state['session_id'], tenant, limit=TRANSCRIPT_WINDOW,
+                                offset=len(st.session_state['chat_history']))
+    st.session_state['chat_history'][:0] = [(message["role"].capitalize(), message["text"]) for message in older]
+    st.session_state['history_window'] += TRANSCRIPT_WINDOW
+    st.session_state['history_complete'] = len(older) < TRANSCRIPT_WINDOW
+    st.rerun()
 for role, text in st.session_state['chat_history']:
     with st.chat_message(role.lower()):
         st.write(text)
@@ -369,34 +180,60 @@ text_input_placeholder = st.empty()
 
 with voice_input_placeholder.container():
     st.subheader("Input Options")
+    lang_code_for_sr = 'hi-IN' if st.session_state['selected_language'] == 'hi' else 'en-US'
+
+    def show_speech_error(error):
+        import speech_recognition as sr
+        from speech_input import NoSpeech
+
+        if isinstance(error, sr.UnknownValueError):
+            st.error("Sorry, I could not understand your audio. Please try again.")
+        elif isinstance(error, NoSpeech):
+            st.warning("No speech detected. Please speak clearly.")
+        elif isinstance(error, sr.RequestError):
+            st.error(f"Could not request results from Google Speech Recognition service; check your internet connection: {error}")
+        else:
+            st.error(f"An unexpected error occurred with speech recognition: {error}. "
+                     "Please ensure your microphone is connected and permissions are granted.")
+        st.session_state['temp_user_input'] = None
+
     if st.button("🎤 Speak Now"):
         with st.spinner("Listening..."):
             try:
-                r = sr.Recognizer()
-                with sr.Microphone() as source:
-                    r.adjust_for_ambient_noise(source)
+                # Loaded on first use, so text-only guests never import the speech stack
+                import speech_recognition as sr
+                from speech_input import STT_MICROPHONE_INDEX, CalibrationCache, calibrate, listen
+
+                transcriber = get_transcriber()
+                with sr.Microphone(device_index=STT_MICROPHONE_INDEX) as source:
+                    # The room's noise floor is measured once per session and microphone, not on every click
+                    calibration = st.session_state.setdefault('stt_calibration', CalibrationCache())
+                    threshold = calibration.get(STT_MICROPHONE_INDEX)
+                    with span("stt.calibrate", session_id=st.session_state['session_id'], cached=threshold is not None):
+                        if threshold is None:
+                            threshold = calibrate(source)
+                            calibration.put(STT_MICROPHONE_INDEX, threshold)
                     st.info(f"Say something in {selected_lang_name}!")
-                    audio = r.listen(source, timeout=5)
-                
-                lang_code_for_sr = 'hi-IN' if st.session_state['selected_language'] == 'hi' else 'en-US'
-                recognized_speech = r.recognize_google(audio, language=lang_code_for_sr)
-                st.session_state['temp_user_input'] = recognized_speech
-                
+                    # Stops as soon as the guest has been quiet for STT_ENDPOINT_SILENCE seconds
+                    with span("stt.listen", session_id=st.session_state['session_id']):
+                        audio = listen(source, threshold, timeout=5)
+
+                st.session_state['temp_user_input'] = transcriber.submit(audio, lang_code_for_sr).result()
                 st.rerun() 
 
-            except sr.UnknownValueError:
-                st.error("Sorry, I could not understand your audio. Please try again.")
-                st.session_state['temp_user_input'] = None
-            except sr.WaitTimeoutError:
-                st.warning("No speech detected. Please speak clearly.")
-                st.session_state['temp_user_input'] = None
-            except sr.RequestError as e:
-                st.error(f"Could not request results from Google Speech Recognition service; check your internet connection: {e}")
-                st.session_state['temp_user_input'] = None
             except Exception as e:
-                st.error(f"An unexpected error occurred with speech recognition: {e}. "
-                         "Please ensure your microphone is connected and permissions are granted.")
-                st.session_state['temp_user_input'] = None
+                show_speech_error(e)
+
+    # Recorded in the browser, so this also works when the app runs on a server without a microphone
+    recording = st.audio_input("Or record a voice message")
+    if recording is not None and recording.file_id != st.session_state.get('last_recording_id'):
+        st.session_state['last_recording_id'] = recording.file_id
+        with st.spinner("Transcribing..."):
+            try:
+                st.session_state['temp_user_input'] = get_transcriber().submit_wav(recording.getvalue(), lang_code_for_sr).result()
+                st.rerun()
+            except Exception as e:
+                show_speech_error(e)
 
 with text_input_placeholder.container():
     typed_user_input = st.chat_input("Or type your question here...", key="text_input_main")
@@ -409,40 +246,61 @@ if current_turn_user_input is None:
 
 if current_turn_user_input:
     st.session_state['chat_history'].append(("User", current_turn_user_input))
+    trim_chat_history()
 
     with st.chat_message("user"):
         st.write(current_turn_user_input)
 
-    embed_fn.document_mode = False 
-    result = db.query(query_texts=[current_turn_user_input], n_results=1)
-    
-    context_document = ""
-    if result["documents"] and result["documents"][0]:
-        context_document = result["documents"][0][0]
-
-    with st.chat_message("assistant"):
+    # One trace per turn; retrieval, the answer stream and each synthesized sentence nest under it.
+    # Errors aren't recorded on it because the turn ends with st.rerun()
+    turn_language = st.session_state['selected_language']
+    with st.chat_message("assistant"), span("turn", record_errors=False, session_id=st.session_state['session_id'],
+                                            language=turn_language, tenant=tenant) as turn_span:
         message_placeholder = st.empty()
-        full_response = ""
-        
-        language_instruction = ""
-        if st.session_state['selected_language'] == 'hi':
-            language_instruction = "कृपया हिन्दी में उत्तर दें। "
-        
-        for chunk in get_gemini_response(f"{language_instruction}{current_turn_user_input}", context_document):
-            full_response += chunk.text + " "
-            message_placeholder.write(full_response + "▌")
-            time.sleep(0.05)
-
-        final_assistant_response = full_response.strip()
-        message_placeholder.write(final_assistant_response)
+        audio_placeholder = st.empty()
+        # Chunks are buffered and the placeholder is redrawn at a capped frame rate
+        renderer = StreamRenderer(message_placeholder)
+
+        # --- Voice Output (Backend Logic) ---
+        # Chunks are normalized for speech as they stream in, and each sentence is synthesized
+        # while the answer is still streaming, then played in order
+        speaker = StreamingSpeaker(lang=st.session_state['selected_language'], synthesize_fn=partial(chat_client.tts, tenant=tenant))
+        player = AudioPlayer(audio_placeholder)
+
+        # Menu questions are answered from the menu index and repeated questions from the
+        # answer cache; everything else is streamed from Gemini with the retrieved context
+        try:
+            source, response_chunks = chat_client.chat(
+                st.session_state['session_id'], current_turn_user_input, st.session_state['selected_language'], tenant
+            )
+            turn_span.set_attribute("source", source)
+            with span("answer.stream", source=source):
+                for chunk_text in response_chunks:
+                    renderer.append(chunk_text)
+                    speaker.feed(chunk_text)
+                    player.play_ready(speaker)
+        except ChatAPIError as e:
+            st.error(f"The assistant is unavailable right now: {e}")
+            st.stop()
+
+        final_assistant_response = renderer.finish().strip()
+        turn_metrics = {**renderer.stats(), "source": source}
+        # Session ids stay on the spans only; as metric attributes they would explode cardinality
+        record("turn.ttft", turn_metrics["ttft"], language=turn_language, source=source)
+        record("turn.tokens_per_second", turn_metrics["tokens_per_sec"], language=turn_language, source=source)
         st.session_state['chat_history'].append(("Assistant", final_assistant_response))
-        
-        # --- Voice Output Trigger (Backend Logic) ---
-        # NEW: Clean the response before converting to speech
-        cleaned_response_for_speech = remove_markdown(final_assistant_response)
-        text_to_speech(cleaned_response_for_speech, lang=st.session_state['selected_language'])
+        trim_chat_history()
+
+        speaker.close()
+        player.drain(speaker)
+        record("turn.ttfa", speaker.first_audio_at, language=turn_language, source=source)
+        if speaker.errors:
+            st.error(f"Error converting text to speech in '{speaker.lang}': {speaker.errors[0]}")
+            st.warning("Speech output might not auto-play or work if there's an internet issue or browser policy.")
 
         if typed_user_input:
+            # Let the last sentence finish playing before the rerun removes the audio element
+            player.wait()
             st.rerun() 
 
 
@@ -450,5 +308,8 @@ if current_turn_user_input:
 if st.session_state['chat_history']:
     st.markdown("---")
     if st.button("Clear Chat History"):
-        st.session_state['chat_history'] = []
+        # The old transcript is kept for analytics; the guest continues under a new session id
+        chat_client.clear(st.session_state['session_id'], tenant)
+        st.session_state['session_id'] = uuid.uuid4().hex
+        st.query_params["session"] = st.session_state['session_id']
         st.rerun()
@@ -0,0 +1,162 @@
+import os
+import threading
+
+# Identical questions asked while an answer is still streaming share that answer's LLM call
+LLM_COALESCING = os.getenv("LLM_COALESCING", "1") not in ("0", "false", "no")
+
+
+class _Flight:
+    def __init__(self, start):
+        self.start = start  # () -> iterator of chunks, called by the first pull
+        self.upstream = None
+        self.chunks = []
+        self.subscribers = 0
+        self.pulling = False
+        self.done = False
+        self.error = None
+
+
+class Subscription:
+    """
+    One request's view of a shared stream. Iterating it yields every chunk from the
+    beginning; `joined` is True when the stream was started by another request.
+    """
+
+    def __init__(self, coalescer, key, start):
+        self.joined = False
+        self._chunks = coalescer._subscribe(self, key, start)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._chunks)
+
+    def close(self):
+        self._chunks.close()
+
+
+class StreamCoalescer:
+    """
+    Single-flight for streamed LLM answers. Requests with the same key while a stream is
+    in flight subscribe to it instead of starting their own: whichever subscriber is
+    ready pulls the next chunk from upstream and every subscriber reads it from a shared
+    buffer, so late joiners replay what was already streamed. A subscriber that stops
+    early only drops itself; the upstream is closed once nobody is left reading.
+    """
+
+    def __init__(self, enabled=LLM_COALESCING):
+        self.enabled = enabled
+        self.upstream_calls = 0
+        self.coalesced = 0
+        self.late_joins = 0
+        self.cancelled = 0
+        self.abandoned = 0
+        self._flights = {}  # key -> _Flight
+        self._cond = threading.Condition()
+
+    def stream(self, key, start):
+        """Chunks of the answer for `key`; `start()` opens the upstream stream if none is in flight."""
+        if not self.enabled:
+            key = object()  # never shared
+        return Subscription(self, key, start)
+
+    def _subscribe(self, subscription, key, start):
+        # Joining happens on first iteration, so a turn that is never streamed holds nothing
+        with self._cond:
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = self._flights[key] = _Flight(start)
+                self.upstream_calls += 1
+            else:
+                subscription.joined = True
+                self.coalesced += 1
+                if flight.chunks:
+                    self.late_joins += 1
+            flight.subscribers += 1
+
+        position = 0
+        try:
+            while True:
+                with self._cond:
+                    while True:
+                        if position < len(flight.chunks):
+                            chunk, pull = flight.chunks[position], False
+                            position += 1
+                            break
+                        if flight.error is not None:
+                            raise flight.error
+                        if flight.done:
+                            return
+                        if not flight.pulling:
+                            flight.pulling = pull = True
+                            break
+                        self._cond.wait()
+                if pull:
+                    # Outside the lock, so other subscribers keep reading the buffer meanwhile
+                    self._pull(key, flight)
+                else:
+                    yield chunk
+        finally:
+            self._leave(key, flight)
+
+    def _pull(self, key, flight):
+        try:
+            if flight.upstream is None:
+                flight.upstream = iter(flight.start())
+            chunk = next(flight.upstream)
+        except StopIteration:
+            self._finish(key, flight)
+        except Exception as e:
+            self._finish(key, flight, e)
+        except BaseException:
+            with self._cond:
+                flight.pulling = False
+                self._cond.notify_all()
+            raise
+        else:
+            with self._cond:
+                flight.chunks.append(chunk)
+                flight.pulling = False
+                self._cond.notify_all()
+
+    def _finish(self, key, flight, error=None):
+        with self._cond:
+            flight.done = True
+            flight.error = error
+            flight.pulling = False
+            # Requests from here on start a new stream (or hit the answer cache)
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+            self._cond.notify_all()
+
+    def _leave(self, key, flight):
+        with self._cond:
+            flight.subscribers -= 1
+            if flight.done:
+                return
+            self.cancelled += 1
+            if flight.subscribers:
+                return
+            self.abandoned += 1
+            flight.done = True
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+        if flight.upstream is not None:
+            close = getattr(flight.upstream, "close", None)
+            if close is not None:
+                close()
+
+    def stats(self):
+        requests = self.upstream_calls + self.coalesced
+        return {
+            "enabled": self.enabled,
+            "in_flight": len(self._flights),
+            "upstream_calls": self.upstream_calls,
+            # Each coalesced request is an LLM call saved
+            "coalesced": self.coalesced,
+            "late_joins": self.late_joins,
+            "cancelled": self.cancelled,
+            "abandoned": self.abandoned,
+            "saved_ratio": self.coalesced / requests if requests else 0.0,
+        }
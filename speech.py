@@ -0,0 +1,163 @@
+import io
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from speech_text import SpeechNormalizer
+from telemetry import bind, record, span
+
+TTS_WORKERS = int(os.getenv("TTS_WORKERS", 4))
+# Google Translate domain gTTS speaks through; it selects the accent (e.g. "co.in" for Indian English)
+TTS_TLD = os.getenv("TTS_TLD", "com")
+TTS_VOICE = f"gtts:{TTS_TLD}"
+# Shorter pieces are merged into the next sentence so list numbers and "Yes." don't become clips of their own
+MIN_SENTENCE_CHARS = int(os.getenv("MIN_SENTENCE_CHARS", 25))
+# gTTS returns 24 kHz mono MP3 at 32 kbit/s, which is enough to estimate clip length from its size
+GTTS_BITRATE = 32000
+
+# A terminator only ends a sentence once whitespace follows it, so "1.5" or "₹1,200." split correctly
+SENTENCE_BOUNDARY_RE = re.compile(r"(?<=[.?!।])\s+|\n+")
+
+_executor = ThreadPoolExecutor(max_workers=TTS_WORKERS, thread_name_prefix="tts")
+
+
+class SentenceSplitter:
+    """Cuts streamed text into sentences as soon as each one is complete."""
+
+    def __init__(self, min_chars=MIN_SENTENCE_CHARS):
+        self.min_chars = min_chars
+        self._buffer = ""
+
+    def feed(self, text):
+        self._buffer += text
+        parts = SENTENCE_BOUNDARY_RE.split(self._buffer)
+        # The last part may still be growing
+        self._buffer = parts.pop()
+        sentences, pending = [], ""
+        for part in parts:
+            pending = f"{pending} {part}".strip() if pending else part.strip()
+            if len(pending) >= self.min_chars:
+                sentences.append(pending)
+                pending = ""
+        if pending:
+            self._buffer = f"{pending} {self._buffer}"
+        return sentences
+
+    def flush(self):
+        rest, self._buffer = self._buffer.strip(), ""
+        return [rest] if rest else []
+
+
+def synthesize(text, lang="en"):
+    """Returns MP3 bytes for `text`, synthesized in memory."""
+    from gtts import gTTS
+
+    buffer = io.BytesIO()
+    gTTS(text=text, lang=lang, tld=TTS_TLD).write_to_fp(buffer)
+    return buffer.getvalue()
+
+
+def mp3_duration(audio):
+    return len(audio) * 8 / GTTS_BITRATE
+
+
+class StreamingSpeaker:
+    """
+    Sentence-pipelined text-to-speech. Streamed chunks are normalized for speech and
+    split into sentences as they arrive, and each sentence is synthesized in a worker
+    pool while the LLM keeps generating; finished clips are handed out strictly in
+    sentence order.
+    """
+
+    def __init__(self, lang="en", normalizer=None, synthesize_fn=synthesize):
+        self.lang = lang
+        self.normalizer = normalizer or SpeechNormalizer(lang)
+        self.synthesize_fn = synthesize_fn
+        self.errors = []
+        self._splitter = SentenceSplitter()
+        self._futures = []
+        self._next = 0
+        self.first_audio_at = None
+        self.started_at = time.perf_counter()
+
+    def _submit(self, sentences):
+        for sentence in sentences:
+            # Bound to the current trace so each clip's span nests under the turn
+            self._futures.append(_executor.submit(bind(self._synthesize), sentence))
+
+    def _synthesize(self, sentence):
+        with span("tts.synthesize", language=self.lang, chars=len(sentence)):
+            audio = self.synthesize_fn(sentence, self.lang)
+        record("tts.audio_bytes", len(audio), language=self.lang)
+        return audio
+
+    def feed(self, text):
+        text = self.normalizer.feed(text)
+        if text:
+            self._submit(self._splitter.feed(text))
+
+    def close(self):
+        sentences = self._splitter.feed(self.normalizer.flush())
+        self._submit(sentences + self._splitter.flush())
+
+    def _take(self, block):
+        while self._next < len(self._futures):
+            future = self._futures[self._next]
+            if not block and not future.done():
+                return None
+            self._next += 1
+            try:
+                audio = future.result()
+            except Exception as e:
+                self.errors.append(e)
+                continue
+            if self.first_audio_at is None:
+                self.first_audio_at = time.perf_counter() - self.started_at
+            return audio
+        return None
+
+    def next_ready(self):
+        """Returns the next clip in order if it has finished synthesizing, else None."""
+        return self._take(block=False)
+
+    def remaining(self):
+        """Yields the clips that haven't been handed out yet, waiting for each in order."""
+        while True:
+            audio = self._take(block=True)
+            if audio is None:
+                return
+            yield audio
+
+
+class AudioPlayer:
+    """
+    Plays clips one after another through a Streamlit placeholder. A new clip is only
+    started once the previous one should have finished, so clips don't overlap.
+    """
+
+    def __init__(self, placeholder):
+        self.placeholder = placeholder
+        self._busy_until = 0.0
+
+    def _play(self, audio):
+        self.placeholder.audio(audio, format="audio/mp3", autoplay=True)
+        self._busy_until = time.monotonic() + mp3_duration(audio)
+
+    def play_ready(self, speaker):
+        """Non-blocking: starts the next finished clip if nothing is playing."""
+        if time.monotonic() < self._busy_until:
+            return
+        audio = speaker.next_ready()
+        if audio is not None:
+            self._play(audio)
+
+    def wait(self):
+        """Blocks until the current clip should have finished playing."""
+        time.sleep(max(0.0, self._busy_until - time.monotonic()))
+
+    def drain(self, speaker):
+        """Plays every remaining clip in order, waiting for each to finish."""
+        for audio in speaker.remaining():
+            self.wait()
+            self._play(audio)
@@ -0,0 +1,268 @@
+"""
+Speech capture and recognition.
+
+Microphone capture calibrates the noise floor once per session and device (cached for
+STT_CALIBRATION_TTL seconds) instead of on every click, and ends the utterance with an
+energy voice-activity detector after STT_ENDPOINT_SILENCE seconds of silence.
+
+Recorded or uploaded audio (WAV bytes) goes through `Transcriber`, which trims leading
+and trailing silence with the same energy threshold (keeping pauses in between) and
+recognizes clips in a worker pool with any STTProvider (providers.py), so it runs
+offline with FakeSTT.
+"""
+import io
+import os
+import threading
+import time
+import wave
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from telemetry import bind, span
+
+# Seconds of silence that end an utterance (SpeechRecognition's listen() waits 0.8)
+STT_ENDPOINT_SILENCE = float(os.getenv("STT_ENDPOINT_SILENCE", 0.5))
+STT_MAX_PHRASE_SECONDS = float(os.getenv("STT_MAX_PHRASE_SECONDS", 15))
+STT_CALIBRATION_SECONDS = float(os.getenv("STT_CALIBRATION_SECONDS", 0.5))
+# A calibrated threshold is reused for this long before the room is measured again
+STT_CALIBRATION_TTL = float(os.getenv("STT_CALIBRATION_TTL", 600))
+STT_WORKERS = int(os.getenv("STT_WORKERS", 4))
+# Microphone device index for SpeechRecognition; empty uses the system default
+STT_MICROPHONE_INDEX = int(os.getenv("STT_MICROPHONE_INDEX")) if os.getenv("STT_MICROPHONE_INDEX") else None
+
+FRAME_SECONDS = 0.03
+# Speech must be this much louder than the noise floor
+ENERGY_RATIO = 3.0
+MIN_ENERGY = 100.0
+# Kept before the detected onset and after the last voiced frame, so word edges aren't clipped
+PRE_ROLL_SECONDS = 0.25
+TAIL_SECONDS = 0.1
+MIN_SPEECH_SECONDS = 0.09
+
+
+class NoSpeech(Exception):
+    """No speech was detected before the timeout, or the clip is silent."""
+
+
+class AudioClip:
+    """Mono PCM audio. Recognizers that need `sr.AudioData` can build it from the same fields."""
+
+    def __init__(self, pcm, sample_rate, sample_width=2):
+        if sample_width != 2:
+            raise ValueError("Only 16-bit PCM audio is supported")
+        self.pcm = pcm
+        self.sample_rate = sample_rate
+        self.sample_width = sample_width
+
+    @classmethod
+    def from_wav(cls, data):
+        with wave.open(io.BytesIO(data), "rb") as wav:
+            channels = wav.getnchannels()
+            sample_rate, sample_width = wav.getframerate(), wav.getsampwidth()
+            pcm = wav.readframes(wav.getnframes())
+        if sample_width != 2:
+            raise ValueError("Only 16-bit PCM WAV is supported")
+        if channels > 1:
+            # The first channel is enough for recognition
+            pcm = np.frombuffer(pcm, dtype="<i2")[::channels].tobytes()
+        return cls(pcm, sample_rate, sample_width)
+
+    def to_wav(self):
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(self.sample_width)
+            wav.setframerate(self.sample_rate)
+            wav.writeframes(self.pcm)
+        return buffer.getvalue()
+
+    def get_raw_data(self):
+        return self.pcm
+
+    @property
+    def duration(self):
+        return len(self.pcm) / (self.sample_rate * self.sample_width)
+
+    def frames(self, seconds=FRAME_SECONDS):
+        size = int(self.sample_rate * seconds) * self.sample_width
+        return [self.pcm[start:start + size] for start in range(0, len(self.pcm), size)]
+
+
+def energy(frame):
+    """RMS amplitude of a 16-bit PCM frame."""
+    samples = np.frombuffer(frame[:len(frame) - len(frame) % 2], dtype="<i2").astype(np.float32)
+    return float(np.sqrt(np.mean(samples * samples))) if samples.size else 0.0
+
+
+def threshold_from_noise(frames):
+    """Speech threshold for a stretch of background noise."""
+    noise = [energy(frame) for frame in frames]
+    return max(MIN_ENERGY, ENERGY_RATIO * float(np.median(noise))) if noise else MIN_ENERGY
+
+
+class Endpointer:
+    """
+    Energy voice-activity detector for a stream of PCM frames. Speech starts once frames
+    stay above `threshold` for MIN_SPEECH_SECONDS and ends after `silence` seconds below
+    it (or at `max_phrase` seconds); `clip()` returns the utterance with a little padding.
+    """
+
+    def __init__(self, sample_rate, threshold, silence=STT_ENDPOINT_SILENCE, max_phrase=STT_MAX_PHRASE_SECONDS,
+                 sample_width=2):
+        self.sample_rate = sample_rate
+        self.sample_width = sample_width
+        self.threshold = threshold
+        self.silence = silence
+        self.max_phrase = max_phrase
+        self.speech_start = None  # seconds into the stream
+        self.speech_end = None  # end of the last voiced frame
+        self.ended = False
+        self._position = 0.0
+        self._voiced_run = 0.0
+        self._frames = []  # (start seconds, frame)
+
+    def feed(self, frame):
+        """Adds a frame; returns True once the utterance is over."""
+        if self.ended:
+            return True
+        duration = len(frame) / (self.sample_rate * self.sample_width)
+        start, self._position = self._position, self._position + duration
+        self._frames.append((start, frame))
+        voiced = energy(frame) >= self.threshold
+
+        if self.speech_start is None:
+            self._voiced_run = self._voiced_run + duration if voiced else 0.0
+            if self._voiced_run >= MIN_SPEECH_SECONDS:
+                self.speech_start = self._position - self._voiced_run
+                self.speech_end = self._position
+            else:
+                # Only the pre-roll is needed until speech starts
+                while self._frames and self._frames[0][0] < self._position - PRE_ROLL_SECONDS - duration:
+                    self._frames.pop(0)
+            return False
+
+        if voiced:
+            self.speech_end = self._position
+        if self._position - self.speech_end >= self.silence or self._position - self.speech_start >= self.max_phrase:
+            self.ended = True
+        return self.ended
+
+    @property
+    def position(self):
+        return self._position
+
+    def clip(self):
+        if self.speech_start is None:
+            raise NoSpeech()
+        first, last = self.speech_start - PRE_ROLL_SECONDS, self.speech_end + TAIL_SECONDS
+        pcm = b"".join(frame for start, frame in self._frames if first <= start < last)
+        return AudioClip(pcm, self.sample_rate, self.sample_width)
+
+
+def _voiced_span(clip, frames, threshold):
+    """(start, end) seconds from the first run of speech to the last voiced frame, or None."""
+    rate = clip.sample_rate * clip.sample_width
+    position, run, first, last = 0.0, 0.0, None, None
+    for frame in frames:
+        duration = len(frame) / rate
+        position += duration
+        if energy(frame) < threshold:
+            run = 0.0
+            continue
+        run += duration
+        if first is None and run >= MIN_SPEECH_SECONDS:
+            first = position - run
+        if first is not None:
+            last = position
+    return (first, last) if first is not None else None
+
+
+def trim_silence(clip, threshold=None, floor=MIN_ENERGY):
+    """
+    A recorded clip without the silence before and after the speech; pauses inside it
+    are kept, unlike the live `Endpointer`, which stops at the first one. Without a
+    `threshold` the quietest frames of the recording stand in for calibration; a clip
+    with no silence in it is judged against `floor` (e.g. a session's calibrated
+    threshold) instead, so it is kept whole when every frame is above that.
+    """
+    frames = clip.frames()
+    if threshold is not None:
+        voiced = _voiced_span(clip, frames, threshold)
+    else:
+        quietest = sorted(frames, key=energy)[:max(1, len(frames) // 5)]
+        # All speech: its quietest frames are speech too, and the threshold measured on
+        # them is above every frame
+        voiced = _voiced_span(clip, frames, threshold_from_noise(quietest)) or _voiced_span(clip, frames, floor)
+    if voiced is None:
+        raise NoSpeech()
+    first = max(0, int((voiced[0] - PRE_ROLL_SECONDS) * clip.sample_rate)) * clip.sample_width
+    last = int((voiced[1] + TAIL_SECONDS) * clip.sample_rate) * clip.sample_width
+    return AudioClip(clip.pcm[first:last], clip.sample_rate, clip.sample_width)
+
+
+class CalibrationCache:
+    """Energy thresholds by key (e.g. session and microphone), expiring after `ttl` seconds."""
+
+    def __init__(self, ttl=STT_CALIBRATION_TTL):
+        self.ttl = ttl
+        self._thresholds = {}  # key -> (threshold, measured at)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._thresholds.get(key)
+            if entry is None or time.monotonic() - entry[1] > self.ttl:
+                return None
+            return entry[0]
+
+    def put(self, key, threshold):
+        with self._lock:
+            self._thresholds[key] = (threshold, time.monotonic())
+
+
+def calibrate(source, seconds=STT_CALIBRATION_SECONDS):
+    """Measures the background noise of an open `sr.Microphone` and returns a speech threshold."""
+    frames = []
+    for _ in range(max(1, int(seconds * source.SAMPLE_RATE / source.CHUNK))):
+        frames.append(source.stream.read(source.CHUNK))
+    return threshold_from_noise(frames)
+
+
+def listen(source, threshold, timeout=5, silence=STT_ENDPOINT_SILENCE, max_phrase=STT_MAX_PHRASE_SECONDS):
+    """
+    Records one utterance from an open `sr.Microphone`, stopping `silence` seconds after
+    speech ends. Raises NoSpeech if nobody speaks within `timeout` seconds.
+    """
+    if source.SAMPLE_WIDTH != 2:
+        raise ValueError("Only 16-bit microphones are supported")
+    endpointer = Endpointer(source.SAMPLE_RATE, threshold, silence=silence, max_phrase=max_phrase)
+    while not endpointer.feed(source.stream.read(source.CHUNK)):
+        if endpointer.speech_start is None and endpointer.position >= timeout:
+            raise NoSpeech()
+    return endpointer.clip()
+
+
+class Transcriber:
+    """
+    Recognizes recorded clips in a worker pool with an STTProvider. WAV uploads are
+    trimmed to the spoken part first, so less audio is sent to the recognizer.
+    """
+
+    def __init__(self, recognizer, workers=STT_WORKERS):
+        self.recognizer = recognizer
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="stt")
+
+    def _recognize(self, clip, language):
+        with span("stt.recognize", language=language, audio_seconds=round(clip.duration, 2)):
+            return self.recognizer.recognize(clip, language=language)
+
+    def submit(self, clip, language="en-US"):
+        """Returns a Future with the text of `clip` (an AudioClip or `sr.AudioData`)."""
+        return self._executor.submit(bind(self._recognize), clip, language)
+
+    def submit_wav(self, data, language="en-US"):
+        """Like `submit` for WAV bytes (e.g. from `st.audio_input`); raises NoSpeech for silent recordings."""
+        with span("stt.trim"):
+            clip = trim_silence(AudioClip.from_wav(data))
+        return self.submit(clip, language)
@@ -0,0 +1,163 @@
+import re
+
+# Text held back waiting for a closing marker is released anyway past this size
+MAX_HOLD_CHARS = 1000
+
+# One alternation, tried left to right at each position. Fenced blocks come before
+# inline code, and line-start markers before italics, so "* item" is a list marker
+# and "```code```" is not eaten as two inline spans.
+SPEECH_RE = re.compile(
+    # The lookahead rejects ordinary letters with one check instead of trying every branch
+    r"(?=[`*_\[#>+\-₹\d\s])(?:"
+    r"(?P<fence>(?s:```.*?```))"
+    r"|(?P<code>`[^`\n]*`)"
+    r"|\[(?P<link>[^\]\n]*)\]\([^)\n]*\)"
+    r"|\*\*(?P<bold>[^*\n]+)\*\*"
+    r"|__(?P<ubold>[^_\n]+)__"
+    r"|(?m:^)[ \t]*(?P<prefix>\#{1,6}[ \t]+|[-*+][ \t]+|>[ \t]?)"
+    r"|\*(?P<italic>[^*\n]+)\*"
+    r"|(?<!\w)_(?P<uitalic>[^_\n]+)_(?!\w)"
+    r"|₹[ \t]?(?P<rupees>\d[\d,]*(?:\.\d+)?)"
+    r"|(?P<phone>(?<![\w₹])\+?\d[\d \-]{8,}\d(?!\w))"
+    r"|(?P<pieces>\d+)[ \t]*(?:pcs|pc|pieces)\b"
+    r"|(?P<blank>\n\s*\n)"
+    r"|(?P<spaces>[ \t]{2,}))",
+    re.IGNORECASE,
+)
+WHITESPACE_RE = re.compile(r"\s")
+LIST_MARKER_RE = re.compile(r"(?m)^[ \t]*\*[ \t]")
+# A number can still grow into a price, a phone number or "2 Pcs", and trailing
+# whitespace can still become a line-start marker, so neither is released early
+HELD_TAIL_RE = re.compile(r"(?:₹?[ \t]?\+?\d[\d ,.\-]*|₹|\s+|(?m:^)[ \t]*(?:\#{1,6}|[-*+>]))$")
+
+SPOKEN = {
+    "en": {"rupee": "rupee", "rupees": "rupees", "piece": "piece", "pieces": "pieces", "plus": "plus"},
+    "hi": {"rupee": "रुपया", "rupees": "रुपये", "piece": "पीस", "pieces": "पीस", "plus": "प्लस"},
+}
+
+
+def _spell_phone(number, words):
+    digits = re.sub(r"\D", "", number)
+    if len(digits) < 10:
+        return None
+    groups = []
+    for group in re.split(r"[ \-]+", number.lstrip("+")):
+        # Long runs are read as two halves, the way people say mobile numbers
+        while len(group) > 5:
+            groups.append(group[:5])
+            group = group[5:]
+        if group:
+            groups.append(group)
+    spoken = ", ".join(" ".join(group) for group in groups)
+    return f"{words['plus']} {spoken}" if number.startswith("+") else spoken
+
+
+def _replace(match, lang):
+    words = SPOKEN.get(lang, SPOKEN["en"])
+    kind = match.lastgroup
+    value = match.group(kind)
+    if kind in ("fence", "code", "prefix"):
+        return ""
+    if kind in ("link", "bold", "ubold", "italic", "uitalic"):
+        return normalize_for_speech(value, lang)
+    if kind == "rupees":
+        amount = value.replace(",", "")
+        return f"{amount} {words['rupee'] if amount == '1' else words['rupees']}"
+    if kind == "phone":
+        return _spell_phone(value, words) or value
+    if kind == "pieces":
+        return f"{value} {words['piece'] if value == '1' else words['pieces']}"
+    if kind == "blank":
+        return "\n"
+    return " "
+
+
+def _normalize_span(text, lang, pos, endpos):
+    # finditer with pos keeps the text before pos visible to ^ and lookbehinds
+    out, last = [], pos
+    for match in SPEECH_RE.finditer(text, pos, endpos):
+        out.append(text[last:match.start()])
+        out.append(_replace(match, lang))
+        last = match.end()
+    out.append(text[last:endpos])
+    return "".join(out)
+
+
+def normalize_for_speech(text, lang="en"):
+    """
+    Strips Markdown and expands speech-unfriendly tokens ("₹360", phone numbers,
+    "2 Pcs") into their spoken form in a single pass over `text`.
+    """
+    return _normalize_span(text, lang, 0, len(text))
+
+
+def _unbalanced_start(segment):
+    """Returns the index where an unterminated construct opens in `segment`, or None."""
+    if segment.count("```") % 2:
+        return segment.rfind("```")
+    if segment.replace("```", "").count("`") % 2:
+        return segment.rfind("`")
+    for marker in ("**", "__"):
+        if segment.count(marker) % 2:
+            return segment.rfind(marker)
+    opening = segment.rfind("[")
+    if opening != -1 and ")" not in segment[opening:]:
+        return opening
+    singles = LIST_MARKER_RE.sub("", segment).replace("**", "")
+    if singles.count("*") % 2:
+        return segment.rfind("*")
+    return None
+
+
+class SpeechNormalizer:
+    """
+    Incremental version of `normalize_for_speech` for streamed chunks. Each `feed`
+    returns the normalized text that is safe to speak so far, holding back only the
+    ambiguous tail: a word or number that may still be growing, an open `**` or
+    backtick, or an unterminated link.
+    """
+
+    def __init__(self, lang="en"):
+        self.lang = lang
+        self._buffer = ""  # the current line, including text already emitted
+        self._pos = 0  # where the unemitted text starts in _buffer
+        self._started = False
+
+    def _emit(self, end):
+        out = _normalize_span(self._buffer, self.lang, self._pos, end)
+        self._pos = end
+        # Keep the current line as context so line-start markers are still recognised
+        trim = self._buffer.rfind("\n", 0, end) + 1
+        if not trim and self._pos > MAX_HOLD_CHARS:
+            trim = self._pos - 1
+        self._buffer, self._pos = self._buffer[trim:], self._pos - trim
+        if not self._started:
+            out = out.lstrip()
+            self._started = bool(out)
+        return out
+
+    def feed(self, chunk):
+        self._buffer += chunk
+        # Without new whitespace the boundary can't move, most token-sized chunks stop here
+        if not WHITESPACE_RE.search(chunk) and len(self._buffer) - self._pos <= MAX_HOLD_CHARS:
+            return ""
+        # Stop before the trailing word and the whitespace in front of it; both may still grow
+        end = len(self._buffer.rstrip())
+        end = max(self._buffer.rfind(" ", self._pos, end), self._buffer.rfind("\n", self._pos, end))
+        while end > self._pos:
+            segment = self._buffer[self._pos:end]
+            start = _unbalanced_start(segment)
+            if start is None:
+                tail = HELD_TAIL_RE.search(segment, max(0, len(segment) - 64))
+                if tail is None:
+                    break
+                start = tail.start()
+            end = self._pos + start
+        if end <= self._pos:
+            if len(self._buffer) - self._pos <= MAX_HOLD_CHARS:
+                return ""
+            end = len(self._buffer)
+        return self._emit(end)
+
+    def flush(self):
+        return self._emit(len(self._buffer)).rstrip()
@@ -0,0 +1,65 @@
+import os
+import time
+
+from chunking import estimate_tokens
+
+STREAM_RENDER_FPS = float(os.getenv("STREAM_RENDER_FPS", 15))
+
+
+class StreamRenderer:
+    """
+    Renders a streamed answer into a Streamlit placeholder. Chunks are appended to a
+    buffer as they arrive and the placeholder is redrawn at most `fps` times a second,
+    so long answers don't cost one full redraw per chunk. Also measures time to first
+    token and tokens per second for the turn.
+    """
+
+    def __init__(self, placeholder, fps=STREAM_RENDER_FPS, cursor="▌"):
+        self.placeholder = placeholder
+        self.interval = 1.0 / fps if fps > 0 else 0.0
+        self.cursor = cursor
+        self.chunks = 0
+        self._text = ""
+        self._pending = []
+        self._started = time.perf_counter()
+        self._first_token = None
+        self._last_render = 0.0
+        self._finished = None
+
+    @property
+    def text(self):
+        if self._pending:
+            self._text += "".join(self._pending)
+            self._pending = []
+        return self._text
+
+    def append(self, chunk):
+        if not chunk:
+            return
+        now = time.perf_counter()
+        if self._first_token is None:
+            self._first_token = now
+        self._pending.append(chunk)
+        self.chunks += 1
+        if now - self._last_render >= self.interval:
+            self.placeholder.write(self.text + self.cursor)
+            self._last_render = now
+
+    def finish(self):
+        """Draws the final text without the cursor and returns it."""
+        self._finished = time.perf_counter()
+        self.placeholder.write(self.text)
+        return self._text
+
+    def stats(self):
+        end = self._finished or time.perf_counter()
+        tokens = estimate_tokens(self.text) if self._text else 0
+        ttft = (self._first_token - self._started) if self._first_token else None
+        generation = end - self._first_token if self._first_token else 0.0
+        return {
+            "ttft": ttft,
+            "total": end - self._started,
+            "tokens": tokens,
+            "tokens_per_sec": tokens / generation if generation > 0 else None,
+            "chunks": self.chunks,
+        }
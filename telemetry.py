@@ -0,0 +1,158 @@
+"""
+Tracing and latency metrics for the voice turn, on OpenTelemetry.
+
+TELEMETRY selects where they go:
+    off      (default) no-op; `span` returns a shared dummy and OpenTelemetry isn't imported
+    console  spans and metrics printed to stdout
+    file     one JSON object per line in TELEMETRY_FILE, for offline analysis
+    otlp     an OTLP collector (configured with the usual OTEL_EXPORTER_OTLP_* variables)
+"""
+import atexit
+import os
+
+TELEMETRY = os.getenv("TELEMETRY", "off")
+TELEMETRY_FILE = os.getenv("TELEMETRY_FILE", os.path.join(".cache", "telemetry.jsonl"))
+# Seconds between metric exports
+TELEMETRY_EXPORT_INTERVAL = float(os.getenv("TELEMETRY_EXPORT_INTERVAL", 10))
+SERVICE_NAME = "restaurant-assistant"
+
+# name -> (unit, description)
+HISTOGRAMS = {
+    "turn.ttft": ("s", "Time from the question to the first answer chunk"),
+    "turn.ttfa": ("s", "Time from the question to the first playable audio clip"),
+    "turn.tokens_per_second": ("{token}/s", "Answer streaming rate after the first chunk"),
+    "retrieval.context_tokens": ("{token}", "Approximate size of the packed context sent to the LLM"),
+    "llm.prompt_tokens": ("{token}", "Approximate prompt size, history included"),
+    "tts.audio_bytes": ("By", "Size of each synthesized clip"),
+}
+
+
+class _NoopSpan:
+    def set_attribute(self, key, value):
+        pass
+
+    def set_attributes(self, attributes):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Telemetry:
+    def __init__(self, mode=TELEMETRY, path=TELEMETRY_FILE, export_interval=TELEMETRY_EXPORT_INTERVAL):
+        self.mode = mode
+        self.enabled = mode != "off"
+        if not self.enabled:
+            return
+
+        from opentelemetry import context, metrics, trace
+        from opentelemetry.sdk.metrics import MeterProvider
+        from opentelemetry.sdk.metrics.export import ConsoleMetricExporter, PeriodicExportingMetricReader
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+
+        if mode == "console":
+            span_exporter, metric_exporter = ConsoleSpanExporter(), ConsoleMetricExporter()
+        elif mode == "file":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._file = open(path, "a", encoding="utf-8")
+            span_exporter = ConsoleSpanExporter(
+                out=self._file, formatter=lambda span: span.to_json(indent=None) + "\n"
+            )
+            metric_exporter = ConsoleMetricExporter(
+                out=self._file, formatter=lambda data: data.to_json(indent=None) + "\n"
+            )
+        elif mode == "otlp":
+            from opentelemetry.exporter.otlp.proto.grpc.metric_exporter import OTLPMetricExporter
+            from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+
+            span_exporter, metric_exporter = OTLPSpanExporter(), OTLPMetricExporter()
+        else:
+            raise ValueError(f"Unknown TELEMETRY={mode!r}; expected off, console, file or otlp")
+
+        resource = Resource.create({"service.name": SERVICE_NAME})
+        self._tracer_provider = TracerProvider(resource=resource)
+        # Spans are exported from a background thread, off the turn's critical path
+        self._tracer_provider.add_span_processor(BatchSpanProcessor(span_exporter))
+        self._meter_provider = MeterProvider(
+            resource=resource,
+            metric_readers=[PeriodicExportingMetricReader(metric_exporter, export_interval_millis=export_interval * 1000)],
+        )
+        trace.set_tracer_provider(self._tracer_provider)
+        metrics.set_meter_provider(self._meter_provider)
+
+        self._context = context
+        self._tracer = self._tracer_provider.get_tracer(SERVICE_NAME)
+        meter = self._meter_provider.get_meter(SERVICE_NAME)
+        self._histograms = {
+            name: meter.create_histogram(name, unit=unit, description=description)
+            for name, (unit, description) in HISTOGRAMS.items()
+        }
+        atexit.register(self.shutdown)
+
+    def span(self, name, record_errors=True, **attributes):
+        """
+        Context manager for a span that is the current span inside the block. Pass
+        record_errors=False for blocks that end in control-flow exceptions (st.rerun).
+        """
+        if not self.enabled:
+            return _NOOP_SPAN
+        return self._tracer.start_as_current_span(
+            name,
+            attributes={key: value for key, value in attributes.items() if value is not None},
+            record_exception=record_errors,
+            set_status_on_exception=record_errors,
+        )
+
+    def record(self, name, value, **attributes):
+        if self.enabled and value is not None:
+            self._histograms[name].record(value, attributes)
+
+    def bind(self, fn):
+        """Wraps `fn` to run inside the current trace context, for work handed to other threads."""
+        if not self.enabled:
+            return fn
+        captured = self._context.get_current()
+
+        def bound(*args, **kwargs):
+            token = self._context.attach(captured)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self._context.detach(token)
+
+        return bound
+
+    def shutdown(self):
+        if self.enabled:
+            self._tracer_provider.shutdown()
+            self._meter_provider.shutdown()
+
+
+_telemetry = None
+
+
+def get_telemetry():
+    global _telemetry
+    if _telemetry is None:
+        _telemetry = Telemetry()
+    return _telemetry
+
+
+def span(name, record_errors=True, **attributes):
+    return get_telemetry().span(name, record_errors=record_errors, **attributes)
+
+
+def record(name, value, **attributes):
+    get_telemetry().record(name, value, **attributes)
+
+
+def bind(fn):
+    return get_telemetry().bind(fn)
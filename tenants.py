@@ -0,0 +1,280 @@
+"""
+One process serving many restaurants. Each tenant has its own vector collection (Chroma,
+or vector_index.py with VECTOR_BACKEND=numpy), menu index, query-embedding LRU and
+answer cache, and its entries in the shared embedding and speech caches are namespaced
+by tenant id, so nothing cached for one restaurant is ever served to another.
+
+The built-in knowledge base (knowledge_base.py) is DEFAULT_TENANT. Other tenants are
+directories under TENANTS_DIR:
+
+    tenants/<tenant id>/tenant.json   optional, {"name": "..."}
+    tenants/<tenant id>/menu.md       optional, parsed for instant price/diet/hours answers
+    tenants/<tenant id>/*.md, *.txt   the knowledge base
+
+Tenants are loaded on first use and kept in an LRU of at most TENANTS_MAX_LOADED; an
+evicted tenant reloads from its persistent collection, which only re-embeds documents
+that changed.
+"""
+import json
+import os
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures import Future
+
+from answer_cache import SemanticAnswerCache, context_version
+from chunking import CONTEXT_TOKEN_BUDGET, CONTEXT_TOP_K, chunk_document, estimate_tokens, pack_context
+from kb_index import manifest_path_for, sync_collection
+from lexical_index import LexicalIndex, fuse_results, is_decisive
+from menu_index import parse_menu
+from query_embedder import QueryEmbedder
+from single_flight import StreamCoalescer
+from telemetry import record, span
+
+DB_NAME = "googlerestaurentdb"
+DEFAULT_TENANT = os.getenv("DEFAULT_TENANT", "golden-spoon")
+DEFAULT_TENANT_NAME = "The Golden Spoon"
+TENANTS_DIR = os.getenv("TENANTS_DIR", "tenants")
+# Tenants kept loaded; the least recently used is dropped first
+TENANTS_MAX_LOADED = int(os.getenv("TENANTS_MAX_LOADED", 16))
+TENANT_FILE_EXTENSIONS = (".md", ".txt")
+MENU_FILES = ("menu.md", "menu.txt")
+
+# Also keeps tenant ids safe as directory and Chroma collection names
+# Starts and ends alphanumeric, as Chroma requires of the collection name built from it
+TENANT_ID_RE = re.compile(r"^[a-z0-9](?:[a-z0-9_-]{0,46}[a-z0-9])?$")
+
+
+class UnknownTenant(KeyError):
+    pass
+
+
+def collection_name(tenant_id):
+    # The default tenant keeps the collection (and manifest) it had before tenancy
+    return DB_NAME if tenant_id == DEFAULT_TENANT else f"{DB_NAME}-{tenant_id}"
+
+
+def cache_namespace(tenant_id):
+    # Likewise its embedding and speech cache entries stay valid
+    return "" if tenant_id == DEFAULT_TENANT else tenant_id
+
+
+def _settings(directory):
+    try:
+        with open(os.path.join(directory, "tenant.json"), encoding="utf-8") as fp:
+            return json.load(fp)
+    except FileNotFoundError:
+        return {}
+
+
+def list_tenants(root=TENANTS_DIR):
+    """[{"id", "name"}] for every tenant, without loading any of them."""
+    tenants = [{"id": DEFAULT_TENANT, "name": DEFAULT_TENANT_NAME}]
+    if os.path.isdir(root):
+        for entry in sorted(os.scandir(root), key=lambda entry: entry.name):
+            if entry.is_dir() and TENANT_ID_RE.match(entry.name) and entry.name != DEFAULT_TENANT:
+                tenants.append({"id": entry.name, "name": _settings(entry.path).get("name", entry.name)})
+    return tenants
+
+
+def load_tenant_source(tenant_id, root=TENANTS_DIR):
+    """Returns {"name", "documents": [(doc id, text)], "menu"} for the tenant."""
+    if not TENANT_ID_RE.match(tenant_id or ""):
+        raise UnknownTenant(tenant_id)
+    if tenant_id == DEFAULT_TENANT:
+        from knowledge_base import Document2, documents
+
+        return {
+            "name": DEFAULT_TENANT_NAME,
+            "documents": [(f"doc{i}", text) for i, text in enumerate(documents)],
+            "menu": Document2,
+        }
+
+    directory = os.path.join(root, tenant_id)
+    if not os.path.isdir(directory):
+        raise UnknownTenant(tenant_id)
+    source = {"name": _settings(directory).get("name", tenant_id), "documents": [], "menu": None}
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith(TENANT_FILE_EXTENSIONS):
+            continue
+        with open(os.path.join(directory, name), encoding="utf-8") as fp:
+            text = fp.read()
+        source["documents"].append((name, text))
+        if name in MENU_FILES:
+            source["menu"] = text
+    return source
+
+
+class Tenant:
+    """One restaurant's knowledge base and caches."""
+
+    def __init__(self, tenant_id, source, providers, vector_client, embedding_cache, audio_cache):
+        # Imported here so listing tenants doesn't load ChromaDB
+        from embeddings import CachedEmbeddingFunction
+
+        self.id = tenant_id
+        self.name = source["name"]
+        namespace = cache_namespace(tenant_id)
+
+        self.embed_fn = CachedEmbeddingFunction(providers.embedder, cache=embedding_cache, namespace=namespace)
+        self.query_embedder = QueryEmbedder(self.embed_fn)
+
+        records = [record for doc_id, text in source["documents"] for record in chunk_document(doc_id, text)]
+        name = collection_name(tenant_id)
+        self._vector_client = vector_client
+        self.db = vector_client.get_or_create_collection(name=name, embedding_function=self.embed_fn)
+        self.sync_summary = sync_collection(
+            self.db, records, manifest_path_for(name), embedding_model=self.embed_fn.inner.model
+        )
+        summary = self.sync_summary
+        if summary["added"] or summary["updated"] or summary["deleted"]:
+            print(f"ChromaDB re-indexed for {tenant_id}: {len(summary['added'])} added, "
+                  f"{len(summary['updated'])} updated, {len(summary['deleted'])} deleted.")
+            print(f"Embedding cache: {embedding_cache.stats()}")
+
+        # Built from the synced collection, so bulk-ingested chunks are searchable too
+        self.lexical_index = LexicalIndex.from_collection(self.db)
+        self.retrieval_paths = Counter()
+        self._stats_lock = threading.Lock()
+
+        # Scoped by the retrieved chunks' ids, so a changed knowledge base needs no invalidation
+        self.answer_cache = SemanticAnswerCache()
+        # Answers still streaming, shared with identical questions that arrive meanwhile
+        self.llm_streams = StreamCoalescer()
+        self.synthesize = audio_cache.wrap(providers.tts.synthesize, voice=providers.tts.voice, namespace=namespace)
+        self.menu_index = parse_menu(source["menu"]) if source["menu"] else None
+
+    def retrieve(self, question, lang="en"):
+        """
+        Returns the packed context for `question`, with what the answer cache needs to key
+        on it. Chunks come from BM25 and vector search fused by rank; when the lexical match
+        is decisive (a dish or place named outright) the query isn't embedded at all, and
+        "embedding" is None.
+        """
+        with span("retrieve", language=lang, tenant=self.id) as retrieve_span:
+            with span("retrieve.lexical"):
+                hits = self.lexical_index.search(question, CONTEXT_TOP_K)
+            if is_decisive(hits):
+                path, embedding = "lexical", None
+                result = self.lexical_index.result([record_id for record_id, _, _ in hits])
+            else:
+                path = "hybrid" if hits else "vector"
+                # Embed the query once; the vector is used for both retrieval and the answer cache
+                with span("retrieve.embed_query"):
+                    embedding = self.query_embedder.embed(question, lang)
+                with span("retrieve.db_query", top_k=CONTEXT_TOP_K):
+                    result = self.db.query(
+                        query_embeddings=[embedding], n_results=CONTEXT_TOP_K, include=["documents", "metadatas"]
+                    )
+                if hits:
+                    result = fuse_results(result, hits, self.lexical_index, CONTEXT_TOP_K)
+            context = pack_context(result, token_budget=CONTEXT_TOKEN_BUDGET)
+            retrieve_span.set_attributes({"path": path, "context_tokens": estimate_tokens(context)})
+        with self._stats_lock:
+            self.retrieval_paths[path] += 1
+        record("retrieval.context_tokens", estimate_tokens(context), language=lang)
+        ids = result["ids"][0] if result["ids"] else []
+        return {
+            "context": context,
+            "ids": ids,
+            "context_key": context_version(ids),
+            "embedding": embedding,
+        }
+
+    def retrieval_stats(self):
+        with self._stats_lock:
+            paths = dict(self.retrieval_paths)
+        queries = sum(paths.values())
+        return {
+            "queries": queries,
+            "lexical_fast_path": paths.get("lexical", 0),
+            "hybrid": paths.get("hybrid", 0),
+            "vector_only": paths.get("vector", 0),
+            # Queries where BM25 found anything, and where it saved the embedding call outright
+            "lexical_hit_ratio": (queries - paths.get("vector", 0)) / queries if queries else 0.0,
+            "embedding_skipped_ratio": paths.get("lexical", 0) / queries if queries else 0.0,
+        }
+
+    def close(self):
+        """Called when the tenant is evicted; lets the NumPy index drop its collection (Chroma has nothing to drop)."""
+        release = getattr(self._vector_client, "release", None)
+        if release is not None:
+            release(self.db.name)
+
+    def stats(self):
+        return {
+            "name": self.name,
+            "retrieval": self.retrieval_stats(),
+            "answer_cache": self.answer_cache.stats(),
+            "llm_coalescing": self.llm_streams.stats(),
+            "query_embedder": self.query_embedder.stats(),
+            "vector_index": self.db.stats() if hasattr(self.db, "stats") else {"backend": "chroma", "count": self.db.count()},
+        }
+
+
+class TenantRegistry:
+    """
+    LRU of loaded tenants. A cold tenant is loaded by the first request for it; requests
+    arriving for the same tenant meanwhile wait for that load instead of starting their own.
+    """
+
+    def __init__(self, build, max_loaded=TENANTS_MAX_LOADED, root=TENANTS_DIR):
+        self.build = build  # (tenant id, source) -> Tenant
+        self.max_loaded = max_loaded
+        self.root = root
+        self.hits = 0
+        self.loads = 0
+        self.evictions = 0
+        self.load_seconds = 0.0
+        self._loaded = OrderedDict()  # tenant id -> Tenant
+        self._loading = {}  # tenant id -> Future
+        self._lock = threading.Lock()
+
+    def get(self, tenant_id):
+        with self._lock:
+            tenant = self._loaded.get(tenant_id)
+            if tenant is not None:
+                self._loaded.move_to_end(tenant_id)
+                self.hits += 1
+                return tenant
+            pending = self._loading.get(tenant_id)
+            leader = pending is None
+            if leader:
+                pending = self._loading[tenant_id] = Future()
+
+        if leader:
+            started = time.perf_counter()
+            try:
+                with span("tenant.load", tenant=tenant_id):
+                    tenant = self.build(tenant_id, load_tenant_source(tenant_id, self.root))
+            except BaseException as e:
+                with self._lock:
+                    del self._loading[tenant_id]
+                pending.set_exception(e)
+                raise
+            evicted = []
+            with self._lock:
+                del self._loading[tenant_id]
+                self._loaded[tenant_id] = tenant
+                self.loads += 1
+                self.load_seconds += time.perf_counter() - started
+                while len(self._loaded) > self.max_loaded:
+                    evicted.append(self._loaded.popitem(last=False)[1])
+                    self.evictions += 1
+            pending.set_result(tenant)
+            for old in evicted:
+                old.close()
+        return pending.result()
+
+    def stats(self):
+        lookups = self.hits + self.loads
+        return {
+            "loaded": len(self._loaded),
+            "max_loaded": self.max_loaded,
+            "hits": self.hits,
+            "loads": self.loads,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "mean_load_seconds": self.load_seconds / self.loads if self.loads else 0.0,
+        }
@@ -0,0 +1,185 @@
+"""
+Conversation transcripts in SQLite (WAL mode), so a guest who reconnects gets their
+conversation back, long sessions can be paged instead of held in memory, and the
+questions asked can be analysed.
+
+Messages are appended from the request path into an in-memory queue and written by a
+background thread in batches, one transaction every TRANSCRIPT_FLUSH_INTERVAL seconds.
+Reads see queued messages too.
+
+    python transcripts.py top-questions                   # most asked, e.g. to pre-warm caches
+    python transcripts.py top-questions --tenant riverside-cafe --days 7 --limit 50
+"""
+import argparse
+import atexit
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from query_embedder import normalize_query
+
+TRANSCRIPT_DB_PATH = os.getenv("TRANSCRIPT_DB_PATH", os.path.join(".cache", "transcripts.sqlite3"))
+TRANSCRIPT_FLUSH_INTERVAL = float(os.getenv("TRANSCRIPT_FLUSH_INTERVAL", 0.5))
+# Messages drawn when a conversation is opened; older ones load on demand
+TRANSCRIPT_WINDOW = int(os.getenv("TRANSCRIPT_WINDOW", 20))
+
+COLUMNS = ("tenant", "session_id", "role", "text", "lang", "source", "question_key", "created")
+
+
+class TranscriptStore:
+    """Append-only message log keyed by (tenant, session id)."""
+
+    def __init__(self, path=TRANSCRIPT_DB_PATH, flush_interval=TRANSCRIPT_FLUSH_INTERVAL):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.flush_interval = flush_interval
+        self.appended = 0
+        self.written = 0
+        self.batches = 0
+        self._pending = []  # rows not written yet, oldest first
+        self._lock = threading.Lock()  # guards _pending only, so append() never waits on the disk
+        # Held while a batch is written and while reading, so a reader sees each message
+        # either queued or written, never neither
+        self._db_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        # Readers (other app processes, the analytics CLI) don't block the writer
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS messages ("
+            " id INTEGER PRIMARY KEY, tenant TEXT NOT NULL, session_id TEXT NOT NULL,"
+            " role TEXT NOT NULL, text TEXT NOT NULL, lang TEXT, source TEXT,"
+            " question_key TEXT, created REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS messages_session ON messages(tenant, session_id, created)")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS messages_question ON messages(tenant, question_key, created)"
+            " WHERE question_key IS NOT NULL"
+        )
+        self._conn.commit()
+        self._writer = threading.Thread(target=self._run, name="transcript-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def append(self, tenant, session_id, role, text, lang=None, source=None):
+        """Queues a message ("user" or "assistant"); returns without touching the disk."""
+        question_key = normalize_query(text) if role == "user" else None
+        row = (tenant, session_id, role, text, lang, source, question_key, time.time())
+        with self._lock:
+            self._pending.append(row)
+            self.appended += 1
+
+    def _run(self):
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self):
+        with self._db_lock:
+            with self._lock:
+                if not self._pending:
+                    return
+                batch, self._pending = self._pending, []
+            try:
+                with self._conn:
+                    self._conn.executemany(
+                        f"INSERT INTO messages ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})", batch
+                    )
+            except sqlite3.Error:
+                # Queued again, ahead of anything appended meanwhile, for the next flush
+                with self._lock:
+                    self._pending[:0] = batch
+                raise
+            self.written += len(batch)
+            self.batches += 1
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        self._writer.join(timeout=5)
+        self.flush()
+        self._conn.close()
+
+    def history(self, tenant, session_id, limit=TRANSCRIPT_WINDOW, offset=0):
+        """
+        Up to `limit` messages, oldest first, that come before the newest `offset` messages
+        of the conversation: offset 0 is the latest page, offset=len(loaded) the one before it.
+        Each message is {"role", "text", "lang", "source", "created"}.
+        """
+        with self._db_lock:
+            with self._lock:
+                # Newest first: queued messages, then written ones
+                queued = [row for row in reversed(self._pending) if row[0] == tenant and row[1] == session_id]
+            page = queued[offset:offset + limit]
+            if len(page) < limit:
+                page += self._conn.execute(
+                    f"SELECT {', '.join(COLUMNS)} FROM messages WHERE tenant = ? AND session_id = ?"
+                    " ORDER BY created DESC, id DESC LIMIT ? OFFSET ?",
+                    (tenant, session_id, limit - len(page), max(0, offset - len(queued))),
+                ).fetchall()
+        return [
+            {"role": row[2], "text": row[3], "lang": row[4], "source": row[5], "created": row[7]}
+            for row in reversed(page)
+        ]
+
+    def turns(self, tenant, session_id, limit):
+        """The last `limit` (question, answer) pairs of a conversation, oldest first."""
+        pairs, question = [], None
+        for message in self.history(tenant, session_id, limit=limit * 2 + 1):
+            if message["role"] == "user":
+                question = message["text"]
+            elif question is not None:
+                pairs.append((question, message["text"]))
+                question = None
+        return pairs[-limit:]
+
+    def top_questions(self, tenant, limit=20, since=None):
+        """[{"question", "count", "last_asked"}] most asked first; trivial variants count as one."""
+        self.flush()
+        with self._db_lock:
+            rows = self._conn.execute(
+                "SELECT question_key, COUNT(*), MAX(text), MAX(created) FROM messages"
+                " WHERE tenant = ? AND question_key IS NOT NULL AND created >= ?"
+                " GROUP BY question_key ORDER BY COUNT(*) DESC, MAX(created) DESC LIMIT ?",
+                (tenant, since or 0, limit),
+            ).fetchall()
+        return [{"question": text, "count": count, "last_asked": last} for _, count, text, last in rows]
+
+    def stats(self):
+        with self._lock:
+            queued = len(self._pending)
+        return {
+            "appended": self.appended,
+            "written": self.written,
+            "queued": queued,
+            "batches": self.batches,
+            "mean_batch": self.written / self.batches if self.batches else 0.0,
+        }
+
+
+def main():
+    from tenants import DEFAULT_TENANT
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["top-questions"])
+    parser.add_argument("--tenant", default=DEFAULT_TENANT)
+    parser.add_argument("--days", type=float, help="only questions asked in the last DAYS days")
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    store = TranscriptStore()
+    since = time.time() - args.days * 86400 if args.days else None
+    for row in store.top_questions(args.tenant, limit=args.limit, since=since):
+        print(json.dumps(row, ensure_ascii=False))
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+import hashlib
+import mmap
+import os
+import threading
+from collections import OrderedDict
+
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", os.path.join(".cache", "tts"))
+TTS_CACHE_MAX_BYTES = int(os.getenv("TTS_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+TTS_CACHE_MEMORY_BYTES = int(os.getenv("TTS_CACHE_MEMORY_BYTES", 32 * 1024 * 1024))
+
+
+def normalize_speech_text(text):
+    return " ".join(text.split())
+
+
+class AudioCache:
+    """
+    Content-addressed cache of synthesized clips, keyed by (normalized text, language,
+    voice settings). Clips live on disk under a size cap with least recently used
+    eviction, and the hottest ones are also kept in memory. Since the speech pipeline
+    synthesizes sentence by sentence, answers that share sentences (greetings, hours,
+    address, phone numbers) only pay for the sentences that are new.
+    """
+
+    def __init__(self, directory=TTS_CACHE_DIR, max_bytes=TTS_CACHE_MAX_BYTES, memory_bytes=TTS_CACHE_MEMORY_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.memory_bytes = memory_bytes
+        self.hits = 0
+        self.misses = 0
+        self.bytes_served = 0
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()  # key -> bytes
+        self._memory_size = 0
+        os.makedirs(directory, exist_ok=True)
+
+        # On-disk index ordered from least to most recently used
+        entries = []
+        for entry in os.scandir(directory):
+            if entry.name.endswith(".mp3"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, entry.name[:-4], stat.st_size))
+        self._disk = OrderedDict((key, size) for _, key, size in sorted(entries))
+        self._disk_size = sum(self._disk.values())
+
+    @staticmethod
+    def key(text, lang, voice, namespace=""):
+        payload = f"{normalize_speech_text(text)}\0{lang}\0{voice}"
+        if namespace:
+            payload = f"{namespace}\0{payload}"
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.mp3")
+
+    def _remember(self, key, audio):
+        if len(audio) > self.memory_bytes:
+            return
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return
+        self._memory[key] = audio
+        self._memory_size += len(audio)
+        while self._memory_size > self.memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_size -= len(evicted)
+
+    def get(self, key):
+        with self._lock:
+            audio = self._memory.get(key)
+            if audio is not None:
+                self._memory.move_to_end(key)
+            elif key in self._disk:
+                try:
+                    with open(self._path(key), "rb") as fp, mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                        audio = mapped[:]
+                    os.utime(self._path(key))
+                except (OSError, ValueError):
+                    self._disk_size -= self._disk.pop(key)
+                    audio = None
+                if audio is not None:
+                    self._disk.move_to_end(key)
+                    self._remember(key, audio)
+
+            if audio is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.bytes_served += len(audio)
+            return audio
+
+    def put(self, key, audio):
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as fp:
+            fp.write(audio)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._disk_size += len(audio) - self._disk.pop(key, 0)
+            self._disk[key] = len(audio)
+            self._remember(key, audio)
+            while self._disk_size > self.max_bytes and len(self._disk) > 1:
+                evicted, size = self._disk.popitem(last=False)
+                self._disk_size -= size
+                try:
+                    os.remove(self._path(evicted))
+                except FileNotFoundError:
+                    pass
+
+    def wrap(self, synthesize_fn, voice="gtts", namespace=""):
+        """
+        Returns a `synthesize(text, lang)` that serves cached clips and stores new ones.
+        Clips are keyed by `namespace` too, so tenants sharing the cache never see each other's.
+        """
+        def cached_synthesize(text, lang="en"):
+            key = self.key(text, lang, voice, namespace)
+            audio = self.get(key)
+            if audio is None:
+                audio = synthesize_fn(text, lang)
+                self.put(key, audio)
+            return audio
+        return cached_synthesize
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "bytes_served": self.bytes_served,
+            "disk_bytes": self._disk_size,
+            "memory_bytes": self._memory_size,
+            "entries": len(self._disk),
+        }
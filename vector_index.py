@@ -0,0 +1,457 @@
+"""
+In-memory vector index for small knowledge bases (tens to a few thousand chunks), a
+drop-in for the Chroma collection that `Tenant.db` holds. Select it with
+VECTOR_BACKEND=numpy.
+
+Embeddings are normalized and kept as one contiguous matrix, float16 or int8 with a
+per-row scale (VECTOR_INDEX_DTYPE), so a query is a single matrix-vector product plus
+`argpartition` for the top k. Every write saves a snapshot under VECTOR_INDEX_PATH,
+which is what later loads memory-map instead of reading into memory:
+
+    <path>/<collection>.json                ids, documents, metadatas, dtype, generation
+    <path>/<collection>.<generation>.npy    the embedding matrix
+    <path>/<collection>.<generation>.scales.npy   per-row scales (int8 only)
+
+Writes rewrite the whole snapshot, which is fine at this size; a corpus large enough
+for that to matter belongs in Chroma. They hold <path>/<collection>.lock, so the app and
+ingest.py can write the same collection, and reads reload a snapshot that changed.
+"""
+import contextlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+
+import numpy as np
+
+from kb_index import CHROMA_PATH
+
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "chroma")
+VECTOR_INDEX_PATH = os.getenv("VECTOR_INDEX_PATH", os.path.join(".cache", "vectors"))
+VECTOR_INDEX_DTYPE = os.getenv("VECTOR_INDEX_DTYPE", "int8")
+
+DTYPES = ("float32", "float16", "int8")
+# Rows scored per block: a quantized matrix is converted to float32 a block at a time,
+# small enough to stay in cache instead of being copied whole for every query
+BLOCK_ROWS = 256
+
+
+def open_client(backend=VECTOR_BACKEND):
+    """A client with `get_or_create_collection(name, embedding_function)` for VECTOR_BACKEND."""
+    if backend == "numpy":
+        return NumpyClient()
+    if backend != "chroma":
+        raise ValueError(f"unknown VECTOR_BACKEND {backend!r}; use 'chroma' or 'numpy'")
+    import chromadb
+    return chromadb.PersistentClient(path=CHROMA_PATH)
+
+
+def quantize(vectors, dtype):
+    """(matrix of the normalized `vectors` in `dtype`, per-row float32 scales or None)."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        # A single vector, or none at all
+        vectors = vectors.reshape(1, -1) if vectors.size else vectors.reshape(0, 0)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    unit = vectors / np.where(norms == 0, 1, norms)
+    if dtype != "int8":
+        return np.ascontiguousarray(unit, dtype=dtype), None
+    scales = np.abs(unit).max(axis=1, initial=0) / 127
+    scales[scales == 0] = 1
+    return np.round(unit / scales[:, None]).astype(np.int8), scales.astype(np.float32)
+
+
+def dequantize(matrix, scales):
+    vectors = matrix.astype(np.float32)
+    return vectors * scales[:, None] if scales is not None else vectors
+
+
+def similarities(matrix, scales, queries):
+    """Cosine similarity of every row with every (normalized) query, shape (rows, queries)."""
+    scores = np.empty((len(matrix), len(queries)), dtype=np.float32)
+    for start in range(0, len(matrix), BLOCK_ROWS):
+        block = matrix[start:start + BLOCK_ROWS]
+        scores[start:start + len(block)] = block.astype(np.float32, copy=False) @ queries.T
+    if scales is not None:
+        scores *= scales[:, None]
+    return scores
+
+
+def top_k(scores, k):
+    """Indices of the `k` highest `scores`, best first."""
+    if k < len(scores):
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(len(scores))
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+def _matches(metadata, where):
+    for key, value in where.items():
+        if key == "$and":
+            if not all(_matches(metadata, clause) for clause in value):
+                return False
+            continue
+        if isinstance(value, dict) or key.startswith("$"):
+            raise ValueError(f"only equality and $and filters are supported, got {key!r}: {value!r}")
+        if (metadata or {}).get(key) != value:
+            return False
+    return True
+
+
+@contextlib.contextmanager
+def _file_lock(path):
+    """Exclusive lock on `path`, held across processes (the app, the chat API, ingest.py)."""
+    with open(path, "a+b") as fp:
+        if sys.platform == "win32":
+            import msvcrt
+            while True:
+                try:
+                    msvcrt.locking(fp.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    pass  # LK_LOCK gives up after 10 s; keep waiting
+            try:
+                yield
+            finally:
+                fp.seek(0)
+                msvcrt.locking(fp.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(fp, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fp, fcntl.LOCK_UN)
+
+
+class NumpyCollection:
+    """
+    The subset of a Chroma collection the app uses: `get`, `query`, `upsert`, `update`,
+    `delete` and `count`, with Chroma's argument names and result shapes. Distances are
+    squared L2 between unit vectors (2 - 2 * cosine), as in Chroma's default space.
+
+    Several processes can share a collection: reads pick up a snapshot another process
+    wrote since, and writes are applied to the latest snapshot under a file lock.
+    """
+
+    def __init__(self, name, path=VECTOR_INDEX_PATH, embedding_function=None, dtype=VECTOR_INDEX_DTYPE):
+        if dtype not in DTYPES:
+            raise ValueError(f"unknown VECTOR_INDEX_DTYPE {dtype!r}; use one of {', '.join(DTYPES)}")
+        self.name = name
+        self.path = path
+        self.dtype = dtype
+        self._embedding_function = embedding_function
+        self._lock = threading.Lock()
+        self.mapped = False
+        self.load_seconds = 0.0
+        self.reloads = 0
+        self._generation = None
+        self._signature = None  # stat of the snapshot pointer last loaded
+        # (ids, {id: row}, documents, metadatas, matrix, scales), swapped whole so queries need no lock
+        self._state = ([], {}, [], [], None, None)
+        self._refresh()
+
+    def _snapshot_path(self, suffix):
+        return os.path.join(self.path, f"{self.name}{suffix}")
+
+    def _snapshot_signature(self):
+        try:
+            stat = os.stat(self._snapshot_path(".json"))
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+    def _refresh(self):
+        """Loads the snapshot if it changed since this process last looked; one stat when it didn't."""
+        if self._snapshot_signature() != self._signature:
+            with self._lock:
+                self._load_if_changed()
+
+    def _load_if_changed(self):
+        # Caller holds self._lock
+        for attempt in range(3):
+            signature = self._snapshot_signature()
+            if signature == self._signature:
+                return
+            try:
+                self._load(signature)
+                return
+            except FileNotFoundError:
+                # Another process replaced the snapshot between reading the pointer and the matrix
+                if attempt == 2:
+                    raise
+
+    def _load(self, signature):
+        started = time.perf_counter()
+        snapshot = {}
+        if signature is not None:
+            try:
+                with open(self._snapshot_path(".json"), encoding="utf-8") as fp:
+                    snapshot = json.load(fp)
+            except json.JSONDecodeError:
+                pass
+        generation = snapshot.get("generation")
+        if generation is not None and generation == self._generation:
+            self._signature = signature
+            return
+        ids = snapshot.get("ids") or []
+        matrix = scales = None
+        if ids:
+            # Memory-mapped: pages are read on first use and shared with other processes
+            matrix = np.load(self._snapshot_path(f".{generation}.npy"), mmap_mode="r")
+            if snapshot["dtype"] == "int8":
+                scales = np.load(self._snapshot_path(f".{generation}.scales.npy"), mmap_mode="r")
+        self.mapped = bool(ids)
+        if ids and snapshot["dtype"] != self.dtype:
+            # Written with another VECTOR_INDEX_DTYPE; requantized here, saved that way by the next write
+            matrix, scales = quantize(dequantize(matrix, scales), self.dtype)
+            self.mapped = False
+        self._state = (
+            ids, {record_id: row for row, record_id in enumerate(ids)},
+            snapshot.get("documents") or [], snapshot.get("metadatas") or [], matrix, scales,
+        )
+        if self._generation is not None:
+            self.reloads += 1
+        self._generation = generation
+        self._signature = signature
+        self.load_seconds = time.perf_counter() - started
+
+    def _write(self, change):
+        """
+        Applies `change(ids, rows, documents, metadatas, matrix, scales)` to the latest
+        snapshot, re-read under the file lock so writes from other processes are kept,
+        and saves what it returns (None for no change).
+        """
+        os.makedirs(self.path, exist_ok=True)
+        with self._lock, _file_lock(self._snapshot_path(".lock")):
+            self._load_if_changed()
+            changed = change(*self._state)
+            if changed is not None:
+                self._save(*changed)
+
+    def _save(self, ids, documents, metadatas, matrix, scales):
+        # Caller holds the file lock
+        generation = f"{time.time_ns():x}{os.getpid():x}"
+        if ids:
+            np.save(self._snapshot_path(f".{generation}.npy"), matrix)
+            if scales is not None:
+                np.save(self._snapshot_path(f".{generation}.scales.npy"), scales)
+        tmp_path = self._snapshot_path(f".json.{generation}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as fp:
+            json.dump({
+                "dtype": self.dtype, "generation": generation,
+                "ids": ids, "documents": documents, "metadatas": metadatas,
+            }, fp)
+        # The new matrix files are complete before the pointer to them is replaced
+        os.replace(tmp_path, self._snapshot_path(".json"))
+        self._remove_stale(generation)
+
+        if ids:
+            matrix = np.load(self._snapshot_path(f".{generation}.npy"), mmap_mode="r")
+            if scales is not None:
+                scales = np.load(self._snapshot_path(f".{generation}.scales.npy"), mmap_mode="r")
+        self._state = (ids, {record_id: row for row, record_id in enumerate(ids)}, documents, metadatas,
+                       matrix if ids else None, scales if ids else None)
+        self.mapped = bool(ids)
+        self._generation = generation
+        self._signature = self._snapshot_signature()
+
+    def _remove_stale(self, generation):
+        pattern = re.compile(re.escape(self.name) + r"\.([0-9a-f]+)(\.scales)?\.npy$")
+        for filename in os.listdir(self.path):
+            match = pattern.match(filename)
+            if match and match.group(1) != generation:
+                try:
+                    os.remove(os.path.join(self.path, filename))
+                except OSError:
+                    pass  # still mapped (Windows); removed by a later save
+
+    def count(self):
+        self._refresh()
+        return len(self._state[0])
+
+    def get(self, ids=None, where=None, limit=None, offset=None, include=("metadatas", "documents")):
+        self._refresh()
+        record_ids, rows, documents, metadatas, matrix, scales = self._state
+        if ids is None:
+            selected = range(len(record_ids))
+        else:
+            selected = [rows[record_id] for record_id in ids if record_id in rows]
+        if where:
+            selected = [row for row in selected if _matches(metadatas[row], where)]
+        selected = list(selected)[offset or 0:None if limit is None else (offset or 0) + limit]
+        embeddings = None
+        if "embeddings" in include:
+            embeddings = dequantize(matrix[selected], scales[selected] if scales is not None else None) \
+                if selected else np.empty((0, 0), dtype=np.float32)
+        return {
+            "ids": [record_ids[row] for row in selected],
+            "documents": [documents[row] for row in selected] if "documents" in include else None,
+            "metadatas": [metadatas[row] for row in selected] if "metadatas" in include else None,
+            "embeddings": embeddings,
+        }
+
+    def query(self, query_embeddings=None, query_texts=None, n_results=10, where=None,
+              include=("metadatas", "documents", "distances")):
+        if query_embeddings is None:
+            query_embeddings = self._embedding_function(query_texts)
+        queries, _ = quantize(query_embeddings, "float32")
+        self._refresh()
+        record_ids, _, documents, metadatas, matrix, scales = self._state
+        result = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        if matrix is None or not len(queries):
+            for _ in range(len(queries)):
+                for key in result:
+                    result[key].append([])
+        else:
+            if queries.shape[1] != matrix.shape[1]:
+                raise ValueError(f"query has {queries.shape[1]} dimensions, collection {self.name!r} has "
+                                 f"{matrix.shape[1]}")
+            scores = similarities(matrix, scales, queries)
+            allowed = None
+            if where:
+                allowed = np.array([_matches(metadata, where) for metadata in metadatas])
+            for column in range(len(queries)):
+                column_scores = scores[:, column]
+                if allowed is not None:
+                    column_scores = np.where(allowed, column_scores, -np.inf)
+                best = top_k(column_scores, min(n_results, len(record_ids) if allowed is None else int(allowed.sum())))
+                result["ids"].append([record_ids[row] for row in best])
+                result["documents"].append([documents[row] for row in best])
+                result["metadatas"].append([metadatas[row] for row in best])
+                result["distances"].append([float(2 - 2 * column_scores[row]) for row in best])
+        for key in ("documents", "metadatas", "distances"):
+            if key not in include:
+                result[key] = None
+        return result
+
+    def upsert(self, ids, documents=None, metadatas=None, embeddings=None):
+        if not len(ids):
+            return
+        if embeddings is None:
+            embeddings = self._embedding_function(documents)
+        new_rows, new_scales = quantize(embeddings, self.dtype)
+
+        def change(record_ids, rows, old_documents, old_metadatas, matrix, scales):
+            record_ids, old_documents, old_metadatas = list(record_ids), list(old_documents), list(old_metadatas)
+            if matrix is not None and matrix.shape[1] != new_rows.shape[1]:
+                raise ValueError(f"embeddings have {new_rows.shape[1]} dimensions, collection {self.name!r} has "
+                                 f"{matrix.shape[1]}")
+            # The last of duplicate ids wins, as in Chroma
+            positions = {record_id: position for position, record_id in enumerate(ids)}
+            targets = []
+            for record_id, position in positions.items():
+                row = rows.get(record_id)
+                if row is None:
+                    row = len(record_ids)
+                    record_ids.append(record_id)
+                    old_documents.append(None)
+                    old_metadatas.append(None)
+                targets.append(row)
+                if documents is not None:
+                    old_documents[row] = documents[position]
+                if metadatas is not None:
+                    old_metadatas[row] = metadatas[position]
+
+            # A copy in memory: the mapped snapshot is read-only
+            grown = np.empty((len(record_ids), new_rows.shape[1]), dtype=new_rows.dtype)
+            grown_scales = np.empty(len(record_ids), dtype=np.float32) if new_scales is not None else None
+            if matrix is not None:
+                grown[:len(matrix)] = matrix
+                if grown_scales is not None:
+                    grown_scales[:len(matrix)] = scales
+            sources = list(positions.values())
+            grown[targets] = new_rows[sources]
+            if grown_scales is not None:
+                grown_scales[targets] = new_scales[sources]
+            return record_ids, old_documents, old_metadatas, grown, grown_scales
+
+        self._write(change)
+
+    add = upsert
+
+    def update(self, ids, metadatas=None, documents=None, embeddings=None):
+        if documents is not None or embeddings is not None:
+            # New text means a new vector; only known ids are touched, like Chroma's update
+            self._refresh()
+            known = [position for position, record_id in enumerate(ids) if record_id in self._state[1]]
+            if embeddings is None:
+                embeddings = self._embedding_function([documents[position] for position in known])
+            else:
+                embeddings = [embeddings[position] for position in known]
+            self.upsert(
+                ids=[ids[position] for position in known],
+                documents=[documents[position] for position in known] if documents is not None else None,
+                metadatas=[metadatas[position] for position in known] if metadatas is not None else None,
+                embeddings=embeddings,
+            )
+            return
+
+        def change(record_ids, rows, documents, old_metadatas, matrix, scales):
+            old_metadatas = list(old_metadatas)
+            for record_id, metadata in zip(ids, metadatas or []):
+                if record_id in rows:
+                    old_metadatas[rows[record_id]] = metadata
+            return list(record_ids), list(documents), old_metadatas, matrix, scales
+
+        self._write(change)
+
+    def delete(self, ids=None, where=None):
+        def change(record_ids, rows, documents, metadatas, matrix, scales):
+            doomed = set(ids) if ids is not None else set(record_ids)
+            if where:
+                doomed = {record_id for record_id in doomed
+                          if record_id in rows and _matches(metadatas[rows[record_id]], where)}
+            keep = [row for row, record_id in enumerate(record_ids) if record_id not in doomed]
+            if len(keep) == len(record_ids):
+                return None
+            return (
+                [record_ids[row] for row in keep], [documents[row] for row in keep],
+                [metadatas[row] for row in keep],
+                np.ascontiguousarray(matrix[keep]) if keep else None,
+                np.ascontiguousarray(scales[keep]) if keep and scales is not None else None,
+            )
+
+        self._write(change)
+
+    def stats(self):
+        _, _, _, _, matrix, scales = self._state
+        return {
+            "backend": "numpy",
+            "dtype": self.dtype,
+            "count": self.count(),
+            "dimensions": matrix.shape[1] if matrix is not None else 0,
+            "index_bytes": (matrix.nbytes if matrix is not None else 0) + (scales.nbytes if scales is not None else 0),
+            "mapped": self.mapped,
+            # Snapshots written by another process (e.g. ingest.py) picked up since load
+            "reloads": self.reloads,
+        }
+
+
+class NumpyClient:
+    """Stands in for chromadb.PersistentClient, with one snapshot per collection under `path`."""
+
+    def __init__(self, path=VECTOR_INDEX_PATH, dtype=VECTOR_INDEX_DTYPE):
+        self.path = path
+        self.dtype = dtype
+        self._collections = {}
+        self._lock = threading.Lock()
+
+    def get_or_create_collection(self, name, embedding_function=None):
+        with self._lock:
+            collection = self._collections.get(name)
+            if collection is None:
+                collection = self._collections[name] = NumpyCollection(
+                    name, self.path, embedding_function=embedding_function, dtype=self.dtype
+                )
+            elif embedding_function is not None:
+                collection._embedding_function = embedding_function
+            return collection
+
+    def release(self, name):
+        """Forgets a collection (e.g. of an evicted tenant); the next get_or_create_collection loads it afresh."""
+        with self._lock:
+            self._collections.pop(name, None)
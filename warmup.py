@@ -0,0 +1,55 @@
+import threading
+import time
+from concurrent.futures import Future
+
+from telemetry import span
+
+LOADING = "loading"
+READY = "ready"
+FAILED = "failed"
+
+
+class Warmup:
+    """
+    Builds something slow to start (e.g. the Assistant, which imports ChromaDB and syncs
+    the knowledge base) in a background thread, so a UI can render and show `status()`
+    meanwhile. `get()` blocks until it is built and raises the build's error if it failed.
+    """
+
+    def __init__(self, build, name="warmup"):
+        self.name = name
+        self.started = time.perf_counter()
+        self.seconds = None
+        self._future = Future()
+        self._thread = threading.Thread(target=self._run, args=(build,), name=name, daemon=True)
+        self._thread.start()
+
+    def _run(self, build):
+        try:
+            with span("startup.warmup", resource=self.name):
+                value = build()
+        except BaseException as e:
+            self.seconds = time.perf_counter() - self.started
+            self._future.set_exception(e)
+        else:
+            self.seconds = time.perf_counter() - self.started
+            self._future.set_result(value)
+
+    def get(self, timeout=None):
+        return self._future.result(timeout)
+
+    @property
+    def state(self):
+        if not self._future.done():
+            return LOADING
+        return FAILED if self._future.exception() is not None else READY
+
+    def status(self):
+        """{"state": "loading" | "ready" | "failed", "seconds", "error"}."""
+        state = self.state
+        return {
+            "state": state,
+            # Time the build took, or has been running so far
+            "seconds": self.seconds if self.seconds is not None else time.perf_counter() - self.started,
+            "error": str(self._future.exception()) if state == FAILED else None,
+        }